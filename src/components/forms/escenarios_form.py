@@ -2,14 +2,50 @@ import streamlit as st
 from src.utils.eval_basica import calcular_vpn, calcular_tir, calcular_bc, calcular_periodo_recuperacion
 from src.utils.ai import consultar_groq
 from src.utils.escenarios import (
+    escenario, curva_perfil, PERFILES_TEMPORALES,
     calcular_escenarios, calcular_estadisticas_escenarios, crear_tabla_escenarios,
     crear_grafico_vpn, crear_grafico_tir, crear_grafico_bc,
-    crear_grafico_distribucion, crear_grafico_probabilidades
+    crear_grafico_distribucion, crear_grafico_probabilidades, crear_grafico_flujos_escenarios,
+    simular_mezcla_escenarios, dispersion_normal, crear_grafico_mezcla
 )
+from src.utils.arbol_decision import arbol_piloto, arbol_abandono, evaluar_arbol, tabla_decisiones
 import plotly.graph_objects as go
 import pandas as pd
 import numpy as np
 
+COLUMNAS_ESCENARIOS = [
+    "Escenario", "Probabilidad (%)", "Factor Flujos", "Factor Inversión", "Factor Tasa",
+    "Perfil", "Periodo", "Duración", "Intensidad"
+]
+
+
+def _escenarios_iniciales():
+    """Tabla inicial con los escenarios pesimista, base y optimista."""
+    return pd.DataFrame(
+        [
+            ["Pesimista", 20.0, 0.7, 1.0, 1.0, "Uniforme", 1, 0, 1.0],
+            ["Base", 50.0, 1.0, 1.0, 1.0, "Uniforme", 1, 0, 1.0],
+            ["Optimista", 30.0, 1.3, 1.0, 1.0, "Uniforme", 1, 0, 1.0],
+        ],
+        columns=COLUMNAS_ESCENARIOS
+    )
+
+
+def _escenarios_desde_tabla(df, n_periodos):
+    """Convierte la tabla editada en la lista de escenarios del motor."""
+    return [
+        escenario(
+            str(fila["Escenario"]), fila["Probabilidad (%)"],
+            fila["Factor Flujos"], fila["Factor Inversión"], fila["Factor Tasa"],
+            curva=curva_perfil(
+                fila["Perfil"], n_periodos,
+                int(fila["Periodo"]), int(fila["Duración"]), float(fila["Intensidad"])
+            )
+        )
+        for _, fila in df.iterrows()
+    ]
+
+
 def show_escenarios_form():
     st.header("🎯 Análisis de Escenarios")
     st.markdown("Evalúa el proyecto bajo diferentes situaciones considerando la incertidumbre del futuro.")
@@ -21,54 +57,101 @@ def show_escenarios_form():
         
         with col1:
             st.subheader("📊 Configuración de Escenarios")
+            st.caption(
+                "Define tantos escenarios como necesites (agrega o elimina filas). "
+                "Cada factor multiplica la variable correspondiente del escenario base: "
+                "0.7 → 70% de los flujos, 1.1 → tasa un 10% mayor. El perfil añade una "
+                "forma temporal a los flujos: retraso en el arranque, shock en escalón "
+                "o lineal desde un periodo, o decaimiento al final de la vida útil."
+            )
             
-            # Escenario Pesimista
-            with st.expander("📉 Escenario Pesimista", expanded=True):
-                prob_pesimista = st.slider(
-                    "Probabilidad (%)",
-                    0.0,
-                    100.0,
-                    value=float(st.session_state.get('prob_pes', 20.0)),
-                    step=0.1,
-                    key="prob_pes"
-                )
-                factor_pesimista = st.slider("Factor de Reducción", 0.3, 0.9, 0.7, 0.05, key="factor_pes")
-                st.info(f"Los flujos se reducen al {factor_pesimista*100:.0f}% del escenario base")
+            if list(st.session_state.get('escenarios_df', pd.DataFrame()).columns) != COLUMNAS_ESCENARIOS:
+                st.session_state['escenarios_df'] = _escenarios_iniciales()
             
-            # Escenario Base
-            with st.expander("📊 Escenario Base", expanded=True):
-                prob_base = st.slider(
-                    "Probabilidad (%)",
-                    0.0,
-                    100.0,
-                    value=float(st.session_state.get('prob_base', 50.0)),
-                    step=0.1,
-                    key="prob_base"
-                )
-                st.info("Se utilizan los flujos del escenario base sin modificación")
+            df_escenarios_def = st.data_editor(
+                st.session_state['escenarios_df'],
+                num_rows="dynamic",
+                use_container_width=True,
+                hide_index=True,
+                key="editor_escenarios",
+                column_config={
+                    "Escenario": st.column_config.TextColumn(required=True),
+                    "Probabilidad (%)": st.column_config.NumberColumn(
+                        min_value=0.0, max_value=100.0, step=0.1, default=0.0, required=True
+                    ),
+                    "Factor Flujos": st.column_config.NumberColumn(
+                        min_value=0.0, step=0.05, default=1.0, required=True
+                    ),
+                    "Factor Inversión": st.column_config.NumberColumn(
+                        min_value=0.0, step=0.05, default=1.0, required=True
+                    ),
+                    "Factor Tasa": st.column_config.NumberColumn(
+                        min_value=0.0, step=0.05, default=1.0, required=True
+                    ),
+                    "Perfil": st.column_config.SelectboxColumn(
+                        options=list(PERFILES_TEMPORALES), default="Uniforme", required=True,
+                        help="Forma temporal del escenario sobre los flujos de cada periodo"
+                    ),
+                    "Periodo": st.column_config.NumberColumn(
+                        min_value=0, step=1, default=1, required=True,
+                        help="Retraso: periodos de retraso k. Resto: periodo en que empieza el cambio"
+                    ),
+                    "Duración": st.column_config.NumberColumn(
+                        min_value=0, step=1, default=0, required=True,
+                        help="Retraso: periodos de rampa. Escalón: periodos del shock (0 = hasta el final). "
+                             "Lineal: periodos hasta llegar a la intensidad"
+                    ),
+                    "Intensidad": st.column_config.NumberColumn(
+                        step=0.05, default=1.0, required=True,
+                        help="Escalón: factor del shock. Lineal: factor final. Decaimiento: caída % por periodo"
+                    ),
+                }
+            ).dropna()
             
-            # Escenario Optimista
-            with st.expander("📈 Escenario Optimista", expanded=True):
-                prob_optimista = st.slider(
-                    "Probabilidad (%)",
-                    0.0,
-                    100.0,
-                    value=float(st.session_state.get('prob_opt', 30.0)),
-                    step=0.1,
-                    key="prob_opt"
-                )
-                factor_optimista = st.slider("Factor de Incremento", 1.1, 2.0, 1.3, 0.05, key="factor_opt")
-                st.info(f"Los flujos se incrementan al {factor_optimista*100:.0f}% del escenario base")
+            # Validar escenarios y probabilidades
+            suma_prob = float(df_escenarios_def["Probabilidad (%)"].sum())
+            if df_escenarios_def.empty:
+                st.error("⚠️ Define al menos un escenario.")
+            elif df_escenarios_def["Escenario"].duplicated().any():
+                st.error("⚠️ Los nombres de los escenarios deben ser únicos.")
+            elif abs(suma_prob - 100.0) > 0.05:
+                st.error(f"⚠️ La suma de probabilidades debe ser 100%. Actual: {suma_prob:g}%")
             
-            # Validar probabilidades
-            suma_prob = prob_pesimista + prob_base + prob_optimista
-            if abs(suma_prob - 100.0) > 0.05:
-                st.error(f"⚠️ La suma de probabilidades debe ser 100%. Actual: {suma_prob}%")
+            with st.expander("🎲 Distribución continua (mezcla de escenarios)"):
+                usar_mezcla = st.checkbox(
+                    "Tratar los escenarios como una mezcla continua ❓",
+                    value=True,
+                    help="""
+                    Cada simulación elige un escenario según su probabilidad y
+                    aplica variaciones aleatorias alrededor de él. Así se obtiene
+                    la distribución completa del VPN, su VaR/CVaR y la
+                    probabilidad real de que el VPN sea positivo.
+                    """
+                )
+                col_m1, col_m2, col_m3 = st.columns(3)
+                with col_m1:
+                    desv_flujos_mezcla = st.slider(
+                        "Dispersión flujos e inversión (%)", 0.0, 30.0, 10.0, 1.0,
+                        key="desv_flujos_mezcla", disabled=not usar_mezcla
+                    )
+                with col_m2:
+                    desv_tasa_mezcla = st.slider(
+                        "Dispersión tasa (%)", 0.0, 20.0, 5.0, 1.0,
+                        key="desv_tasa_mezcla", disabled=not usar_mezcla
+                    )
+                with col_m3:
+                    n_mezcla = st.select_slider(
+                        "Simulaciones", [10_000, 50_000, 100_000, 500_000], value=50_000,
+                        key="n_mezcla", disabled=not usar_mezcla
+                    )
         
         with col2:
             st.subheader("🎲 Probabilidades")
             
-            fig_prob = crear_grafico_probabilidades(prob_pesimista, prob_base, prob_optimista)
+            fig_prob = crear_grafico_probabilidades(
+                df_escenarios_def["Escenario"].tolist(),
+                df_escenarios_def["Probabilidad (%)"].tolist()
+            )
             st.plotly_chart(fig_prob, use_container_width=True)
             
             # Preparar petición IA: marcador para procesar después de calcular resultados
@@ -77,27 +160,21 @@ def show_escenarios_form():
 
             st.button("🤖 Analizar Escenarios con IA", use_container_width=True, key="btn_ia", on_click=_request_ia)
 
-            # Callback seguro para normalizar probabilidades (actualiza session_state antes de recrear widgets)
+            # Callback seguro para normalizar probabilidades (reemplaza la tabla antes de recrear el editor)
             def _normalize_callback():
-                suma = st.session_state.get('prob_pes', 0) + st.session_state.get('prob_base', 0) + st.session_state.get('prob_opt', 0)
+                df = df_escenarios_def.copy()
+                suma = df["Probabilidad (%)"].sum()
                 if suma > 0:
-                    npes = round(st.session_state.get('prob_pes', 0) / suma * 100.0, 1)
-                    nbase = round(st.session_state.get('prob_base', 0) / suma * 100.0, 1)
-                    nopt = round(st.session_state.get('prob_opt', 0) / suma * 100.0, 1)
-                    diff = round(100.0 - (npes + nbase + nopt), 1)
-                    vals = [st.session_state.get('prob_pes', 0), st.session_state.get('prob_base', 0), st.session_state.get('prob_opt', 0)]
-                    max_idx = int(np.argmax(vals))
-                    if max_idx == 0:
-                        npes += diff
-                    elif max_idx == 1:
-                        nbase += diff
-                    else:
-                        nopt += diff
+                    normalizadas = (df["Probabilidad (%)"] / suma * 100.0).round(1)
+                    # El redondeo sobrante se asigna al escenario más probable
+                    normalizadas.iloc[int(np.argmax(normalizadas.values))] += round(100.0 - normalizadas.sum(), 1)
+                    df["Probabilidad (%)"] = normalizadas.round(1)
 
-                    st.session_state['prob_pes'] = float(npes)
-                    st.session_state['prob_base'] = float(nbase)
-                    st.session_state['prob_opt'] = float(nopt)
-                    st.session_state['normalizado_msg'] = f"Probabilidades normalizadas: Pes {npes}%, Base {nbase}%, Opt {nopt}%"
+                    st.session_state['escenarios_df'] = df.reset_index(drop=True)
+                    st.session_state.pop('editor_escenarios', None)
+                    st.session_state['normalizado_msg'] = "Probabilidades normalizadas: " + ", ".join(
+                        f"{n} {p:g}%" for n, p in zip(df["Escenario"], df["Probabilidad (%)"])
+                    )
                 else:
                     st.session_state['normalizado_msg'] = "No se puede normalizar: la suma de probabilidades es 0."
 
@@ -112,28 +189,40 @@ def show_escenarios_form():
                 else:
                     st.warning(msg)
         
-        if suma_prob == 100:
-            # Calcular escenarios
+        escenarios_validos = (
+            not df_escenarios_def.empty
+            and not df_escenarios_def["Escenario"].duplicated().any()
+            and abs(suma_prob - 100.0) <= 0.05
+        )
+        if escenarios_validos:
+            # Calcular todos los escenarios en lote
             flujos_base = st.session_state.proyecto_data['flujos']
             tasa = st.session_state.proyecto_data['tasa_descuento'] / 100
             
-            # Usar función para calcular escenarios
-            escenarios = calcular_escenarios(flujos_base, factor_pesimista, factor_optimista, tasa)
-            vpn_pes = escenarios['pesimista']['vpn']
-            tir_pes = escenarios['pesimista']['tir']
-            bc_pes = escenarios['pesimista']['bc']
+            lista_escenarios = _escenarios_desde_tabla(df_escenarios_def, len(flujos_base) - 1)
+            resultado = calcular_escenarios(flujos_base, lista_escenarios, tasa)
+            nombres = resultado['nombres']
+            probabilidades = resultado['probabilidades']
+            vpns = resultado['vpn']
+            tirs = resultado['tir']
+            bcs = resultado['bc']
             
-            vpn_base = escenarios['base']['vpn']
-            tir_base = escenarios['base']['tir']
-            bc_base = escenarios['base']['bc']
+            # Escenarios de referencia para las interpretaciones
+            idx_peor = int(np.argmin(vpns))
+            idx_mejor = int(np.argmax(vpns))
+            idx_probable = int(np.argmax(probabilidades))
             
-            vpn_opt = escenarios['optimista']['vpn']
-            tir_opt = escenarios['optimista']['tir']
-            bc_opt = escenarios['optimista']['bc']
+            # Distribución continua de la mezcla (semilla fija para resultados estables)
+            mezcla = None
+            if usar_mezcla:
+                mezcla = simular_mezcla_escenarios(
+                    flujos_base, lista_escenarios, tasa, n=n_mezcla,
+                    dispersion=dispersion_normal(desv_flujos_mezcla, desv_tasa_mezcla),
+                    semilla=42
+                )
             
             # Calcular estadísticas
-            stats = calcular_estadisticas_escenarios(vpn_pes, vpn_base, vpn_opt,
-                                                      prob_pesimista, prob_base, prob_optimista)
+            stats = calcular_estadisticas_escenarios(vpns, probabilidades, mezcla)
             vpn_esperado = stats['vpn_esperado']
             desv_std = stats['desv_std']
             rango = stats['rango']
@@ -144,13 +233,16 @@ def show_escenarios_form():
             st.subheader("📊 Resultados por Escenario")
             
             # Tabla comparativa
-            df_escenarios = crear_tabla_escenarios(prob_pesimista, prob_base, prob_optimista,
-                                                   vpn_pes, vpn_base, vpn_opt,
-                                                   tir_pes, tir_base, tir_opt,
-                                                   bc_pes, bc_base, bc_opt)
+            df_escenarios = crear_tabla_escenarios(resultado)
             
             st.dataframe(df_escenarios, use_container_width=True, hide_index=True)
             
+            with st.expander("📈 Flujos por periodo de cada escenario"):
+                st.plotly_chart(
+                    crear_grafico_flujos_escenarios(nombres, resultado['flujos']),
+                    use_container_width=True, key="flujos_escenarios_chart"
+                )
+            
             # Gráficos comparativos individuales
             st.markdown("---")
             st.markdown("### 📊 Gráficos Comparativos por Indicador")
@@ -160,48 +252,48 @@ def show_escenarios_form():
             
             with col1:
                 st.markdown("#### 💰 VPN por Escenario")
-                fig_vpn = crear_grafico_vpn(vpn_pes, vpn_base, vpn_opt)
+                fig_vpn = crear_grafico_vpn(nombres, vpns)
                 st.plotly_chart(fig_vpn, use_container_width=True, key="vpn_chart")
                 
                 # Interpretación de VPN debajo del gráfico (desplegable)
                 with st.expander("📝 Ver Interpretación"):
-                    if vpn_pes < 0 and vpn_base < 0 and vpn_opt < 0:
+                    if (vpns < 0).all():
                         st.error("⛔ **Alto Riesgo**: El VPN es negativo en todos los escenarios. El proyecto destruye valor en cualquier situación. **Recomendación: Rechazar el proyecto.**")
-                    elif vpn_pes < 0 and vpn_base < 0 and vpn_opt > 0:
-                        st.warning("⚠️ **Riesgo Muy Alto**: Solo el escenario optimista genera valor. El proyecto es extremadamente riesgoso. **Recomendación: Revisar o buscar alternativas.**")
-                    elif vpn_pes < 0 and vpn_base > 0:
+                    elif vpns[idx_probable] < 0:
+                        st.warning("⚠️ **Riesgo Muy Alto**: Solo los escenarios favorables generan valor. El proyecto es extremadamente riesgoso. **Recomendación: Revisar o buscar alternativas.**")
+                    elif vpns[idx_peor] < 0:
                         st.info("📊 **Riesgo Moderado**: El proyecto es viable en condiciones normales y optimistas, pero vulnerable ante escenarios adversos. **Recomendación: Implementar estrategias de mitigación de riesgos.**")
-                    elif vpn_pes > 0:
-                        st.success("✅ **Bajo Riesgo**: El VPN es positivo incluso en el escenario pesimista. El proyecto es robusto y genera valor en todas las condiciones. **Recomendación: Proceder con el proyecto.**")
+                    else:
+                        st.success("✅ **Bajo Riesgo**: El VPN es positivo incluso en el escenario más desfavorable. El proyecto es robusto y genera valor en todas las condiciones. **Recomendación: Proceder con el proyecto.**")
             
             with col2:
                 st.markdown("#### 📈 TIR por Escenario")
                 wacc = st.session_state.proyecto_data.get('tasa_descuento')
-                fig_tir = crear_grafico_tir(tir_pes, tir_base, tir_opt, wacc)
+                fig_tir = crear_grafico_tir(nombres, tirs, wacc)
                 st.plotly_chart(fig_tir, use_container_width=True, key="tir_chart")
                 
                 # Interpretación de TIR debajo del gráfico (desplegable)
                 with st.expander("📝 Ver Interpretación"):
                     wacc = st.session_state.proyecto_data.get('tasa_descuento', 0)
-                    if tir_pes and tir_base and tir_opt:
-                        if tir_pes > wacc and tir_base > wacc and tir_opt > wacc:
+                    if not np.isnan(tirs).any():
+                        if (tirs > wacc).all():
                             st.success(f"✅ **Rentabilidad Alta**: La TIR supera el WACC ({wacc}%) en todos los escenarios, indicando que el proyecto genera retornos superiores al costo del capital.")
-                        elif tir_base > wacc and tir_opt > wacc:
-                            st.info(f"📊 **Rentabilidad Moderada**: La TIR supera el WACC ({wacc}%) en escenarios base y optimista. En el pesimista, la rentabilidad es marginal.")
+                        elif tirs[idx_probable] > wacc:
+                            st.info(f"📊 **Rentabilidad Moderada**: La TIR supera el WACC ({wacc}%) en el escenario más probable. En los escenarios adversos, la rentabilidad es marginal.")
                         else:
                             st.warning(f"⚠️ **Rentabilidad Baja**: La TIR está por debajo del WACC ({wacc}%) en algunos escenarios. El proyecto no genera suficiente retorno en condiciones adversas.")
             
             with col3:
                 st.markdown("#### ⚖️ B/C por Escenario")
-                fig_bc = crear_grafico_bc(bc_pes, bc_base, bc_opt)
+                fig_bc = crear_grafico_bc(nombres, bcs)
                 st.plotly_chart(fig_bc, use_container_width=True, key="bc_chart")
                 
                 # Interpretación de B/C debajo del gráfico (desplegable)
                 with st.expander("📝 Ver Interpretación"):
-                    if bc_pes > 1 and bc_base > 1 and bc_opt > 1:
+                    if (bcs > 1).all():
                         st.success("✅ **Beneficios Superan Costos**: La relación B/C es mayor a 1 en todos los escenarios. Por cada dólar invertido, se recupera más de un dólar.")
-                    elif bc_base > 1 and bc_opt > 1:
-                        st.info("📊 **Balance Positivo**: El proyecto genera beneficios superiores a los costos en condiciones normales y optimistas.")
+                    elif bcs[idx_probable] > 1:
+                        st.info("📊 **Balance Positivo**: El proyecto genera beneficios superiores a los costos en el escenario más probable.")
                     else:
                         st.warning("⚠️ **Balance Ajustado**: La relación B/C indica que en algunos escenarios los beneficios no superan significativamente los costos.")
             
@@ -225,31 +317,30 @@ def show_escenarios_form():
                         f"• Inversión Inicial: ${abs(flujos_base[0]):,.2f}\n"
                         f"• Horizonte del Proyecto: {len(flujos_base)-1} períodos\n\n"
 
-                        f"**ESCENARIO PESIMISTA (Probabilidad: {prob_pesimista}%):**\n"
-                        f"• VPN: ${vpn_pes:,.2f}\n"
-                        f"• TIR: {tir_pes:.2f}%\n"
-                        f"• Relación Beneficio/Costo: {bc_pes:.2f}\n"
-                        f"• Factor de reducción aplicado: {factor_pesimista*100:.0f}% de los flujos base\n\n"
-
-                        f"**ESCENARIO BASE (Probabilidad: {prob_base}%):**\n"
-                        f"• VPN: ${vpn_base:,.2f}\n"
-                        f"• TIR: {tir_base:.2f}%\n"
-                        f"• Relación Beneficio/Costo: {bc_base:.2f}\n"
-                        f"• Flujos sin modificación (escenario más probable)\n\n"
-
-                        f"**ESCENARIO OPTIMISTA (Probabilidad: {prob_optimista}%):**\n"
-                        f"• VPN: ${vpn_opt:,.2f}\n"
-                        f"• TIR: {tir_opt:.2f}%\n"
-                        f"• Relación Beneficio/Costo: {bc_opt:.2f}\n"
-                        f"• Factor de incremento aplicado: {factor_optimista*100:.0f}% de los flujos base\n\n"
+                        + "".join(
+                            f"**ESCENARIO {fila['Escenario'].upper()} (Probabilidad: {fila['Probabilidad (%)']:g}%):**\n"
+                            f"• VPN: ${vpns[k]:,.2f}\n"
+                            f"• TIR: {f'{tirs[k]:.2f}%' if not np.isnan(tirs[k]) else 'N/A'}\n"
+                            f"• Relación Beneficio/Costo: {bcs[k]:.2f}\n"
+                            f"• Factores aplicados: flujos {fila['Factor Flujos']*100:.0f}%, "
+                            f"inversión {fila['Factor Inversión']*100:.0f}%, tasa {fila['Factor Tasa']*100:.0f}% del escenario base\n"
+                            f"• Perfil temporal de los flujos: {fila['Perfil']}\n\n"
+                            for k, (_, fila) in enumerate(df_escenarios_def.iterrows())
+                        ) +
 
                         f"**ANÁLISIS DE RIESGO:**\n"
                         f"• Desviación Estándar del VPN: ${desv_std:,.2f}\n"
                         f"• Coeficiente de Variación: {(desv_std/abs(vpn_esperado)*100):.2f}%\n"
                         f"• Rango Total de VPN: ${rango:,.2f}\n"
-                        f"• Spread: desde ${vpn_pes:,.2f} hasta ${vpn_opt:,.2f}\n"
-                        f"• Probabilidad de Éxito (VPN > 0): {prob_exito}%\n"
-                        f"• Probabilidad de Fracaso (VPN < 0): {100-prob_exito}%\n\n"
+                        f"• Spread: desde ${vpns[idx_peor]:,.2f} ({nombres[idx_peor]}) hasta ${vpns[idx_mejor]:,.2f} ({nombres[idx_mejor]})\n"
+                        f"• Probabilidad de Éxito (VPN > 0): {prob_exito:.1f}%\n"
+                        f"• Probabilidad de Fracaso (VPN < 0): {100-prob_exito:.1f}%\n"
+                        + (
+                            f"• VaR 5% (mezcla continua): ${stats['var']:,.2f}\n"
+                            f"• CVaR 5% (mezcla continua): ${stats['cvar']:,.2f}\n"
+                            if mezcla is not None else ""
+                        ) +
+                        "\n"
 
                         "═══════════════════════════════════════════════════════════════\n"
                         "📝 ANÁLISIS REQUERIDO (RESPONDE DE FORMA EXHAUSTIVA)\n"
@@ -345,8 +436,29 @@ def show_escenarios_form():
                          delta="Riesgo relativo")
             
             with col4:
-                st.metric("Probabilidad de Éxito", f"{prob_exito}%",
-                         delta="VPN > 0")
+                st.metric("Probabilidad de Éxito", f"{prob_exito:.1f}%",
+                         delta="VPN > 0" if mezcla is None else "P(VPN > 0) de la mezcla")
+            
+            if mezcla is not None:
+                st.markdown("#### 🎲 Distribución Continua del VPN (Mezcla de Escenarios)")
+                col_g, col_r = st.columns([3, 1])
+                with col_g:
+                    st.plotly_chart(
+                        crear_grafico_mezcla(nombres, mezcla),
+                        use_container_width=True, key="mezcla_chart"
+                    )
+                with col_r:
+                    st.metric("VaR 5%", f"${stats['var']:,.2f}",
+                              help="VPN que solo se empeora en el 5% de los casos")
+                    st.metric("CVaR 5%", f"${stats['cvar']:,.2f}",
+                              help="VPN promedio en el peor 5% de los casos")
+                    st.metric("VPN Medio Simulado", f"${mezcla['vpn_esperado']:,.2f}")
+                    st.caption(
+                        "P(VPN > 0) por escenario: " + ", ".join(
+                            f"{n} {p:.0f}%" for n, p in zip(nombres, mezcla['prob_exito_escenario'])
+                            if not np.isnan(p)
+                        )
+                    )
             
             # Distribución de probabilidad con interpretación al lado
             st.markdown("---")
@@ -354,9 +466,7 @@ def show_escenarios_form():
             
             with col_grafico:
                 st.markdown("#### 📊 Distribución de Probabilidades")
-                fig_dist = crear_grafico_distribucion(vpn_pes, vpn_base, vpn_opt,
-                                                      prob_pesimista, prob_base, prob_optimista,
-                                                      vpn_esperado)
+                fig_dist = crear_grafico_distribucion(nombres, vpns, probabilidades, vpn_esperado)
                 st.plotly_chart(fig_dist, use_container_width=True, key="dist_chart")
             
             with col_interpretacion:
@@ -366,9 +476,10 @@ def show_escenarios_form():
                     with st.spinner("Analizando distribución..."):
                         prompt_distribucion = (
                             f"Analiza brevemente esta distribución de probabilidades:\n\n"
-                            f"• Pesimista: VPN ${vpn_pes:,.0f} con {prob_pesimista}% de probabilidad\n"
-                            f"• Base: VPN ${vpn_base:,.0f} con {prob_base}% de probabilidad\n"
-                            f"• Optimista: VPN ${vpn_opt:,.0f} con {prob_optimista}% de probabilidad\n"
+                            + "".join(
+                                f"• {n}: VPN ${v:,.0f} con {p:g}% de probabilidad\n"
+                                for n, v, p in zip(nombres, vpns, probabilidades)
+                            ) +
                             f"• VPN Esperado: ${vpn_esperado:,.0f}\n"
                             f"• Desviación Estándar: ${desv_std:,.0f}\n\n"
                             "Responde en 5-6 líneas máximo:\n"
@@ -384,7 +495,7 @@ def show_escenarios_form():
                     st.info(f"""
                     **Análisis de Distribución:**
                     
-                    • **Escenario más probable**: Base ({prob_base}%)
+                    • **Escenario más probable**: {nombres[idx_probable]} ({probabilidades[idx_probable]:g}%)
                     • **Dispersión**: {'Alta' if desv_std > abs(vpn_esperado) * 0.5 else 'Moderada' if desv_std > abs(vpn_esperado) * 0.2 else 'Baja'}
                     • **Riesgo**: {'Alto' if coef_var > 60 else 'Moderado' if coef_var > 30 else 'Bajo'} (CV: {coef_var:.1f}%)
                     • **VPN Esperado**: ${vpn_esperado:,.0f}
@@ -401,7 +512,7 @@ def show_escenarios_form():
                 **✅ PROYECTO VIABLE BAJO INCERTIDUMBRE**
                 
                 - El VPN esperado es positivo: ${vpn_esperado:,.2f}
-                - Probabilidad de éxito (VPN > 0): {prob_exito}%
+                - Probabilidad de éxito (VPN > 0): {prob_exito:.1f}%
                 - El proyecto mantiene valor incluso considerando escenarios adversos
                 - Coeficiente de Variación: {coef_var:.2f}% ({'Riesgo bajo' if coef_var < 30 else 'Riesgo moderado' if coef_var < 60 else 'Riesgo alto'})
                 """)
@@ -410,7 +521,80 @@ def show_escenarios_form():
                 **⚠️ PROYECTO CON RIESGO ELEVADO**
                 
                 - El VPN esperado es: ${vpn_esperado:,.2f}
-                - Probabilidad de éxito: {prob_exito}%
+                - Probabilidad de éxito: {prob_exito:.1f}%
                 - Se recomienda analizar estrategias de mitigación de riesgo
                 - Considerar opciones reales o flexibilidad en la implementación
                 """)
+        
+        # =============================
+        # ÁRBOL DE DECISIÓN
+        # =============================
+        st.markdown("---")
+        st.subheader("🌳 Árbol de Decisión (Proyecto por Etapas)")
+        st.caption(
+            "Valora proyectos con puntos de decisión (hacer un piloto, continuar o abandonar) "
+            "calculando el VPN esperado con la mejor decisión en cada nodo."
+        )
+        
+        flujos_proyecto = st.session_state.proyecto_data['flujos']
+        tasa_proyecto = st.session_state.proyecto_data['tasa_descuento']
+        
+        plantilla = st.radio(
+            "Estructura del proyecto",
+            ["Piloto y decisión de continuar", "Abandono en cada periodo"],
+            horizontal=True,
+            key="plantilla_arbol"
+        )
+        
+        col_a1, col_a2, col_a3, col_a4 = st.columns(4)
+        if plantilla == "Piloto y decisión de continuar":
+            with col_a1:
+                costo_piloto = st.number_input(
+                    "Costo del piloto ($)", 0.0, value=round(abs(flujos_proyecto[0]) * 0.05, 2),
+                    key="arbol_costo_piloto"
+                )
+            with col_a2:
+                prob_favorable = st.slider("Prob. mercado favorable (%)", 0.0, 100.0, 60.0, 5.0,
+                                           key="arbol_prob_favorable")
+            with col_a3:
+                factor_fav = st.number_input("Factor flujos favorable", 0.0, value=1.3, step=0.05,
+                                             key="arbol_factor_fav")
+                factor_desf = st.number_input("Factor flujos desfavorable", 0.0, value=0.6, step=0.05,
+                                              key="arbol_factor_desf")
+            with col_a4:
+                rescate_piloto = st.number_input("Valor al abandonar tras el piloto ($)", value=0.0,
+                                                 key="arbol_rescate_piloto")
+            arbol = arbol_piloto(flujos_proyecto, costo_piloto, prob_favorable,
+                                 factor_fav, factor_desf, rescate_piloto)
+        else:
+            with col_a1:
+                prob_alza = st.slider("Prob. de alza de demanda (%)", 0.0, 100.0, 50.0, 5.0,
+                                      key="arbol_prob_alza")
+            with col_a2:
+                factor_alza = st.number_input("Factor si sube", 1.0, value=1.2, step=0.05,
+                                              key="arbol_factor_alza")
+            with col_a3:
+                factor_baja = st.number_input("Factor si baja", 0.0, 1.0, value=0.8, step=0.05,
+                                              key="arbol_factor_baja")
+            with col_a4:
+                rescate_pct = st.slider("Rescate al abandonar (% inversión)", 0, 100, 30, 5,
+                                        key="arbol_rescate_pct")
+            arbol = arbol_abandono(flujos_proyecto, prob_alza, factor_alza, factor_baja, rescate_pct)
+        
+        resultado_arbol = evaluar_arbol(arbol, tasa_proyecto, n_periodos=len(flujos_proyecto))
+        vpn_estatico = st.session_state.proyecto_data['vpn']
+        
+        col_r1, col_r2, col_r3 = st.columns(3)
+        col_r1.metric("VPN Esperado del Árbol", f"${resultado_arbol['valor']:,.2f}")
+        col_r2.metric("Decisión Inicial Óptima", resultado_arbol['decision'] or "—")
+        col_r3.metric("Valor de la Flexibilidad", f"${resultado_arbol['valor'] - vpn_estatico:,.2f}",
+                      help="Diferencia con el VPN del flujo de caja fijo de la Evaluación Básica")
+        
+        st.dataframe(
+            tabla_decisiones(resultado_arbol).style.format({"Valor presente del subárbol": "${:,.2f}"}),
+            use_container_width=True, hide_index=True
+        )
+        st.caption(
+            f"🌳 {resultado_arbol['hojas']:,} caminos posibles evaluados con "
+            f"{resultado_arbol['nodos_unicos']:,} subárboles distintos."
+        )
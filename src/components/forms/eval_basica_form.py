@@ -5,6 +5,7 @@ from src.utils.eval_basica import (
     calcular_vpn, calcular_tir, calcular_bc, calcular_periodo_recuperacion,
     crear_grafico_evaluacion_completa
 )
+from src.utils.opciones_reales import TIPOS_OPCION, MODELOS_RETICULA, valorar_opcion_real
 from src.utils.ai import consultar_groq, project_context
 import numpy as np
 
@@ -33,6 +34,29 @@ def show_eval_basica_form(nombre_proyecto):
     with col2:
         st.subheader("🎯 Tasa de Referencia")
         tmar = st.number_input("TMAR - Tasa Mínima Atractiva (%)", min_value=0.0, value=12.0, step=0.5)
+        
+        with st.expander("🧭 Flexibilidad (Opciones Reales)"):
+            tipo_opcion = st.selectbox(
+                "Tipo de Opción", list(TIPOS_OPCION),
+                format_func=TIPOS_OPCION.get, key="opcion_tipo"
+            )
+            modelo_opcion = st.selectbox(
+                "Retícula", list(MODELOS_RETICULA),
+                format_func=MODELOS_RETICULA.get, key="opcion_modelo"
+            )
+            volatilidad = st.slider("Volatilidad del Proyecto (%)", 5.0, 100.0, 30.0, 5.0, key="opcion_volatilidad")
+            tasa_libre = st.number_input("Tasa Libre de Riesgo (%)", min_value=0.0, value=5.0, step=0.5, key="opcion_tasa_libre")
+            plazo_opcion = st.number_input("Plazo de la Opción (años)", min_value=0.25, value=1.0, step=0.25, key="opcion_plazo")
+            pasos_opcion = st.select_slider("Pasos de la Retícula", [100, 500, 1000, 2000, 5000], value=1000, key="opcion_pasos")
+            
+            parametros_opcion = {}
+            if tipo_opcion == "expandir":
+                parametros_opcion["expansion_pct"] = st.number_input("Ampliación del Valor (%)", min_value=0.0, value=30.0, step=5.0, key="opcion_expansion")
+                parametros_opcion["costo_expansion"] = st.number_input("Costo de Expansión ($)", min_value=0.0, value=20000.0, step=1000.0, key="opcion_costo")
+            elif tipo_opcion == "abandonar":
+                parametros_opcion["rescate"] = st.number_input("Valor de Rescate ($)", min_value=0.0, value=inversion_inicial * 0.5, step=1000.0, key="opcion_rescate")
+            else:
+                parametros_opcion["rendimiento"] = st.number_input("Flujos Perdidos al Esperar (% anual)", min_value=0.0, value=0.0, step=1.0, key="opcion_rendimiento")
     
     # Cálculos
     vpn = calcular_vpn(flujos, tasa_descuento/100)
@@ -40,6 +64,14 @@ def show_eval_basica_form(nombre_proyecto):
     bc = calcular_bc(flujos, tasa_descuento/100)
     pr = calcular_periodo_recuperacion(flujos)
     
+    try:
+        opcion_real = valorar_opcion_real(
+            flujos, tasa_descuento, tipo_opcion, volatilidad, tasa_libre,
+            plazo_opcion, pasos_opcion, modelo_opcion, **parametros_opcion
+        )
+    except ValueError:
+        opcion_real = None
+    
     # Guardar en sesión
     st.session_state.proyecto_data = {
         'nombre': nombre_proyecto,
@@ -51,14 +83,15 @@ def show_eval_basica_form(nombre_proyecto):
         'vpn': vpn,
         'tir': tir,
         'bc': bc,
-        'pr': pr
+        'pr': pr,
+        'opcion_real': opcion_real
     }
     
     st.markdown("---")
     st.subheader("📊 Resultados de la Evaluación")
     
     # Métricas principales
-    col1, col2, col3, col4 = st.columns(4)
+    col1, col2, col3, col4, col5 = st.columns(5)
     
     with col1:
         st.metric("VPN", f"${vpn:,.2f}", 
@@ -80,6 +113,14 @@ def show_eval_basica_form(nombre_proyecto):
         st.metric("Periodo Recuperación", f"{pr} años",
                  delta=f"de {num_periodos} años")
     
+    with col5:
+        if opcion_real:
+            st.metric("VPN con Opciones", f"${opcion_real['vpn_ampliado']:,.2f}",
+                     delta=f"Flexibilidad: ${opcion_real['prima']:,.2f}",
+                     help=f"{TIPOS_OPCION[tipo_opcion]} · {MODELOS_RETICULA[modelo_opcion]}, {pasos_opcion} pasos")
+        else:
+            st.metric("VPN con Opciones", "N/A")
+    
     # Botón de análisis IA
     st.markdown("---")
     col_btn1, col_btn2, col_btn3 = st.columns([2, 1, 2])
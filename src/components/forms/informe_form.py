@@ -5,7 +5,10 @@ import re
 from datetime import datetime
 from src.utils.eval_basica import calcular_vpn, calcular_tir, calcular_bc, calcular_periodo_recuperacion
 from src.utils.informe import crear_informe_pdf, generar_nombre_archivo_pdf
+from src.utils.escenarios import escenario, calcular_escenarios
+from src.utils.opciones_reales import TIPOS_OPCION
 import pandas as pd 
+import numpy as np
 from plotly import graph_objects as go
 from src.utils.ai import consultar_groq, project_context
 from src.utils.email import enviar_email_con_attachment
@@ -72,6 +75,14 @@ def show_informe_form(fecha_analisis,analista):
             st.metric("B/C", f"{bc:.2f}",
                      delta="✅ Rentable" if bc > 1 else "❌ No Rentable")
         
+        opcion_real = proyecto.get('opcion_real')
+        if opcion_real:
+            st.caption(
+                f"🧭 VPN con opciones reales: **${opcion_real['vpn_ampliado']:,.2f}** "
+                f"({TIPOS_OPCION[opcion_real['tipo']].lower()}, valor de la flexibilidad "
+                f"${opcion_real['prima']:,.2f}; retícula {opcion_real['modelo']} de {opcion_real['pasos']} pasos)"
+            )
+        
         st.markdown("---")
         
         # Análisis Detallado
@@ -158,21 +169,20 @@ def show_informe_form(fecha_analisis,analista):
                 'Optimista': 1.15
             }
             
-            resultados_estres = []
-            for nombre, factor in escenarios_estres.items():
-                flujos_mod = [proyecto['flujos'][0]] + [f * factor for f in proyecto['flujos'][1:]]
-                vpn_mod = calcular_vpn(flujos_mod, tasa)
-                tir_mod = calcular_tir(flujos_mod)
-                
-                resultados_estres.append({
-                    'Escenario': nombre,
-                    'Factor': f"{factor*100:.0f}%",
-                    'VPN': f"${vpn_mod:,.2f}",
-                    'TIR': f"{tir_mod:.2f}%" if tir_mod else "N/A",
-                    'Estado': '✅' if vpn_mod > 0 else '❌'
-                })
+            # Todos los escenarios de estrés en una sola evaluación por lotes
+            estres = calcular_escenarios(
+                proyecto['flujos'],
+                [escenario(nombre, 0, factor) for nombre, factor in escenarios_estres.items()],
+                tasa
+            )
             
-            df_estres = pd.DataFrame(resultados_estres)
+            df_estres = pd.DataFrame({
+                'Escenario': estres['nombres'],
+                'Factor': [f"{factor*100:.0f}%" for factor in escenarios_estres.values()],
+                'VPN': [f"${v:,.2f}" for v in estres['vpn']],
+                'TIR': [f"{t:.2f}%" if not np.isnan(t) else "N/A" for t in estres['tir']],
+                'Estado': ['✅' if v > 0 else '❌' for v in estres['vpn']]
+            })
             st.dataframe(df_estres, use_container_width=True, hide_index=True)
         
         with tab_c:
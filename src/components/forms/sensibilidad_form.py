@@ -1,15 +1,18 @@
 import streamlit as st
 import numpy as np
 import pandas as pd
-import plotly.express as px
 
-from src.utils.eval_basica import calcular_vpn
+from src.utils.factorial import calcular_sensibilidad_factorial, grafico_factorial_marginal
+from src.utils.indices_sobol import calcular_indices_sobol, tabla_sobol, grafico_sobol
 from src.utils.sensibilidad import (
     calcular_sensibilidad_univariada,
     grafico_sensibilidad_univariada,
     interpretar_sensibilidad_univariada_ia,
     calcular_sensibilidad_bivariada,
     grafico_sensibilidad_bivariada,
+    calcular_frontera_adaptativa,
+    MAX_PUNTOS_ADAPTATIVO,
+    consultar_rejilla,
     interpretar_sensibilidad_bivariada_ia,
     calcular_tornado,
     grafico_tornado,
@@ -17,15 +20,24 @@ from src.utils.sensibilidad import (
     interpretar_tornado_completo_ia,
     interpretar_resumen_riesgo_ia,
     # Funciones auxiliares de riesgo
-    calcular_elasticidad,
     margen_seguridad,
     clasificar_riesgo,
     simulacion_montecarlo,
+    simulacion_montecarlo_reducida,
+    METODOS_REDUCCION,
+    matriz_correlacion,
+    factor_cholesky,
+    DISTRIBUCIONES,
+    DISTRIBUCIONES_BASE,
+    validar_distribucion,
+    FAMILIAS_DRIVERS,
+    elasticidades,
     escenarios_criticos,
     elasticidad_generica,
     indice_estabilidad,
     pendiente_vpn,
     metricas_riesgo,
+    metricas_riesgo_reducida,
     grafico_distribucion_vpn,
     semaforo_riesgo
 )
@@ -53,6 +65,55 @@ h1, h2, h3 {
 """, unsafe_allow_html=True)
 
 
+# =============================
+# SELECTOR DE DISTRIBUCIONES
+# =============================
+def selector_distribucion(variable, base):
+    """
+    Controles para elegir la distribución del multiplicador de una variable.
+
+    Returns:
+        dict {"tipo": ..., **parámetros}
+    """
+    tipos = list(DISTRIBUCIONES)
+    tipo = st.selectbox(
+        variable,
+        tipos,
+        index=tipos.index(base["tipo"]),
+        key=f"dist_tipo_{variable}"
+    )
+
+    if tipo == "Empírica":
+        texto = st.text_input(
+            "Muestra histórica de multiplicadores (separados por coma) ❓",
+            value="0.85, 0.95, 1.0, 1.05, 1.1",
+            key=f"dist_muestra_{variable}",
+            help="Se remuestrea con reemplazo (bootstrap)."
+        )
+        try:
+            muestra = [float(x) for x in texto.replace(";", ",").split(",") if x.strip()]
+        except ValueError:
+            muestra = []
+        return {"tipo": tipo, "muestra": muestra}
+
+    parametros = dict(DISTRIBUCIONES[tipo]["parametros"])
+    if tipo == base["tipo"]:
+        parametros.update({k: v for k, v in base.items() if k != "tipo"})
+
+    columnas = st.columns(len(parametros))
+    especificacion = {"tipo": tipo}
+    for col, (nombre, valor) in zip(columnas, parametros.items()):
+        with col:
+            especificacion[nombre] = st.number_input(
+                nombre.capitalize(),
+                value=float(valor),
+                step=0.01,
+                format="%.3f",
+                key=f"dist_{nombre}_{variable}"
+            )
+    return especificacion
+
+
 # =============================
 # VISTA PRINCIPAL
 # =============================
@@ -71,8 +132,8 @@ def show_sensibilidad_form():
     tasa = st.session_state.proyecto_data["tasa_descuento"]
     vpn_base = st.session_state.proyecto_data["vpn"]
 
-    tab_uni, tab_bi, tab_tor, tab_res = st.tabs(
-        ["📊 Univariada", "🎯 Bivariada", "🌪️ Tornado", "📌 Resumen de Riesgo"]
+    tab_uni, tab_bi, tab_fac, tab_tor, tab_res = st.tabs(
+        ["📊 Univariada", "🎯 Bivariada", "🧩 Factorial", "🌪️ Tornado", "📌 Resumen de Riesgo"]
     )
 
     # =====================================================
@@ -147,7 +208,8 @@ def show_sensibilidad_form():
         estabilidad = indice_estabilidad(vpns, vpn_base)
         pendiente = pendiente_vpn(vpns, variaciones)
 
-        elasticidad = calcular_elasticidad(vpns, variaciones)
+        # Elasticidad puntual exacta en el caso base (derivada analítica)
+        elasticidad = elasticidades(flujos, tasa)[variable]["elasticidad_vpn"] or 0.0
         margen = margen_seguridad(punto_eq)
         escenarios = escenarios_criticos(vpns)
 
@@ -173,7 +235,9 @@ def show_sensibilidad_form():
                 f"{elasticidad:.2f}",
                 help="""
                 Mide qué tan sensible es el VPN ante cambios
-                porcentuales de la variable analizada.
+                porcentuales de la variable analizada:
+                % de cambio del VPN por cada 1% de cambio de la variable,
+                calculado de forma exacta en el caso base.
 
                 Valores altos = mayor riesgo
                 """
@@ -351,6 +415,31 @@ def show_sensibilidad_form():
                 """
             )
 
+        resolucion = st.select_slider(
+            "Resolución de la rejilla ❓",
+            options=[15, 51, 101, 201, 501, 1001],
+            value=101,
+            help="""
+            Número de puntos por eje. Más puntos → mapa más detallado
+            y frontera VPN = 0 más precisa. Las rejillas grandes se
+            dibujan como imagen submuestreada; los valores exactos se
+            consultan abajo del mapa.
+            """
+        )
+
+        frontera_adaptativa = st.checkbox(
+            "Refinar la frontera VPN = 0 ❓",
+            value=resolucion <= MAX_PUNTOS_ADAPTATIVO,
+            disabled=resolucion > MAX_PUNTOS_ADAPTATIVO,
+            help=f"""
+            Subdivide solo las celdas donde el VPN cambia de signo,
+            para trazar la línea crítica con precisión sin recalcular
+            todo el mapa a alta resolución. Con más de
+            {MAX_PUNTOS_ADAPTATIVO} puntos por eje la rejilla ya es fina
+            y la frontera se traza directamente sobre ella.
+            """
+        ) and resolucion <= MAX_PUNTOS_ADAPTATIVO
+
         st.caption("""
         ⚙️ El sistema genera una matriz de escenarios combinando
         todas las variaciones posibles de ambas variables.
@@ -362,9 +451,16 @@ def show_sensibilidad_form():
         if var1 == var2:
             st.error("⚠️ Selecciona variables diferentes para realizar el análisis.")
         else:
-            resultado = calcular_sensibilidad_bivariada(
-                var1, var2, flujos, tasa, rango1, rango2
-            )
+            if frontera_adaptativa:
+                # Menos subdivisiones cuanto más fina es la rejilla de partida
+                resultado = calcular_frontera_adaptativa(
+                    var1, var2, flujos, tasa, rango1, rango2, puntos=resolucion,
+                    niveles=max(1, int(np.log2(1000 / resolucion)))
+                )
+            else:
+                resultado = calcular_sensibilidad_bivariada(
+                    var1, var2, flujos, tasa, rango1, rango2, puntos=resolucion
+                )
 
             col_graf, col_kpi = st.columns([3, 1])
 
@@ -388,10 +484,44 @@ def show_sensibilidad_form():
                     resultado["vpn_matrix"],
                     resultado["vars1"],
                     resultado["vars2"],
-                    var1, var2
+                    var1, var2,
+                    frontera=resultado.get("frontera")
                 )
                 st.plotly_chart(fig, use_container_width=True)
 
+                if frontera_adaptativa:
+                    st.caption(
+                        f"🎯 Frontera VPN = 0 refinada con "
+                        f"{resultado['evaluaciones_refinamiento']:,} evaluaciones "
+                        f"adicionales a la rejilla de {resolucion}×{resolucion} "
+                        f"(una rejilla uniforme equivalente requiere "
+                        f"{resultado['evaluaciones_uniforme']:,})."
+                    )
+
+                st.markdown("#### 🔎 Consultar un punto")
+                col_c1, col_c2 = st.columns(2)
+                with col_c1:
+                    consulta1 = st.number_input(
+                        f"Variación {var1} (%)",
+                        -float(rango1), float(rango1), 0.0, 0.5,
+                        key="consulta_bi_1"
+                    )
+                with col_c2:
+                    consulta2 = st.number_input(
+                        f"Variación {var2} (%)",
+                        -float(rango2), float(rango2), 0.0, 0.5,
+                        key="consulta_bi_2"
+                    )
+
+                valores = consultar_rejilla(resultado, consulta1, consulta2)
+                col_v, col_t, col_b = st.columns(3)
+                col_v.metric("VPN", f"${valores['vpn']:,.2f}")
+                col_t.metric(
+                    "TIR",
+                    f"{valores['tir']:.2f}%" if valores["tir"] is not None else "N/A"
+                )
+                col_b.metric("B/C", f"{valores['bc']:.2f}")
+
             # =============================
             # KPIs
             # =============================
@@ -450,6 +580,88 @@ def show_sensibilidad_form():
 
 
 
+    # =====================================================
+    # 🧩 FACTORIAL
+    # =====================================================
+    with tab_fac:
+
+        st.subheader("🧩 Sensibilidad Factorial")
+
+        st.info("""
+        Combina **todas las variaciones de varias variables a la vez**
+        (pruebas de estrés de tres o más factores).
+
+        Es útil para:
+        • Encontrar las combinaciones más peligrosas  
+        • Medir qué parte de los escenarios mantiene el VPN positivo
+        """)
+
+        variables_fac = st.multiselect(
+            "Variables del análisis ❓",
+            ["Flujos de Caja", "Tasa de Descuento", "Inversión Inicial"],
+            default=["Flujos de Caja", "Tasa de Descuento", "Inversión Inicial"],
+            help="Cada variable añade una dimensión al análisis."
+        )
+
+        ejes = []
+        columnas = st.columns(max(len(variables_fac), 1))
+        for col, variable_fac in zip(columnas, variables_fac):
+            with col:
+                rango_fac = st.slider(
+                    f"Rango {variable_fac} (%)",
+                    10, 50, 20, 5,
+                    key=f"fac_rango_{variable_fac}"
+                )
+                puntos_fac = st.select_slider(
+                    f"Puntos {variable_fac}",
+                    options=[5, 11, 21, 51, 101],
+                    value=21,
+                    key=f"fac_puntos_{variable_fac}"
+                )
+            ejes.append((variable_fac, rango_fac, puntos_fac))
+
+        if not ejes:
+            st.warning("⚠️ Selecciona al menos una variable.")
+        else:
+            try:
+                factorial = calcular_sensibilidad_factorial(flujos, tasa, ejes)
+            except ValueError as e:
+                st.error(f"⚠️ {e}")
+                factorial = None
+
+            if factorial is not None:
+                col_f1, col_f2 = st.columns(2)
+                col_f1.metric(
+                    "Combinaciones evaluadas",
+                    f"{int(np.prod(factorial.forma)):,}"
+                )
+                col_f2.metric(
+                    "Escenarios con VPN > 0",
+                    f"{factorial.proporcion_positiva():.1f}%",
+                    help="Porcentaje de todas las combinaciones con VPN positivo."
+                )
+
+                st.markdown("### 📉 Peor y mejor VPN por variable")
+                st.caption("""
+                Para cada valor de la variable, el peor (mínimo) y el mejor
+                (máximo) VPN posible combinando el resto de variables.
+                """)
+                st.plotly_chart(
+                    grafico_factorial_marginal(factorial),
+                    use_container_width=True
+                )
+
+                st.dataframe(
+                    factorial.resumen_marginal().style.format({
+                        "Mínimo": "${:,.2f}",
+                        "Máximo": "${:,.2f}",
+                        "% VPN > 0 (extremo inferior)": "{:.1f}%",
+                        "% VPN > 0 (extremo superior)": "{:.1f}%"
+                    }),
+                    use_container_width=True
+                )
+
+
     # =====================================================
     # 🌪️ TORNADO
     # =====================================================
@@ -481,6 +693,19 @@ def show_sensibilidad_form():
             """
         )
 
+        familias = st.multiselect(
+            "Drivers a analizar ❓",
+            list(FAMILIAS_DRIVERS),
+            default=["Flujos de Caja", "Tasa de Descuento", "Inversión Inicial"],
+            help="""
+            Grupos de variables que se perturban por separado.
+
+            • Flujos por Periodo → un driver por cada año
+            • Ingresos / Egresos → flujos positivos o negativos de la operación
+            • Valor de Rescate → flujo del último periodo
+            """
+        )
+
         st.caption("""
         ⚙️ Cada variable se analiza de forma independiente manteniendo
         las demás constantes.
@@ -489,99 +714,127 @@ def show_sensibilidad_form():
         # =============================
         # CÁLCULO
         # =============================
+        metodo_tornado = st.radio(
+            "Método de cálculo ❓",
+            ["exacto", "gradiente"],
+            format_func={
+                "exacto": "Reevaluación exacta",
+                "gradiente": "Derivadas analíticas"
+            }.get,
+            horizontal=True,
+            help="""
+            Las derivadas analíticas extrapolan el VPN sin recalcularlo:
+            exactas para flujos e inversión, aproximación lineal para la tasa.
+            """
+        )
+
         vars_ordenadas = calcular_tornado(
-            flujos, tasa, vpn_base, rango, calcular_vpn
+            flujos, tasa, vpn_base, rango, familias or None, metodo_tornado
         )
 
-        max_rango = max(v[1]["rango"] for v in vars_ordenadas)
+        max_rango = max((v[1]["rango"] for v in vars_ordenadas), default=0.0)
 
-        col_graf, col_res = st.columns([3, 1])
+        if not vars_ordenadas:
+            st.warning("⚠️ Los drivers seleccionados no aplican a este proyecto (p. ej. Egresos sin flujos negativos). Elige otras familias.")
+        else:
+            col_graf, col_res = st.columns([3, 1])
 
-        # =============================
-        # GRÁFICO TORNADO
-        # =============================
-        with col_graf:
+            # =============================
+            # GRÁFICO TORNADO
+            # =============================
+            with col_graf:
 
-            st.markdown("### 📊 Gráfico Tornado – Impacto en el VPN")
+                st.markdown("### 📊 Gráfico Tornado – Impacto en el VPN")
 
-            st.caption("""
-            • Cada barra representa una variable económica  
-            • La longitud indica el **impacto sobre el VPN**  
-            • Las barras superiores son las **más críticas**
-            """)
+                st.caption("""
+                • Cada barra representa una variable económica  
+                • La longitud indica el **impacto sobre el VPN**  
+                • Las barras superiores son las **más críticas**
+                """)
 
-            fig = grafico_tornado(vars_ordenadas, vpn_base, rango)
-            st.plotly_chart(fig, use_container_width=True)
+                fig = grafico_tornado(vars_ordenadas, vpn_base, rango)
+                st.plotly_chart(fig, use_container_width=True)
 
-            st.caption("""
-            🔍 Cuanto más larga es la barra, **mayor es el riesgo asociado** a esa variable.
-            """)
+                st.caption("""
+                🔍 Cuanto más larga es la barra, **mayor es el riesgo asociado** a esa variable.
+                """)
 
-        # =============================
-        # KPIs PRINCIPALES
-        # =============================
-        var_critica, datos = vars_ordenadas[0]
+            # =============================
+            # KPIs PRINCIPALES
+            # =============================
+            var_critica, datos = vars_ordenadas[0]
 
-        with col_res:
+            with col_res:
 
-            st.markdown("### 📌 Variable Más Crítica")
+                st.markdown("### 📌 Variable Más Crítica")
 
-            st.metric(
-                "Variable Crítica",
-                var_critica,
-                help="Variable que genera el mayor cambio en el VPN."
-            )
+                st.metric(
+                    "Variable Crítica",
+                    var_critica,
+                    help="Variable que genera el mayor cambio en el VPN."
+                )
 
-            st.metric(
-                "Impacto en el VPN",
-                f"${datos['rango']:,.2f}",
-                help="""
-                Diferencia máxima del VPN al variar esta variable
-                dentro del rango definido.
-                """
-            )
+                st.metric(
+                    "Impacto en el VPN",
+                    f"${datos['rango']:,.2f}",
+                    help="""
+                    Diferencia máxima del VPN al variar esta variable
+                    dentro del rango definido.
+                    """
+                )
 
-            st.metric(
-                "Nivel de Riesgo",
-                clasificar_riesgo(datos["rango"], max_rango),
-                help="""
-                Clasificación relativa del riesgo comparado con
-                las demás variables analizadas.
-                """
-            )
+                st.metric(
+                    "Nivel de Riesgo",
+                    clasificar_riesgo(datos["rango"], max_rango),
+                    help="""
+                    Clasificación relativa del riesgo comparado con
+                    las demás variables analizadas.
+                    """
+                )
 
-            st.caption("""
-            📌 Esta variable debería ser prioritaria en la gestión del proyecto.
-            """)
+                st.caption("""
+                📌 Esta variable debería ser prioritaria en la gestión del proyecto.
+                """)
 
-        # =============================
-        # TABLA DETALLADA
-        # =============================
-        with st.expander("📊 Ranking Detallado de Variables"):
+            # =============================
+            # TABLA DETALLADA
+            # =============================
+            with st.expander("📊 Ranking Detallado de Variables"):
 
-            st.caption("""
-            La tabla ordena las variables desde la más crítica
-            hasta la menos sensible.
-            """)
+                st.caption("""
+                La tabla ordena las variables desde la más crítica
+                hasta la menos sensible.
+                """)
 
-            tabla = tabla_tornado(vars_ordenadas)
-            tabla["Riesgo"] = tabla["Rango"].apply(
-                lambda x: clasificar_riesgo(
-                    float(x.replace("$","").replace(",","")), max_rango
+                tabla = tabla_tornado(vars_ordenadas)
+                elasticidades_tornado = elasticidades(flujos, tasa, familias or None)
+                tabla["Elasticidad VPN"] = tabla["Variable"].map(
+                    lambda v: elasticidades_tornado[v]["elasticidad_vpn"]
+                )
+                tabla["Riesgo"] = tabla["Rango"].apply(
+                    lambda x: clasificar_riesgo(
+                        float(x.replace("$","").replace(",","")), max_rango
+                    )
                 )
-            )
 
-            st.dataframe(
-                tabla,
-                use_container_width=True,
-                hide_index=True
-            )
+                st.dataframe(
+                    tabla,
+                    use_container_width=True,
+                    hide_index=True
+                )
 
-            st.caption("""
-            🔴 Alto → Prioridad inmediata  
-            🟠 Medio → Monitoreo continuo  
-            🟢 Bajo → Riesgo controlado
-            """)
+                st.caption("""
+                🔴 Alto → Prioridad inmediata  
+                🟠 Medio → Monitoreo continuo  
+                🟢 Bajo → Riesgo controlado
+                """)
+
+
+        # =============================
+        # SENSIBILIDAD GLOBAL (SOBOL)
+        # =============================
+        # Se rellena al final, con las distribuciones del Resumen de Riesgo
+        expander_sobol = st.expander("🌐 Sensibilidad Global (Índices de Sobol)")
 
         # =============================
         # IA
@@ -595,7 +848,7 @@ def show_sensibilidad_form():
             • Recomendaciones estratégicas
             """)
 
-            if st.button("Generar interpretación", key="ia_tor"):
+            if st.button("Generar interpretación", key="ia_tor", disabled=not vars_ordenadas):
                 st.info(
                     interpretar_tornado_completo_ia(
                         vars_ordenadas,
@@ -630,9 +883,150 @@ def show_sensibilidad_form():
         variando los flujos y la tasa para modelar la incertidumbre real.
         """)
 
-        vpns_mc = simulacion_montecarlo(flujos, tasa)
+        col_n, col_semilla = st.columns(2)
+
+        with col_n:
+            n_simulaciones = st.select_slider(
+                "Número de simulaciones ❓",
+                options=[10_000, 50_000, 100_000, 500_000, 1_000_000,
+                         10_000_000, 100_000_000],
+                value=10_000,
+                format_func=lambda x: f"{x:,}",
+                help="""
+                Cantidad de escenarios aleatorios a generar.
+
+                Más simulaciones → estimaciones más precisas.
+                Sobre 1 millón se simula por bloques con memoria constante,
+                repartidos entre todos los núcleos del servidor.
+                """
+            )
+
+        with col_semilla:
+            semilla = st.number_input(
+                "Semilla aleatoria ❓",
+                min_value=0,
+                value=42,
+                step=1,
+                help="""
+                Fija la secuencia aleatoria para que los resultados
+                sean reproducibles entre ejecuciones.
+                """
+            )
+
+        col_metodo, col_objetivo = st.columns(2)
+
+        with col_metodo:
+            metodo = st.selectbox(
+                "Reducción de varianza ❓",
+                list(METODOS_REDUCCION),
+                format_func=METODOS_REDUCCION.get,
+                help="""
+                Técnicas que alcanzan la misma precisión con menos escenarios.
+
+                • Antitéticas → cada escenario se acompaña de su opuesto
+                • Variable de control → corrige con el VPN base conocido
+                • Sobol → puntos cuasi aleatorios más uniformes
+                """
+            )
+
+        with col_objetivo:
+            error_objetivo = st.number_input(
+                "Error estándar objetivo ($) ❓",
+                min_value=0.0,
+                value=0.0,
+                step=10.0,
+                help="""
+                Si es mayor que 0, se simulan escenarios hasta que el error
+                estándar del VPN esperado quede por debajo de este valor
+                (el número de simulaciones actúa como máximo).
+                """
+            )
+
+        with st.expander("🔗 Correlación entre variables"):
+            st.caption("""
+            Por defecto cada periodo y la tasa varían de forma independiente.
+            Correlacionarlos refleja mejor los riesgos de cola
+            (por ejemplo, años malos que suelen venir seguidos).
+            """)
 
-        riesgo = metricas_riesgo(vpns_mc)
+            col_rho1, col_rho2 = st.columns(2)
+            with col_rho1:
+                rho_periodos = st.slider(
+                    "Correlación entre periodos ❓",
+                    -0.9, 0.9, 0.0, 0.05,
+                    help="""
+                    Correlación entre los choques de periodos consecutivos.
+                    Entre periodos más lejanos decae geométricamente.
+                    """
+                )
+            with col_rho2:
+                rho_tasa = st.slider(
+                    "Correlación flujos – tasa ❓",
+                    -0.9, 0.9, 0.0, 0.05,
+                    help="""
+                    Correlación de cada flujo con la tasa de descuento.
+                    Negativa: cuando sube la tasa, bajan los flujos.
+                    """
+                )
+
+        with st.expander("📐 Distribuciones de entrada"):
+            st.caption("""
+            Distribución del multiplicador de cada variable (1 = valor base).
+            Por defecto: Normal con desviación 10% en flujos e inversión
+            y 5% en la tasa.
+            """)
+
+            distribuciones = {}
+            for variable, base in DISTRIBUCIONES_BASE.items():
+                especificacion = selector_distribucion(variable, base)
+                try:
+                    validar_distribucion(especificacion)
+                    distribuciones[variable] = especificacion
+                except ValueError as e:
+                    st.error(f"⚠️ {variable}: {e}. Se usa la distribución por defecto.")
+
+        correlacion = None
+        if rho_periodos != 0 or rho_tasa != 0:
+            correlacion = matriz_correlacion(len(flujos), rho_periodos, rho_tasa)
+            try:
+                factor_cholesky(correlacion)
+            except ValueError as e:
+                st.error(f"⚠️ {e}. Se simulan choques independientes.")
+                correlacion = None
+
+        usar_reduccion = (
+            (metodo != "estandar" or error_objetivo > 0)
+            and n_simulaciones <= MAX_MUESTRAS_EN_MEMORIA
+        )
+
+        with st.spinner(f"Simulando {n_simulaciones:,} escenarios..."):
+            if usar_reduccion:
+                resultado_mc = simulacion_montecarlo_reducida(
+                    flujos, tasa, metodo,
+                    n=min(n_simulaciones, 10_000) if error_objetivo > 0 else n_simulaciones,
+                    semilla=int(semilla),
+                    error_objetivo=error_objetivo or None,
+                    n_max=n_simulaciones,
+                    correlacion=correlacion,
+                    distribuciones=distribuciones
+                )
+                vpns_mc = resultado_mc["vpns"]
+                riesgo = metricas_riesgo_reducida(resultado_mc)
+            else:
+                vpns_mc = simulacion_montecarlo(
+                    flujos, tasa, n_simulaciones, int(semilla),
+                    procesos=None, correlacion=correlacion,
+                    distribuciones=distribuciones
+                )
+                riesgo = metricas_riesgo(vpns_mc)
+
+        if usar_reduccion:
+            st.caption(
+                f"🎯 {METODOS_REDUCCION[metodo]}: {resultado_mc['n']:,} escenarios, "
+                f"error estándar del VPN esperado ${resultado_mc['error_estandar']:,.2f}"
+            )
+        elif metodo != "estandar" or error_objetivo > 0:
+            st.caption("ℹ️ Sobre 1 millón de escenarios se usa la simulación estándar por bloques.")
 
         col1, col2 = st.columns(2)
 
@@ -652,7 +1046,8 @@ def show_sensibilidad_form():
                         "VPN Esperado": "Promedio del VPN considerando todos los escenarios simulados",
                         "Prob VPN < 0": "Probabilidad de que el proyecto genere pérdidas",
                         "VaR 95%": "Pérdida máxima esperada en el 95% de los casos",
-                        "CVaR 95%": "Pérdida promedio en los peores escenarios"
+                        "CVaR 95%": "Pérdida promedio en los peores escenarios",
+                        "Error Estándar": "Precisión de la estimación del VPN esperado"
                     }.get(k, "Indicador de riesgo financiero")
                 )
 
@@ -667,8 +1062,25 @@ def show_sensibilidad_form():
             en la simulación.
             """)
 
+            col_bins, col_kde = st.columns(2)
+            with col_bins:
+                modo_bins = st.selectbox(
+                    "Barras del histograma ❓",
+                    ["Freedman–Diaconis", "Fijas (50)"],
+                    help="""
+                    Freedman–Diaconis ajusta el ancho de las barras a la
+                    dispersión de los datos y al número de simulaciones.
+                    """
+                )
+            with col_kde:
+                mostrar_kde = st.checkbox("Curva de densidad (KDE)", value=False)
+
             st.plotly_chart(
-                grafico_distribucion_vpn(vpns_mc),
+                grafico_distribucion_vpn(
+                    vpns_mc,
+                    bins="fd" if modo_bins == "Freedman–Diaconis" else 50,
+                    kde=mostrar_kde
+                ),
                 use_container_width=True
             )
 
@@ -702,7 +1114,10 @@ def show_sensibilidad_form():
             for v, d in vars_ordenadas
         ]
 
-        st.dataframe(pd.DataFrame(ranking), use_container_width=True)
+        if ranking:
+            st.dataframe(pd.DataFrame(ranking), use_container_width=True)
+        else:
+            st.caption("Sin drivers aplicables en el análisis tornado.")
 
         # =============================
         # CONCLUSIÓN
@@ -716,7 +1131,7 @@ def show_sensibilidad_form():
             • Recomendaciones finales
             """)
 
-            if st.button("Generar interpretación", key="ia_res"):
+            if st.button("Generar interpretación", key="ia_res", disabled=not vars_ordenadas):
                 st.info(
                     interpretar_resumen_riesgo_ia(
                         riesgo,
@@ -725,7 +1140,62 @@ def show_sensibilidad_form():
                     )
                 )
 
+    # =====================================================
+    # 🌐 SENSIBILIDAD GLOBAL (pestaña Tornado)
+    # =====================================================
+    # Se calcula después del Resumen de Riesgo para usar las mismas
+    # distribuciones de entrada que la simulación Monte Carlo
+    with expander_sobol:
+
+        st.caption("""
+        El tornado mueve una variable a la vez. Los índices de Sobol
+        reparten la **varianza total del VPN** entre las variables
+        cuando todas varían juntas:
+
+        • Primer orden → efecto de la variable por sí sola  
+        • Efecto total → incluye sus interacciones con las demás
+        """)
+
+        n_sobol = st.select_slider(
+            "Tamaño de muestra ❓",
+            options=[1_000, 5_000, 10_000, 20_000, 50_000],
+            value=10_000,
+            format_func=lambda x: f"{x:,}",
+            help="""
+            Se evalúa el modelo N·(variables + 2) veces.
+            Más muestras → intervalos de confianza más estrechos.
+            """
+        )
 
+        sobol = calcular_indices_sobol(
+            flujos, tasa, n=n_sobol, distribuciones=distribuciones, semilla=42
+        )
 
+        st.plotly_chart(grafico_sobol(sobol), use_container_width=True)
 
+        tabla_s = tabla_sobol(sobol)
+        max_total = tabla_s["Efecto total"].max()
+        tabla_s["Riesgo"] = tabla_s["Efecto total"].apply(
+            lambda x: clasificar_riesgo(x, max_total)
+        )
+        st.dataframe(
+            tabla_s.style.format({
+                "Primer orden": "{:.3f}",
+                "Efecto total": "{:.3f}",
+                "Interacciones": "{:.3f}"
+            }),
+            use_container_width=True,
+            hide_index=True
+        )
+
+        st.caption(f"""
+        {sobol['n_evaluaciones']:,} evaluaciones del VPN con las
+        distribuciones de entrada de la simulación Monte Carlo.
+        Intervalos al 95% por bootstrap.
+        """)
 
+        if correlacion is not None:
+            st.caption("""
+            ⚠️ Los índices de Sobol suponen entradas independientes:
+            la correlación de la simulación no se aplica aquí.
+            """)
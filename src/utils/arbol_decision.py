@@ -0,0 +1,344 @@
+import numpy as np
+import pandas as pd
+
+from src.utils.cache import clave_cache
+from src.utils.eval_basica import calcular_vpn_lote
+
+
+# ======================================================
+# ÁRBOLES DE DECISIÓN (VALOR MONETARIO ESPERADO)
+# ======================================================
+# Un árbol combina nodos de azar (ramas con probabilidad), nodos de
+# decisión (se elige la rama de mayor valor) y nodos terminales. Cada rama
+# aporta un vector de flujos en los periodos absolutos del proyecto, de
+# modo que el valor de un subárbol no depende del camino que lleva a él:
+#     valor(rama)    = VPN(flujos de la rama) + valor(hijo)
+#     valor(azar)    = Σ p·valor(rama)
+#     valor(decisión) = max valor(rama)
+# Los subárboles idénticos (mismo contenido) se identifican por un hash y
+# se evalúan una sola vez. El VPN de todas las ramas únicas se calcula en
+# una llamada al kernel vectorizado y el retroceso se hace por niveles de
+# altura con reducciones segmentadas (np.add.reduceat / np.maximum.reduceat).
+
+TIPOS_NODO = ("azar", "decision", "terminal")
+
+
+def rama(nombre, hijo, flujos=None, probabilidad=None):
+    """
+    Crea una rama del árbol.
+
+    Args:
+        nombre: Etiqueta de la rama (resultado o alternativa)
+        hijo: Nodo al que lleva la rama
+        flujos: Flujos que aporta la rama por periodo (desde el periodo 0;
+            se completan con ceros hasta el horizonte)
+        probabilidad: Probabilidad en porcentaje (solo ramas de nodos de azar)
+
+    Returns:
+        dict con la definición de la rama
+    """
+    return {
+        "nombre": nombre,
+        "hijo": hijo,
+        "flujos": np.zeros(1) if flujos is None else np.asarray(flujos, dtype=float),
+        "probabilidad": None if probabilidad is None else float(probabilidad)
+    }
+
+
+def nodo_azar(nombre, ramas):
+    """Nodo de azar: su valor es el promedio de sus ramas ponderado por probabilidad."""
+    suma = sum(r["probabilidad"] or 0.0 for r in ramas)
+    if not ramas or abs(suma - 100.0) > 1e-6:
+        raise ValueError(f"Las probabilidades del nodo '{nombre}' deben sumar 100%")
+    return {"tipo": "azar", "nombre": nombre, "ramas": list(ramas)}
+
+
+def nodo_decision(nombre, ramas):
+    """Nodo de decisión: su valor es el de la mejor alternativa."""
+    if not ramas:
+        raise ValueError(f"El nodo de decisión '{nombre}' necesita al menos una alternativa")
+    return {"tipo": "decision", "nombre": nombre, "ramas": list(ramas)}
+
+
+def nodo_terminal(nombre="Fin"):
+    """Nodo terminal (valor 0: los flujos ya se asignaron en las ramas)."""
+    return {"tipo": "terminal", "nombre": nombre, "ramas": []}
+
+
+# ======================================================
+# COMPILACIÓN A ARRAYS
+# ======================================================
+
+def _compilar(arbol):
+    """
+    Recorre el árbol y deduplica los subárboles idénticos.
+
+    Returns:
+        Tupla (nodos únicos en postorden, índice de la raíz, nodos visitados),
+        donde cada nodo único es un dict con tipo, nombre, ramas
+        [(nombre, probabilidad, flujos, índice del hijo)] y altura
+    """
+    unicos = []
+    claves = []
+    por_clave = {}
+    por_id = {}
+    visitados = 0
+
+    def visitar(nodo):
+        nonlocal visitados
+        visitados += 1
+        # Un mismo objeto reutilizado se resuelve sin recalcular su hash
+        if id(nodo) in por_id:
+            return por_id[id(nodo)]
+        if nodo["tipo"] not in TIPOS_NODO:
+            raise ValueError(f"Tipo de nodo desconocido: {nodo['tipo']}")
+
+        ramas = [
+            (r["nombre"], r["probabilidad"], r["flujos"], visitar(r["hijo"]))
+            for r in nodo["ramas"]
+        ]
+        # Los ceros finales no cambian el valor: se ignoran para deduplicar
+        clave = clave_cache(
+            nodo["tipo"], nodo["nombre"],
+            [[nombre, prob, np.trim_zeros(flujos, "b"), claves[hijo]]
+             for nombre, prob, flujos, hijo in ramas]
+        )
+        if clave not in por_clave:
+            por_clave[clave] = len(unicos)
+            claves.append(clave)
+            unicos.append({
+                "tipo": nodo["tipo"],
+                "nombre": nodo["nombre"],
+                "ramas": ramas,
+                "altura": 1 + max((unicos[h]["altura"] for *_, h in ramas), default=-1)
+            })
+        por_id[id(nodo)] = por_clave[clave]
+        return por_clave[clave]
+
+    raiz = visitar(arbol)
+    return unicos, raiz, visitados
+
+
+def evaluar_arbol(arbol, tasa, n_periodos=None):
+    """
+    Calcula el valor monetario esperado (VPN esperado) de un árbol.
+
+    Args:
+        arbol: Nodo raíz (ver nodo_azar, nodo_decision, nodo_terminal)
+        tasa: Tasa de descuento (%)
+        n_periodos: Horizonte T (default: el vector de flujos más largo)
+
+    Returns:
+        dict con valor (VPN esperado de la raíz), decision (alternativa
+        óptima de la raíz o None), valores (por nodo único), nodos (lista de
+        nodos únicos con su decisión óptima), hojas (caminos del árbol
+        expandido), nodos_visitados y nodos_unicos
+    """
+    unicos, raiz, visitados = _compilar(arbol)
+
+    # Aristas contiguas por nodo, en el orden de los nodos únicos
+    origen, hijos, probs, nombres_ramas, vectores = [], [], [], [], []
+    for i, nodo in enumerate(unicos):
+        for nombre, prob, flujos, hijo in nodo["ramas"]:
+            origen.append(i)
+            hijos.append(hijo)
+            probs.append((prob or 0.0) / 100)
+            nombres_ramas.append(nombre)
+            vectores.append(flujos)
+
+    n_periodos = n_periodos or max((v.size for v in vectores), default=1)
+    flujos_ramas = np.zeros((len(vectores), n_periodos))
+    for k, v in enumerate(vectores):
+        if v.size > n_periodos:
+            raise ValueError("Una rama tiene más flujos que el horizonte del árbol")
+        flujos_ramas[k, :v.size] = v
+
+    origen = np.array(origen, dtype=int)
+    hijos = np.array(hijos, dtype=int)
+    probs = np.array(probs)
+    vpn_ramas = calcular_vpn_lote(flujos_ramas, tasa / 100) if len(vectores) else np.zeros(0)
+
+    alturas = np.array([nodo["altura"] for nodo in unicos])
+    es_decision = np.array([nodo["tipo"] == "decision" for nodo in unicos])
+    valores = np.zeros(len(unicos))
+    hojas = np.where(alturas == 0, 1.0, 0.0)
+    eleccion = np.full(len(unicos), -1)
+
+    # Retroceso por niveles: todos los nodos de una misma altura a la vez
+    for altura in range(1, alturas.max() + 1 if len(unicos) else 1):
+        nodos_nivel = np.flatnonzero(alturas == altura)
+        aristas = np.flatnonzero(np.isin(origen, nodos_nivel))
+        inicios = np.searchsorted(origen[aristas], nodos_nivel)
+        valor_aristas = vpn_ramas[aristas] + valores[hijos[aristas]]
+
+        esperado = np.add.reduceat(probs[aristas] * valor_aristas, inicios)
+        mejor = np.maximum.reduceat(valor_aristas, inicios)
+        valores[nodos_nivel] = np.where(es_decision[nodos_nivel], mejor, esperado)
+        hojas[nodos_nivel] = np.add.reduceat(hojas[hijos[aristas]], inicios)
+
+        # Alternativa óptima: primera arista que alcanza el máximo de su segmento
+        segmento = np.repeat(np.arange(nodos_nivel.size), np.diff(np.append(inicios, aristas.size)))
+        alcanza = valor_aristas >= mejor[segmento]
+        primera = np.minimum.reduceat(np.where(alcanza, np.arange(aristas.size), aristas.size), inicios)
+        eleccion[nodos_nivel] = np.where(es_decision[nodos_nivel], aristas[primera], -1)
+
+    for i, nodo in enumerate(unicos):
+        nodo["valor"] = float(valores[i])
+        nodo["decision"] = nombres_ramas[eleccion[i]] if eleccion[i] >= 0 else None
+
+    return {
+        "valor": float(valores[raiz]),
+        "decision": unicos[raiz]["decision"],
+        "valores": valores,
+        "nodos": unicos,
+        "raiz": raiz,
+        "hojas": int(hojas[raiz]),
+        "nodos_visitados": visitados,
+        "nodos_unicos": len(unicos)
+    }
+
+
+def tabla_decisiones(resultado, max_filas=20):
+    """
+    Tabla con la alternativa óptima de los nodos de decisión más cercanos a la raíz.
+
+    El valor de cada nodo es el VP (a hoy) de los flujos que quedan desde él,
+    sin los flujos del camino que lleva hasta el nodo.
+    """
+    nodos = resultado["nodos"]
+    profundidad = {resultado["raiz"]: 0}
+    pendientes = [resultado["raiz"]]
+    while pendientes:
+        actual = pendientes.pop(0)
+        for *_, hijo in nodos[actual]["ramas"]:
+            if hijo not in profundidad:
+                profundidad[hijo] = profundidad[actual] + 1
+                pendientes.append(hijo)
+
+    filas = [
+        {
+            "Nivel": profundidad[i],
+            "Decisión": nodos[i]["nombre"],
+            "Alternativa óptima": nodos[i]["decision"],
+            "Valor presente del subárbol": nodos[i]["valor"]
+        }
+        for i in sorted(profundidad, key=profundidad.get)
+        if nodos[i]["tipo"] == "decision"
+    ]
+    return pd.DataFrame(filas[:max_filas])
+
+
+# ======================================================
+# PLANTILLAS DE PROYECTOS POR ETAPAS
+# ======================================================
+
+def _en_periodo(flujos_base, periodos, factor=1.0):
+    """Vector con los flujos base de los periodos indicados (el resto en 0)."""
+    vector = np.zeros(len(flujos_base))
+    vector[periodos] = np.asarray(flujos_base, dtype=float)[periodos] * factor
+    return vector
+
+
+def arbol_piloto(flujos_base, costo_piloto, prob_exito, factor_exito, factor_fracaso,
+                 valor_rescate=0.0):
+    """
+    Proyecto con la opción de hacer primero un piloto.
+
+    Sin piloto se invierte directamente y el mercado resulta favorable
+    (factor_exito) o desfavorable (factor_fracaso). Con piloto se paga su
+    costo en el periodo 0, se observa el resultado y luego se decide entre
+    continuar con el proyecto o abandonarlo cobrando valor_rescate.
+
+    Args:
+        flujos_base: Flujos del proyecto (el periodo 0 es la inversión)
+        costo_piloto: Costo del piloto (positivo)
+        prob_exito: Probabilidad (%) de un mercado favorable
+        factor_exito: Multiplicador de los flujos operativos si es favorable
+        factor_fracaso: Multiplicador de los flujos operativos si es desfavorable
+        valor_rescate: Monto recibido al abandonar tras el piloto
+
+    Returns:
+        Nodo raíz del árbol
+    """
+    flujos_base = np.asarray(flujos_base, dtype=float)
+    operativos = slice(1, None)
+    inversion = _en_periodo(flujos_base, 0)
+    fin = nodo_terminal()
+
+    def resultado_mercado(factor):
+        return inversion + _en_periodo(flujos_base, operativos, factor)
+
+    sin_piloto = nodo_azar("Mercado", [
+        rama("Favorable", fin, resultado_mercado(factor_exito), prob_exito),
+        rama("Desfavorable", fin, resultado_mercado(factor_fracaso), 100 - prob_exito)
+    ])
+
+    def continuar_o_abandonar(factor):
+        return nodo_decision("¿Continuar tras el piloto?", [
+            rama("Continuar", fin, resultado_mercado(factor)),
+            rama("Abandonar", fin, [valor_rescate])
+        ])
+
+    con_piloto = nodo_azar("Resultado del piloto", [
+        rama("Favorable", continuar_o_abandonar(factor_exito), probabilidad=prob_exito),
+        rama("Desfavorable", continuar_o_abandonar(factor_fracaso), probabilidad=100 - prob_exito)
+    ])
+
+    return nodo_decision("¿Cómo ejecutar el proyecto?", [
+        rama("Invertir sin piloto", sin_piloto),
+        rama("Hacer piloto", con_piloto, [-abs(costo_piloto)]),
+        rama("No invertir", fin)
+    ])
+
+
+def arbol_abandono(flujos_base, prob_alza, factor_alza, factor_baja, rescate_pct=0.0):
+    """
+    Proyecto con la opción de abandonar al inicio de cada periodo operativo.
+
+    En cada periodo la demanda sube (factor_alza) o baja (factor_baja)
+    respecto al periodo anterior y, conocido el resultado, se decide seguir
+    operando (se cobra el flujo del periodo escalado por el nivel de
+    demanda) o abandonar recuperando rescate_pct% de la inversión. Los
+    niveles de demanda se recombinan, así que el árbol expandido tiene del
+    orden de 2^n caminos pero solo O(n²) subárboles distintos.
+
+    Args:
+        flujos_base: Flujos del proyecto (el periodo 0 es la inversión)
+        prob_alza: Probabilidad (%) de que la demanda suba en cada periodo
+        factor_alza: Multiplicador de la demanda si sube
+        factor_baja: Multiplicador de la demanda si baja
+        rescate_pct: Porcentaje de la inversión recuperado al abandonar
+
+    Returns:
+        Nodo raíz del árbol
+    """
+    flujos_base = np.asarray(flujos_base, dtype=float)
+    n = flujos_base.size
+    rescate = abs(flujos_base[0]) * rescate_pct / 100
+    fin = nodo_terminal()
+    etapas = {}
+
+    def etapa(t, alzas):
+        """Subárbol desde el periodo t con alzas subidas de demanda acumuladas."""
+        if t == n:
+            return fin
+        if (t, alzas) in etapas:
+            return etapas[(t, alzas)]
+
+        def decidir(alzas_t):
+            nivel = factor_alza ** alzas_t * factor_baja ** (t - alzas_t)
+            return nodo_decision(f"¿Seguir en el año {t}?", [
+                rama("Seguir", etapa(t + 1, alzas_t), _en_periodo(flujos_base, [t], nivel)),
+                rama("Abandonar", fin, _en_periodo(np.full(n, rescate), [t]))
+            ])
+
+        etapas[(t, alzas)] = nodo_azar(f"Demanda año {t}", [
+            rama("Alta", decidir(alzas + 1), probabilidad=prob_alza),
+            rama("Baja", decidir(alzas), probabilidad=100 - prob_alza)
+        ])
+        return etapas[(t, alzas)]
+
+    return nodo_decision("¿Invertir?", [
+        rama("Invertir", etapa(1, 0), _en_periodo(flujos_base, [0])),
+        rama("No invertir", fin)
+    ])
@@ -0,0 +1,246 @@
+import copy
+import hashlib
+import inspect
+import threading
+from collections import OrderedDict
+from functools import wraps
+
+import numpy as np
+
+
+# ======================================================
+# CACHÉ DE RESULTADOS (LRU CON LÍMITE DE MEMORIA)
+# ======================================================
+# Streamlit vuelve a ejecutar todo el script en cada interacción y app.py
+# dibuja las cinco pestañas, así que la simulación Monte Carlo, la rejilla
+# bivariada y el tornado se recalculaban aunque no cambiara ningún dato.
+# Los resultados se guardan en una caché a nivel de módulo (compartida por
+# todas las sesiones del servidor) cuya clave es el hash del contenido de
+# los argumentos: mismos flujos, tasa, parámetros y semilla → mismo resultado.
+
+MEMORIA_MAXIMA_CACHE = 256 * 1024 ** 2
+
+
+def _es_numerico(valor):
+    """True si valor es un número (no bool) o una secuencia anidada de números."""
+    if isinstance(valor, (list, tuple)):
+        return all(_es_numerico(v) for v in valor)
+    return isinstance(valor, (int, float, np.number)) and not isinstance(valor, (bool, np.bool_))
+
+
+def _actualizar_hash(h, valor):
+    """Añade al hash una representación canónica de valor."""
+    if isinstance(valor, np.ndarray) or isinstance(valor, np.generic):
+        arr = np.ascontiguousarray(valor)
+        h.update(f"nd{arr.dtype.str}{arr.shape}".encode())
+        h.update(arr.tobytes())
+    elif isinstance(valor, (list, tuple)):
+        # Las listas de números se tratan como arrays: [1, 2] y [1.0, 2.0]
+        # producen el mismo resultado numérico. Solo si todos los elementos
+        # son números: [None] o ["1.5"] no deben coincidir con [nan] o [1.5]
+        arr = None
+        if valor and _es_numerico(valor):
+            try:
+                arr = np.asarray(valor, dtype=float)
+            except ValueError:
+                arr = None
+        if arr is not None:
+            _actualizar_hash(h, arr)
+        else:
+            h.update(f"seq{len(valor)}".encode())
+            for elemento in valor:
+                _actualizar_hash(h, elemento)
+    elif isinstance(valor, dict):
+        h.update(f"dict{len(valor)}".encode())
+        for clave in sorted(valor, key=repr):
+            _actualizar_hash(h, clave)
+            _actualizar_hash(h, valor[clave])
+    elif isinstance(valor, (int, float)) and not isinstance(valor, bool):
+        h.update(f"num{float(valor)!r}".encode())
+    elif callable(valor):
+        # El nombre no identifica el comportamiento (dos lambdas o closures
+        # distintas comparten __qualname__): una función no puede ser clave
+        raise TypeError(
+            f"No se puede usar una función como argumento en caché: {getattr(valor, '__qualname__', valor)!r}"
+        )
+    else:
+        h.update(f"{type(valor).__name__}{valor!r}".encode())
+
+
+def clave_cache(*partes):
+    """
+    Calcula la clave de caché (hash BLAKE2) del contenido de los argumentos.
+
+    Args:
+        *partes: Valores a combinar (arrays, listas, dicts, números, texto)
+
+    Returns:
+        str hexadecimal
+
+    Raises:
+        TypeError: Si alguna parte contiene una función
+    """
+    h = hashlib.blake2b(digest_size=20)
+    for parte in partes:
+        _actualizar_hash(h, parte)
+    return h.hexdigest()
+
+
+def _tamano(valor):
+    """Estimación en bytes de la memoria que ocupa un resultado."""
+    if isinstance(valor, np.ndarray):
+        return valor.nbytes
+    if isinstance(valor, (list, tuple)):
+        return 64 + sum(_tamano(v) for v in valor)
+    if isinstance(valor, dict):
+        return 64 + sum(_tamano(k) + _tamano(v) for k, v in valor.items())
+    if hasattr(valor, "__dict__"):
+        return 64 + _tamano(vars(valor))
+    return 64
+
+
+def _congelar(valor):
+    """Marca como solo lectura los arrays del resultado guardado."""
+    if isinstance(valor, np.ndarray):
+        valor.setflags(write=False)
+    elif isinstance(valor, (list, tuple)):
+        for v in valor:
+            _congelar(v)
+    elif isinstance(valor, dict):
+        for v in valor.values():
+            _congelar(v)
+    return valor
+
+
+def _copiar_contenedores(valor):
+    """
+    Copia listas y dicts del resultado; los arrays (solo lectura) se comparten.
+
+    Los objetos con estado propio (AcumuladorVPN, ResultadoFactorial...) se
+    copian en profundidad: sus métodos los modifican en el sitio, así que
+    compartirlos alteraría los siguientes aciertos de la caché.
+    """
+    if isinstance(valor, list):
+        return [_copiar_contenedores(v) for v in valor]
+    if isinstance(valor, tuple):
+        return tuple(_copiar_contenedores(v) for v in valor)
+    if isinstance(valor, dict):
+        return {k: _copiar_contenedores(v) for k, v in valor.items()}
+    if hasattr(valor, "__dict__") and not callable(valor):
+        return copy.deepcopy(valor)
+    return valor
+
+
+class CacheResultados:
+    """
+    Caché LRU segura entre hilos con límite de memoria total.
+
+    Al insertar se descartan los resultados usados hace más tiempo hasta que
+    la suma de sus tamaños quede por debajo del límite. Un resultado mayor
+    que el propio límite no se guarda.
+    """
+
+    def __init__(self, memoria_maxima=MEMORIA_MAXIMA_CACHE):
+        self.memoria_maxima = memoria_maxima
+        self._entradas = OrderedDict()
+        self._memoria = 0
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def __len__(self):
+        return len(self._entradas)
+
+    def __contains__(self, clave):
+        return clave in self._entradas
+
+    def obtener(self, clave):
+        """Devuelve (True, resultado) si la clave está en caché, si no (False, None)."""
+        with self._lock:
+            if clave not in self._entradas:
+                self.fallos += 1
+                return False, None
+            self._entradas.move_to_end(clave)
+            self.aciertos += 1
+            return True, _copiar_contenedores(self._entradas[clave][0])
+
+    def guardar(self, clave, resultado):
+        """Guarda un resultado, descartando los menos usados si hace falta."""
+        tamano = _tamano(resultado)
+        if tamano > self.memoria_maxima:
+            return
+        _congelar(resultado)
+        with self._lock:
+            if clave in self._entradas:
+                self._memoria -= self._entradas.pop(clave)[1]
+            self._entradas[clave] = (resultado, tamano)
+            self._memoria += tamano
+            while self._memoria > self.memoria_maxima:
+                _, (_, tamano_viejo) = self._entradas.popitem(last=False)
+                self._memoria -= tamano_viejo
+
+    def limpiar(self):
+        with self._lock:
+            self._entradas.clear()
+            self._memoria = 0
+            self.aciertos = 0
+            self.fallos = 0
+
+    def estadisticas(self):
+        """
+        Resumen del uso de la caché.
+
+        Returns:
+            dict con entradas, memoria (bytes), aciertos y fallos
+        """
+        with self._lock:
+            return {
+                "entradas": len(self._entradas),
+                "memoria": self._memoria,
+                "aciertos": self.aciertos,
+                "fallos": self.fallos
+            }
+
+
+CACHE_RESULTADOS = CacheResultados()
+
+
+def en_cache(ignorar=(), requerir=(), cache=None):
+    """
+    Decorador que guarda en caché el resultado según el contenido de los argumentos.
+
+    Args:
+        ignorar: Nombres de argumentos que no afectan al resultado
+            (por ejemplo, el número de procesos)
+        requerir: Argumentos que deben ser distintos de None para usar la
+            caché (por ejemplo, la semilla: sin ella el resultado es aleatorio)
+        cache: CacheResultados a usar (default: CACHE_RESULTADOS)
+
+    Returns:
+        Función decorada (lanza TypeError si recibe una función como argumento)
+    """
+    def decorador(funcion):
+        firma = inspect.signature(funcion)
+        nombre = f"{funcion.__module__}.{funcion.__qualname__}"
+
+        @wraps(funcion)
+        def envoltura(*args, **kwargs):
+            destino = cache if cache is not None else CACHE_RESULTADOS
+            argumentos = firma.bind(*args, **kwargs)
+            argumentos.apply_defaults()
+            if any(argumentos.arguments[n] is None for n in requerir):
+                return funcion(*args, **kwargs)
+
+            clave = clave_cache(nombre, {
+                k: v for k, v in argumentos.arguments.items() if k not in ignorar
+            })
+            encontrado, resultado = destino.obtener(clave)
+            if encontrado:
+                return resultado
+
+            resultado = funcion(*args, **kwargs)
+            destino.guardar(clave, resultado)
+            return _copiar_contenedores(resultado)
+
+        return envoltura
+    return decorador
@@ -0,0 +1,196 @@
+import time
+from functools import lru_cache
+
+import numpy as np
+from scipy.special import betaincinv, ndtr, ndtri
+
+
+# ======================================================
+# REGISTRO DE DISTRIBUCIONES DE ENTRADA (MULTIPLICADORES)
+# ======================================================
+# Todas se muestrean por CDF inversa sobre arrays completos, partiendo de
+# normales estándar (posiblemente correlacionadas): u = Φ(z), x = F⁻¹(u).
+# Así funcionan igual con muestreo pseudoaleatorio, antitético, Sobol y
+# con la correlación por Cholesky (cópula gaussiana).
+
+def _normal_ppf(u, media=1.0, desv=0.1):
+    return media + desv * ndtri(u)
+
+
+def _normal_desde_z(z, media=1.0, desv=0.1):
+    return media + desv * z
+
+
+def _triangular_ppf(u, minimo=0.8, moda=1.0, maximo=1.2):
+    rango = maximo - minimo
+    corte = (moda - minimo) / rango
+    return np.where(
+        u < corte,
+        minimo + np.sqrt(u * rango * (moda - minimo)),
+        maximo - np.sqrt((1 - u) * rango * (maximo - moda))
+    )
+
+
+def _pert_alfa_beta(minimo, moda, maximo, lambda_=4.0):
+    rango = maximo - minimo
+    alfa = 1 + lambda_ * (moda - minimo) / rango
+    beta = 1 + lambda_ * (maximo - moda) / rango
+    return alfa, beta
+
+
+def _pert_ppf(u, minimo=0.8, moda=1.0, maximo=1.2):
+    alfa, beta = _pert_alfa_beta(minimo, moda, maximo)
+    return minimo + (maximo - minimo) * betaincinv(alfa, beta, u)
+
+
+# La inversa de la beta incompleta es cara (~1 s por millón de valores), así
+# que la PERT se tabula una vez por juego de parámetros sobre una rejilla en
+# el espacio normal y se interpola linealmente.
+_REJILLA_Z = np.linspace(-8.5, 8.5, 4097)
+
+
+@lru_cache(maxsize=32)
+def _tabla_pert(minimo, moda, maximo):
+    return _pert_ppf(ndtr(_REJILLA_Z), minimo, moda, maximo)
+
+
+def _pert_desde_z(z, minimo=0.8, moda=1.0, maximo=1.2):
+    return np.interp(z, _REJILLA_Z, _tabla_pert(float(minimo), float(moda), float(maximo)))
+
+
+def _lognormal_mu_sigma(media, desv):
+    sigma2 = np.log1p((desv / media) ** 2)
+    return np.log(media) - sigma2 / 2, np.sqrt(sigma2)
+
+
+def _lognormal_ppf(u, media=1.0, desv=0.1):
+    return _lognormal_desde_z(ndtri(u), media, desv)
+
+
+def _lognormal_desde_z(z, media=1.0, desv=0.1):
+    mu, sigma = _lognormal_mu_sigma(media, desv)
+    return np.exp(mu + sigma * z)
+
+
+def _uniforme_ppf(u, minimo=0.9, maximo=1.1):
+    return minimo + (maximo - minimo) * u
+
+
+def _empirica_ppf(u, muestra=(0.9, 1.0, 1.1)):
+    ordenada = np.sort(np.asarray(muestra, dtype=float))
+    idx = np.minimum((u * ordenada.size).astype(np.intp), ordenada.size - 1)
+    return ordenada[idx]
+
+
+DISTRIBUCIONES = {
+    "Normal": {
+        "parametros": {"media": 1.0, "desv": 0.1},
+        "ppf": _normal_ppf,
+        "desde_z": _normal_desde_z,
+        "media": lambda media=1.0, desv=0.1: media
+    },
+    "Triangular": {
+        "parametros": {"minimo": 0.8, "moda": 1.0, "maximo": 1.2},
+        "ppf": _triangular_ppf,
+        "media": lambda minimo=0.8, moda=1.0, maximo=1.2: (minimo + moda + maximo) / 3
+    },
+    "PERT": {
+        "parametros": {"minimo": 0.8, "moda": 1.0, "maximo": 1.2},
+        "ppf": _pert_ppf,
+        "desde_z": _pert_desde_z,
+        "media": lambda minimo=0.8, moda=1.0, maximo=1.2: (minimo + 4 * moda + maximo) / 6
+    },
+    "Lognormal": {
+        "parametros": {"media": 1.0, "desv": 0.1},
+        "ppf": _lognormal_ppf,
+        "desde_z": _lognormal_desde_z,
+        "media": lambda media=1.0, desv=0.1: media
+    },
+    "Uniforme": {
+        "parametros": {"minimo": 0.9, "maximo": 1.1},
+        "ppf": _uniforme_ppf,
+        "media": lambda minimo=0.9, maximo=1.1: (minimo + maximo) / 2
+    },
+    "Empírica": {
+        "parametros": {"muestra": (0.9, 1.0, 1.1)},
+        "ppf": _empirica_ppf,
+        "media": lambda muestra=(0.9, 1.0, 1.1): float(np.mean(muestra))
+    }
+}
+
+
+def validar_distribucion(especificacion):
+    """
+    Valida una especificación {"tipo": ..., **parámetros}.
+
+    Raises:
+        ValueError: si el tipo no existe o los parámetros no son coherentes
+    """
+    tipo = especificacion.get("tipo")
+    if tipo not in DISTRIBUCIONES:
+        raise ValueError(f"Distribución desconocida: {tipo}")
+
+    parametros = _parametros(especificacion)
+    if tipo in ("Triangular", "PERT"):
+        if not parametros["minimo"] <= parametros["moda"] <= parametros["maximo"] \
+                or parametros["minimo"] == parametros["maximo"]:
+            raise ValueError(f"{tipo}: se requiere mínimo ≤ moda ≤ máximo y mínimo < máximo")
+    elif tipo == "Uniforme" and parametros["minimo"] >= parametros["maximo"]:
+        raise ValueError("Uniforme: el mínimo debe ser menor que el máximo")
+    elif tipo in ("Normal", "Lognormal") and parametros["desv"] < 0:
+        raise ValueError(f"{tipo}: la desviación no puede ser negativa")
+    elif tipo == "Lognormal" and parametros["media"] <= 0:
+        raise ValueError("Lognormal: la media debe ser positiva")
+    elif tipo == "Empírica" and len(parametros["muestra"]) == 0:
+        raise ValueError("Empírica: la muestra no puede estar vacía")
+
+
+def _parametros(especificacion):
+    tipo = especificacion["tipo"]
+    parametros = dict(DISTRIBUCIONES[tipo]["parametros"])
+    parametros.update({k: v for k, v in especificacion.items() if k != "tipo"})
+    return parametros
+
+
+def muestrear_desde_normales(especificacion, normales):
+    """
+    Transforma normales estándar en muestras de la distribución indicada.
+
+    Args:
+        especificacion: dict {"tipo": nombre en DISTRIBUCIONES, **parámetros}
+        normales: Array de normales estándar (cualquier forma)
+
+    Returns:
+        Array de la misma forma con las muestras
+    """
+    distribucion = DISTRIBUCIONES[especificacion["tipo"]]
+    parametros = _parametros(especificacion)
+    if "desde_z" in distribucion:
+        return distribucion["desde_z"](normales, **parametros)
+    return distribucion["ppf"](ndtr(normales), **parametros)
+
+
+def muestrear(especificacion, n, rng):
+    """Genera n muestras independientes de la distribución indicada."""
+    return muestrear_desde_normales(especificacion, rng.standard_normal(n))
+
+
+def media_distribucion(especificacion):
+    """Valor esperado exacto de la distribución indicada."""
+    return DISTRIBUCIONES[especificacion["tipo"]]["media"](**_parametros(especificacion))
+
+
+def benchmark_distribuciones(n=1_000_000, semilla=0):
+    """
+    Mide el tiempo de muestrear n valores de cada distribución registrada.
+
+    Returns:
+        dict {tipo: segundos}
+    """
+    normales = np.random.default_rng(semilla).standard_normal(n)
+    tiempos = {}
+    for tipo in DISTRIBUCIONES:
+        inicio = time.perf_counter()
+        muestrear_desde_normales({"tipo": tipo}, normales)
+        tiempos[tipo] = time.perf_counter() - inicio
+    return tiempos
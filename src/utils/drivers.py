@@ -0,0 +1,113 @@
+import numpy as np
+
+
+# ======================================================
+# REGISTRO DE DRIVERS DE SENSIBILIDAD
+# ======================================================
+# Un driver es una perturbación multiplicativa del proyecto: una máscara
+# (T,) con los periodos de flujo que escala o la tasa de descuento. Cada
+# familia del registro genera sus drivers a partir de los flujos, de modo
+# que el tornado puede analizar desde las tres variables clásicas hasta un
+# driver por periodo. Para añadir una familia nueva basta con registrarla:
+#
+#     registrar_familia("Mi línea", lambda flujos: [driver("Mi línea", mascara)])
+
+FAMILIAS_DRIVERS = {}
+
+FAMILIAS_BASICAS = ["Flujos de Caja", "Tasa de Descuento", "Inversión Inicial"]
+
+
+def driver(nombre, mascara=None, tasa=False):
+    """
+    Crea la definición de un driver.
+
+    Args:
+        nombre: Etiqueta del driver
+        mascara: Array (T,) con 1 en los flujos que escala (None si es la tasa)
+        tasa: True si el driver escala la tasa de descuento
+
+    Returns:
+        dict {"nombre", "mascara", "tasa"}
+    """
+    return {
+        "nombre": nombre,
+        "mascara": None if mascara is None else np.asarray(mascara, dtype=float),
+        "tasa": tasa
+    }
+
+
+def registrar_familia(nombre, generador):
+    """
+    Registra una familia de drivers.
+
+    Args:
+        nombre: Nombre de la familia
+        generador: Función flujos (T,) → lista de drivers
+    """
+    FAMILIAS_DRIVERS[nombre] = generador
+    return generador
+
+
+def _mascara(n_periodos, seleccion):
+    mascara = np.zeros(n_periodos)
+    mascara[seleccion] = 1.0
+    return mascara
+
+
+registrar_familia(
+    "Flujos de Caja",
+    lambda flujos: [driver("Flujos de Caja", _mascara(flujos.size, slice(1, None)))]
+)
+registrar_familia(
+    "Tasa de Descuento",
+    lambda flujos: [driver("Tasa de Descuento", tasa=True)]
+)
+registrar_familia(
+    "Inversión Inicial",
+    lambda flujos: [driver("Inversión Inicial", _mascara(flujos.size, 0))]
+)
+registrar_familia(
+    "Valor de Rescate",
+    lambda flujos: [driver("Valor de Rescate", _mascara(flujos.size, -1))]
+    if flujos.size > 1 else []
+)
+
+
+def _lineas_por_signo(flujos, positivos, nombre):
+    mascara = np.zeros(flujos.size)
+    seleccion = flujos[1:] > 0 if positivos else flujos[1:] < 0
+    mascara[1:] = seleccion
+    return [driver(nombre, mascara)] if mascara.any() else []
+
+
+# Ingresos y egresos agrupados: flujos netos positivos o negativos de la operación
+registrar_familia("Ingresos", lambda flujos: _lineas_por_signo(flujos, True, "Ingresos"))
+registrar_familia("Egresos", lambda flujos: _lineas_por_signo(flujos, False, "Egresos"))
+
+registrar_familia(
+    "Flujos por Periodo",
+    lambda flujos: [
+        driver(f"Flujo Año {t}", _mascara(flujos.size, t)) for t in range(1, flujos.size)
+    ]
+)
+
+
+def construir_drivers(flujos, familias=None):
+    """
+    Genera la lista de drivers de las familias indicadas.
+
+    Args:
+        flujos: Flujos de caja base
+        familias: Nombres de familias del registro (default: FAMILIAS_BASICAS)
+
+    Returns:
+        Lista de drivers
+    """
+    flujos = np.asarray(flujos, dtype=float)
+    drivers = []
+    for familia in familias or FAMILIAS_BASICAS:
+        if familia not in FAMILIAS_DRIVERS:
+            raise ValueError(f"Familia de drivers desconocida: {familia}")
+        drivers.extend(FAMILIAS_DRIVERS[familia](flujos))
+    return drivers
+
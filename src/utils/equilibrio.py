@@ -0,0 +1,109 @@
+import numpy as np
+
+from src.utils.eval_basica import factores_descuento, calcular_tir_lote
+from src.utils.drivers import construir_drivers
+from src.utils.gradientes import equilibrio_lineal
+
+
+# ======================================================
+# PUNTO DE EQUILIBRIO EXACTO (VPN = 0)
+# ======================================================
+# El VPN es lineal en el factor de los flujos y en el de la inversión, así
+# que su variación de equilibrio tiene forma cerrada:
+#     VPN(a) = F0 + (1 + a)·VP(F1..Fn)   →  a* = -F0 / VP(F1..Fn) - 1
+#     VPN(b) = (1 + b)·F0 + VP(F1..Fn)   →  b* = -VP(F1..Fn) / F0 - 1
+# Para la tasa, el VPN es monótono (flujos convencionales) y la raíz es la
+# TIR, que se obtiene con el solucionador acotado de eval_basica.
+
+VARIABLES_EQUILIBRIO = ["Flujos de Caja", "Tasa de Descuento", "Inversión Inicial"]
+
+
+def _valor_presente_resto(flujos, tasas):
+    """VP de los flujos de los periodos 1..n, con forma flujos.shape[:-1]."""
+    factores = factores_descuento(np.asarray(tasas, dtype=float) / 100, flujos.shape[-1])
+    return np.sum(flujos[..., 1:] * factores[..., 1:], axis=-1)
+
+
+def punto_equilibrio_lote(variable, flujos, tasas):
+    """
+    Variación porcentual exacta de una variable que lleva el VPN a cero.
+
+    Trabaja sobre lotes de proyectos: flujos de forma (..., T) y tasas
+    compatibles por broadcasting con flujos.shape[:-1].
+
+    Args:
+        variable: "Flujos de Caja", "Tasa de Descuento" o "Inversión Inicial"
+        flujos: Array de flujos de caja (..., T)
+        tasas: Tasa(s) de descuento (%)
+
+    Returns:
+        Array con la variación de equilibrio (%), NaN donde no existe
+        (p. ej. sin flujos futuros, sin inversión o sin TIR)
+    """
+    flujos = np.asarray(flujos, dtype=float)
+    tasas = np.asarray(tasas, dtype=float)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if variable == "Flujos de Caja":
+            vp_resto = _valor_presente_resto(flujos, tasas)
+            equilibrio = -flujos[..., 0] / vp_resto - 1
+
+        elif variable == "Inversión Inicial":
+            vp_resto = _valor_presente_resto(flujos, tasas)
+            equilibrio = -vp_resto / flujos[..., 0] - 1
+
+        elif variable == "Tasa de Descuento":
+            tirs, _ = calcular_tir_lote(flujos)
+            equilibrio = np.broadcast_to(tirs, np.broadcast_shapes(tirs.shape, tasas.shape)) \
+                / tasas - 1
+
+        else:
+            raise ValueError(f"Variable sin punto de equilibrio: {variable}")
+
+    equilibrio = np.where(np.isfinite(equilibrio), equilibrio * 100, np.nan)
+    return equilibrio if equilibrio.ndim else float(equilibrio)
+
+
+def puntos_equilibrio(flujos, tasa):
+    """
+    Puntos de equilibrio de todas las variables para un proyecto.
+
+    Args:
+        flujos: Flujos de caja (T,)
+        tasa: Tasa de descuento (%)
+
+    Returns:
+        dict {variable: variación (%) o None si no existe}
+    """
+    resultado = {}
+    for variable in VARIABLES_EQUILIBRIO:
+        valor = punto_equilibrio_lote(variable, flujos, tasa)
+        resultado[variable] = None if np.isnan(valor) else valor
+    return resultado
+
+
+def puntos_equilibrio_drivers(flujos, tasa, familias=None):
+    """
+    Puntos de equilibrio de cualquier familia de drivers (ver src.utils.drivers).
+
+    Los drivers de flujos usan la derivada analítica del VPN respecto a su
+    multiplicador (exacta, porque el VPN es lineal en él); el de la tasa se
+    resuelve con la TIR.
+
+    Args:
+        flujos: Flujos de caja (T,)
+        tasa: Tasa de descuento (%)
+        familias: Familias de drivers (default: las tres variables clásicas)
+
+    Returns:
+        dict {driver: variación (%) o None si no existe}
+    """
+    drivers = construir_drivers(flujos, familias)
+    variaciones = equilibrio_lineal(flujos, tasa, drivers)
+
+    resultado = {}
+    for d, variacion in zip(drivers, variaciones):
+        if d["tasa"]:
+            variacion = punto_equilibrio_lote("Tasa de Descuento", flujos, tasa)
+        resultado[d["nombre"]] = None if np.isnan(variacion) else float(variacion)
+    return resultado
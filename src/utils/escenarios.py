@@ -1,118 +1,338 @@
-
-
 import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
-from src.utils.eval_basica import calcular_vpn, calcular_tir, calcular_bc
+from plotly.colors import sample_colorscale
+from src.utils.variaciones import transformacion, componer, aplicar_transformacion, evaluar_transformacion
+from src.utils.montecarlo import generar_bloque_vpn
+from src.utils.cache import en_cache
+
+
+# ======================================================
+# MOTOR DE ESCENARIOS
+# ======================================================
+# Un escenario es un nombre, una probabilidad (%) y factores que escalan
+# los flujos operativos, la inversión inicial y la tasa de descuento, más
+# una curva opcional de factores por periodo (retrasos, shocks, declive).
+# Los N escenarios se convierten en una matriz escenario × periodo de
+# multiplicadores del motor de variaciones y se evalúan en una sola
+# llamada contra el vector de descuento; el valor esperado y la
+# dispersión son reducciones sobre los arrays resultantes.
+
+
+def escenario(nombre, probabilidad, factor_flujos=1.0, factor_inversion=1.0, factor_tasa=1.0,
+              curva=None):
+    """
+    Crea la definición de un escenario.
+
+    Args:
+        nombre: Nombre del escenario
+        probabilidad: Probabilidad en porcentaje (0-100)
+        factor_flujos: Multiplicador de los flujos de los periodos 1..n
+        factor_inversion: Multiplicador de la inversión inicial
+        factor_tasa: Multiplicador de la tasa de descuento
+        curva: Factores por periodo (n,) para los periodos 1..n, que se
+            aplican además de factor_flujos (None = constante 1)
+
+    Returns:
+        dict con la definición del escenario
+    """
+    return {
+        "nombre": nombre,
+        "probabilidad": float(probabilidad),
+        "factor_flujos": float(factor_flujos),
+        "factor_inversion": float(factor_inversion),
+        "factor_tasa": float(factor_tasa),
+        "curva": None if curva is None else np.asarray(curva, dtype=float)
+    }
+
+
+# ======================================================
+# CURVAS DE FACTORES POR PERIODO
+# ======================================================
+# Cada generador devuelve un array (n,) con el factor de los periodos
+# 1..n. Las curvas se combinan multiplicándolas entre sí.
+
+def _periodos(n_periodos):
+    return np.arange(1, n_periodos + 1, dtype=float)
+
+
+def curva_retraso(n_periodos, k, rampa=0):
+    """
+    La operación arranca k periodos tarde y alcanza su nivel en rampa periodos.
+
+    Con horizonte fijo, los flujos de los periodos retrasados se pierden.
+    """
+    return np.clip((_periodos(n_periodos) - k) / (rampa + 1), 0.0, 1.0)
+
+
+def curva_escalon(n_periodos, desde, factor, duracion=None):
+    """Shock de nivel: factor en los periodos desde..desde+duracion-1 (None = hasta el final)."""
+    t = _periodos(n_periodos)
+    hasta = np.inf if not duracion else desde + duracion - 1
+    return np.where((t >= desde) & (t <= hasta), factor, 1.0)
+
+
+def curva_lineal(n_periodos, desde, hasta, factor_final):
+    """Shock lineal: el factor pasa de 1 en desde a factor_final en hasta y se mantiene."""
+    t = _periodos(n_periodos)
+    avance = np.clip((t - desde) / max(hasta - desde, 1), 0.0, 1.0)
+    return 1 + avance * (factor_final - 1)
 
 
-def calcular_escenarios(flujos_base, factor_pesimista, factor_optimista, tasa_descuento):
+def curva_decaimiento(n_periodos, desde, tasa_pct):
+    """Declive de fin de vida: los flujos caen tasa_pct% por periodo desde el periodo desde."""
+    t = _periodos(n_periodos)
+    return (1 - tasa_pct / 100) ** np.maximum(t - desde + 1, 0)
+
+
+# Perfiles disponibles en el formulario: (n_periodos, periodo, duracion, intensidad) → curva
+PERFILES_TEMPORALES = {
+    "Uniforme": lambda n, periodo, duracion, intensidad: np.ones(n),
+    "Retraso": lambda n, periodo, duracion, intensidad: curva_retraso(n, periodo, duracion),
+    "Escalón": lambda n, periodo, duracion, intensidad: curva_escalon(n, periodo, intensidad, duracion),
+    "Lineal": lambda n, periodo, duracion, intensidad: curva_lineal(
+        n, periodo, periodo + duracion, intensidad
+    ),
+    "Decaimiento": lambda n, periodo, duracion, intensidad: curva_decaimiento(n, periodo, intensidad)
+}
+
+
+def curva_perfil(perfil, n_periodos, periodo=1, duracion=0, intensidad=1.0):
+    """
+    Genera la curva de un perfil temporal con parámetros genéricos.
+
+    Args:
+        perfil: Clave de PERFILES_TEMPORALES
+        n_periodos: Número de periodos operativos (n)
+        periodo: Retraso k (Retraso) o periodo de inicio (resto)
+        duracion: Periodos de rampa (Retraso), del shock (Escalón, 0 = hasta
+            el final) o para llegar al factor final (Lineal)
+        intensidad: Factor del shock (Escalón), factor final (Lineal) o
+            caída % por periodo (Decaimiento)
+
+    Returns:
+        Array (n,) de factores
+    """
+    if perfil not in PERFILES_TEMPORALES:
+        raise ValueError(f"Perfil temporal desconocido: {perfil}")
+    return PERFILES_TEMPORALES[perfil](n_periodos, periodo, duracion, intensidad)
+
+
+def escenarios_clasicos(factor_pesimista, factor_optimista,
+                        prob_pesimista=20.0, prob_base=50.0, prob_optimista=30.0):
+    """Escenarios pesimista, base y optimista que escalan solo los flujos."""
+    return [
+        escenario("Pesimista", prob_pesimista, factor_pesimista),
+        escenario("Base", prob_base),
+        escenario("Optimista", prob_optimista, factor_optimista)
+    ]
+
+
+def calcular_escenarios(flujos_base, escenarios, tasa_descuento):
     """
-    Calcula los indicadores (VPN, TIR, B/C) para los tres escenarios.
+    Calcula los indicadores (VPN, TIR, B/C) de todos los escenarios en lote.
     
     Args:
         flujos_base: Lista de flujos del escenario base
-        factor_pesimista: Factor de reducción para escenario pesimista (0.3-0.9)
-        factor_optimista: Factor de incremento para escenario optimista (1.1-2.0)
+        escenarios: Lista de escenarios (ver escenario)
         tasa_descuento: Tasa de descuento en formato decimal (ej: 0.12 para 12%)
     
     Returns:
-        dict: Diccionario con indicadores para cada escenario (pes, base, opt)
+        dict con nombres, probabilidades (%) y arrays (N,) vpn, tir (NaN si
+        no existe) y bc, más los flujos (N, T) y las tasas (N,) en % de cada
+        escenario
     """
-    # Pesimista
-    flujos_pes = [flujos_base[0]] + [f * factor_pesimista for f in flujos_base[1:]]
-    vpn_pes = calcular_vpn(flujos_pes, tasa_descuento)
-    tir_pes = calcular_tir(flujos_pes)
-    bc_pes = calcular_bc(flujos_pes, tasa_descuento)
-    
-    # Base
-    vpn_base = calcular_vpn(flujos_base, tasa_descuento)
-    tir_base = calcular_tir(flujos_base)
-    bc_base = calcular_bc(flujos_base, tasa_descuento)
-    
-    # Optimista
-    flujos_opt = [flujos_base[0]] + [f * factor_optimista for f in flujos_base[1:]]
-    vpn_opt = calcular_vpn(flujos_opt, tasa_descuento)
-    tir_opt = calcular_tir(flujos_opt)
-    bc_opt = calcular_bc(flujos_opt, tasa_descuento)
-    
+    flujos_base = np.asarray(flujos_base, dtype=float)
+    factores = {
+        clave: np.array([e[clave] for e in escenarios])
+        for clave in ("factor_flujos", "factor_inversion", "factor_tasa")
+    }
+    # Matriz escenario × periodo con las curvas (la inversión no se ve afectada)
+    curvas = np.ones((len(escenarios), flujos_base.size))
+    for i, e in enumerate(escenarios):
+        if e.get("curva") is not None:
+            curvas[i, 1:] = e["curva"]
+
+    transformacion_ = componer(
+        transformacion("Flujos de Caja", flujos_base, factores["factor_flujos"]),
+        transformacion("Inversión Inicial", flujos_base, factores["factor_inversion"]),
+        transformacion("Tasa de Descuento", flujos_base, factores["factor_tasa"]),
+        (curvas, np.ones(len(escenarios)))
+    )
+    tasa_pct = tasa_descuento * 100
+    indicadores = evaluar_transformacion(flujos_base, tasa_pct, transformacion_)
+    flujos, tasas = aplicar_transformacion(flujos_base, tasa_pct, transformacion_)
+
     return {
-        'pesimista': {'vpn': vpn_pes, 'tir': tir_pes, 'bc': bc_pes, 'flujos': flujos_pes},
-        'base': {'vpn': vpn_base, 'tir': tir_base, 'bc': bc_base, 'flujos': flujos_base},
-        'optimista': {'vpn': vpn_opt, 'tir': tir_opt, 'bc': bc_opt, 'flujos': flujos_opt}
+        "nombres": [e["nombre"] for e in escenarios],
+        "probabilidades": np.array([e["probabilidad"] for e in escenarios]),
+        "vpn": indicadores["vpn"],
+        "tir": np.asarray(indicadores["tir"]),
+        "bc": indicadores["bc"],
+        "flujos": flujos,
+        "tasas": np.broadcast_to(tasas, (len(escenarios),))
     }
 
 
-def calcular_estadisticas_escenarios(vpn_pes, vpn_base, vpn_opt, 
-                                     prob_pesimista, prob_base, prob_optimista):
+def calcular_estadisticas_escenarios(vpns, probabilidades, mezcla=None):
     """
     Calcula estadísticas de riesgo del análisis de escenarios.
     
     Args:
-        vpn_pes, vpn_base, vpn_opt: VPN de cada escenario
-        prob_pesimista, prob_base, prob_optimista: Probabilidades en porcentaje (0-100)
+        vpns: Array (N,) con el VPN de cada escenario
+        probabilidades: Array (N,) de probabilidades en porcentaje (0-100)
+        mezcla: Resultado opcional de simular_mezcla_escenarios; si se pasa,
+            la probabilidad de éxito y el VaR/CVaR salen de la distribución
+            continua del VPN
     
     Returns:
         dict: Diccionario con VPN esperado, desviación estándar, rango, coef. variación y prob. éxito
+        (más var y cvar al 5% si se pasa la mezcla). prob_exito es la suma
+        de las probabilidades de los escenarios con VPN > 0
     """
-    # Convertir probabilidades a decimales
-    probs = [prob_pesimista/100, prob_base/100, prob_optimista/100]
-    vpns = [vpn_pes, vpn_base, vpn_opt]
-    
-    # VPN Esperado
-    vpn_esperado = sum([v * p for v, p in zip(vpns, probs)])
-    
-    # Desviación Estándar
-    desv_std = np.sqrt(sum([p * (v - vpn_esperado)**2 for v, p in zip(vpns, probs)]))
+    vpns = np.asarray(vpns, dtype=float)
+    probs = np.asarray(probabilidades, dtype=float) / 100
     
-    # Rango
-    rango = vpn_opt - vpn_pes
-    
-    # Coeficiente de Variación
+    vpn_esperado = float(probs @ vpns)
+    desv_std = float(np.sqrt(probs @ (vpns - vpn_esperado) ** 2))
+    rango = float(vpns.max() - vpns.min())
     coef_var = (desv_std / abs(vpn_esperado) * 100) if vpn_esperado != 0 else 0
     
-    # Probabilidad de éxito
-    prob_exito = (prob_base + prob_optimista) if vpn_base > 0 else prob_optimista
+    # Probabilidad de éxito: masa de probabilidad de todos los escenarios con
+    # VPN > 0, o P(VPN > 0) de la mezcla continua si está disponible
+    prob_exito = float(probs[vpns > 0].sum() * 100)
     
-    return {
+    estadisticas = {
         'vpn_esperado': vpn_esperado,
         'desv_std': desv_std,
         'rango': rango,
         'coef_var': coef_var,
         'prob_exito': prob_exito
     }
+    if mezcla is not None:
+        estadisticas.update({
+            'prob_exito': mezcla['prob_exito'],
+            'var': mezcla['var'],
+            'cvar': mezcla['cvar']
+        })
+    return estadisticas
+
+
+# ======================================================
+# MEZCLA CONTINUA DE ESCENARIOS
+# ======================================================
+# Los escenarios ponderados se tratan como una distribución de mezcla:
+# cada muestra elige un escenario según su probabilidad y alrededor de él
+# se aplican los mismos choques multiplicativos que en la simulación Monte
+# Carlo (dispersión configurable). Las muestras de cada escenario se
+# reparten con una multinomial y se simulan con generar_bloque_vpn, así
+# que el costo es el de la simulación vectorizada.
+
+def dispersion_normal(desv_flujos_pct=10.0, desv_tasa_pct=5.0):
+    """
+    Distribuciones normales de los choques alrededor de cada escenario.
+
+    Args:
+        desv_flujos_pct: Desviación (%) de los flujos y de la inversión
+        desv_tasa_pct: Desviación (%) de la tasa de descuento
+
+    Returns:
+        dict {variable: especificación} para generar_bloque_vpn
+    """
+    return {
+        "Flujos de Caja": {"tipo": "Normal", "media": 1.0, "desv": desv_flujos_pct / 100},
+        "Inversión Inicial": {"tipo": "Normal", "media": 1.0, "desv": desv_flujos_pct / 100},
+        "Tasa de Descuento": {"tipo": "Normal", "media": 1.0, "desv": desv_tasa_pct / 100}
+    }
+
+
+@en_cache(requerir=("semilla",))
+def simular_mezcla_escenarios(flujos_base, escenarios, tasa_descuento, n=10000,
+                              dispersion=None, semilla=None):
+    """
+    Muestrea la distribución del VPN de la mezcla de escenarios.
+
+    Args:
+        flujos_base: Lista de flujos del escenario base
+        escenarios: Lista de escenarios (ver escenario)
+        tasa_descuento: Tasa de descuento en formato decimal
+        n: Número de muestras
+        dispersion: Distribuciones de los choques alrededor de cada escenario
+            (ver dispersion_normal; None = las de la simulación Monte Carlo).
+            Con desviaciones nulas la mezcla se reduce a los escenarios discretos.
+        semilla: Semilla del generador aleatorio
+
+    Returns:
+        dict con vpns (n,), componentes (n,) con el índice del escenario de
+        cada muestra, vpn_esperado, desv_std, prob_exito (%), var y cvar al
+        5%, y prob_exito_escenario (N,) con P(VPN > 0) dentro de cada escenario
+    """
+    resultado = calcular_escenarios(flujos_base, escenarios, tasa_descuento)
+    probs = resultado["probabilidades"] / resultado["probabilidades"].sum()
+
+    rng = np.random.default_rng(semilla)
+    muestras = rng.multinomial(n, probs)
+    vpns = np.concatenate([
+        generar_bloque_vpn(flujos, tasa, m, rng, distribuciones=dispersion)
+        for flujos, tasa, m in zip(resultado["flujos"], resultado["tasas"], muestras)
+    ])
+    componentes = np.repeat(np.arange(len(escenarios)), muestras)
+
+    exitos = np.bincount(componentes, weights=vpns > 0, minlength=len(escenarios))
+    var = float(np.percentile(vpns, 5))
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        prob_exito_escenario = exitos / muestras * 100
+
+    return {
+        "vpns": vpns,
+        "componentes": componentes,
+        "vpn_esperado": float(vpns.mean()),
+        "desv_std": float(vpns.std()),
+        "prob_exito": float(np.mean(vpns > 0) * 100),
+        "var": var,
+        "cvar": float(vpns[vpns <= var].mean()),
+        "prob_exito_escenario": prob_exito_escenario
+    }
+
 
+def _colores_escenarios(n, tono=0.0):
+    """Colores de rojo a verde en el orden de los escenarios (tono > 0 los aclara)."""
+    posiciones = np.linspace(0.15, 0.85, n) if n > 1 else [0.5]
+    return [
+        c.replace("rgb", "rgba").replace(")", f", {1 - tono})")
+        for c in sample_colorscale("RdYlGn", list(posiciones))
+    ]
 
-def crear_tabla_escenarios(prob_pesimista, prob_base, prob_optimista,
-                           vpn_pes, vpn_base, vpn_opt,
-                           tir_pes, tir_base, tir_opt,
-                           bc_pes, bc_base, bc_opt):
+
+def crear_tabla_escenarios(resultado):
     """
     Crea un DataFrame con la tabla comparativa de escenarios.
     
+    Args:
+        resultado: dict de calcular_escenarios
+    
     Returns:
-        pd.DataFrame: Tabla con resultados de los tres escenarios
+        pd.DataFrame: Tabla con resultados de todos los escenarios
     """
     df = pd.DataFrame({
-        'Escenario': ['Pesimista', 'Base', 'Optimista'],
-        'Probabilidad': [f"{prob_pesimista}%", f"{prob_base}%", f"{prob_optimista}%"],
-        'VPN': [f"${vpn_pes:,.2f}", f"${vpn_base:,.2f}", f"${vpn_opt:,.2f}"],
-        'TIR': [f"{tir_pes:.2f}%" if tir_pes else "N/A", 
-               f"{tir_base:.2f}%" if tir_base else "N/A",
-               f"{tir_opt:.2f}%" if tir_opt else "N/A"],
-        'B/C': [f"{bc_pes:.2f}", f"{bc_base:.2f}", f"{bc_opt:.2f}"]
+        'Escenario': resultado['nombres'],
+        'Probabilidad': [f"{p:g}%" for p in resultado['probabilidades']],
+        'VPN': [f"${v:,.2f}" for v in resultado['vpn']],
+        'TIR': [f"{t:.2f}%" if not np.isnan(t) else "N/A" for t in resultado['tir']],
+        'B/C': [f"{b:.2f}" for b in resultado['bc']]
     })
     return df
 
 
-def crear_grafico_vpn(vpn_pes, vpn_base, vpn_opt):
+def crear_grafico_vpn(nombres, vpns):
     """Crea gráfico de barras de VPN por escenario."""
     fig = go.Figure()
     fig.add_trace(go.Bar(
-        x=['Pesimista', 'Base', 'Optimista'],
-        y=[vpn_pes, vpn_base, vpn_opt],
-        marker_color=['#ff6b6b', '#ffd93d', '#6bcf7f'],
-        text=[f'${vpn_pes:,.0f}', f'${vpn_base:,.0f}', f'${vpn_opt:,.0f}'],
+        x=nombres,
+        y=vpns,
+        marker_color=_colores_escenarios(len(nombres)),
+        text=[f'${v:,.0f}' for v in vpns],
         textposition='outside',
         showlegend=False
     ))
@@ -127,22 +347,22 @@ def crear_grafico_vpn(vpn_pes, vpn_base, vpn_opt):
     return fig
 
 
-def crear_grafico_tir(tir_pes, tir_base, tir_opt, wacc=None):
+def crear_grafico_tir(nombres, tirs, wacc=None):
     """
     Crea gráfico de barras de TIR por escenario.
     
     Args:
-        tir_pes, tir_base, tir_opt: TIR de cada escenario
+        nombres: Nombres de los escenarios
+        tirs: TIR de cada escenario (NaN si no existe)
         wacc: Tasa de descuento/WACC (opcional) para línea de referencia
     """
+    tirs = np.asarray(tirs, dtype=float)
     fig = go.Figure()
     fig.add_trace(go.Bar(
-        x=['Pesimista', 'Base', 'Optimista'],
-        y=[tir_pes if tir_pes else 0, tir_base if tir_base else 0, tir_opt if tir_opt else 0],
-        marker_color=['#ff8787', '#ffe066', '#8ce99a'],
-        text=[f'{tir_pes:.1f}%' if tir_pes else 'N/A', 
-              f'{tir_base:.1f}%' if tir_base else 'N/A',
-              f'{tir_opt:.1f}%' if tir_opt else 'N/A'],
+        x=nombres,
+        y=np.nan_to_num(tirs),
+        marker_color=_colores_escenarios(len(nombres), tono=0.2),
+        text=[f'{t:.1f}%' if not np.isnan(t) else 'N/A' for t in tirs],
         textposition='outside',
         showlegend=False
     ))
@@ -160,14 +380,14 @@ def crear_grafico_tir(tir_pes, tir_base, tir_opt, wacc=None):
     return fig
 
 
-def crear_grafico_bc(bc_pes, bc_base, bc_opt):
+def crear_grafico_bc(nombres, bcs):
     """Crea gráfico de barras de Relación B/C por escenario."""
     fig = go.Figure()
     fig.add_trace(go.Bar(
-        x=['Pesimista', 'Base', 'Optimista'],
-        y=[bc_pes, bc_base, bc_opt],
-        marker_color=['#ffa8a8', '#ffec99', '#b2f2bb'],
-        text=[f'{bc_pes:.2f}', f'{bc_base:.2f}', f'{bc_opt:.2f}'],
+        x=nombres,
+        y=bcs,
+        marker_color=_colores_escenarios(len(nombres), tono=0.4),
+        text=[f'{b:.2f}' for b in bcs],
         textposition='outside',
         showlegend=False
     ))
@@ -182,18 +402,22 @@ def crear_grafico_bc(bc_pes, bc_base, bc_opt):
     return fig
 
 
-def crear_grafico_distribucion(vpn_pes, vpn_base, vpn_opt,
-                               prob_pesimista, prob_base, prob_optimista,
-                               vpn_esperado):
-    """Crea gráfico de distribución de probabilidades."""
+def crear_grafico_distribucion(nombres, vpns, probabilidades, vpn_esperado):
+    """Crea gráfico de distribución de probabilidades (escenarios ordenados por VPN)."""
+    vpns = np.asarray(vpns, dtype=float)
+    probabilidades = np.asarray(probabilidades, dtype=float)
+    orden = np.argsort(vpns, kind="stable")
+    colores = _colores_escenarios(len(nombres))
+
     fig = go.Figure()
     fig.add_trace(go.Scatter(
-        x=[vpn_pes, vpn_base, vpn_opt],
-        y=[prob_pesimista, prob_base, prob_optimista],
+        x=vpns[orden],
+        y=probabilidades[orden],
         mode='markers+lines',
+        text=[nombres[i] for i in orden],
         marker=dict(
-            size=[prob_pesimista*2, prob_base*2, prob_optimista*2],
-            color=['#ff6b6b', '#ffd93d', '#6bcf7f'],
+            size=np.maximum(probabilidades[orden] * 2, 6),
+            color=[colores[i] for i in orden],
             line=dict(width=2, color='white')
         ),
         line=dict(color='gray', dash='dot', width=2),
@@ -211,13 +435,75 @@ def crear_grafico_distribucion(vpn_pes, vpn_base, vpn_opt,
     return fig
 
 
-def crear_grafico_probabilidades(prob_pesimista, prob_base, prob_optimista):
+def crear_grafico_probabilidades(nombres, probabilidades):
     """Crea gráfico de dona (pie chart) con las probabilidades."""
     fig = go.Figure(data=[go.Pie(
-        labels=['Pesimista', 'Base', 'Optimista'],
-        values=[prob_pesimista, prob_base, prob_optimista],
+        labels=nombres,
+        values=probabilidades,
         hole=0.4,
-        marker_colors=['#ff6b6b', '#ffd93d', '#6bcf7f']
+        sort=False,
+        marker_colors=_colores_escenarios(len(nombres))
     )])
     fig.update_layout(height=300)
     return fig
+
+
+def crear_grafico_flujos_escenarios(nombres, flujos):
+    """Crea gráfico de líneas con los flujos por periodo de cada escenario."""
+    colores = _colores_escenarios(len(nombres))
+    fig = go.Figure()
+    for nombre, fila, color in zip(nombres, flujos, colores):
+        fig.add_trace(go.Scatter(
+            x=np.arange(len(fila)),
+            y=fila,
+            mode='lines+markers',
+            name=nombre,
+            line=dict(color=color)
+        ))
+    fig.add_hline(y=0, line_dash="dash", line_color="gray")
+    fig.update_layout(
+        xaxis_title="Periodo",
+        yaxis_title="Flujo ($)",
+        height=350,
+        margin=dict(t=20, b=20),
+        hovermode='x unified'
+    )
+    return fig
+
+
+def crear_grafico_mezcla(nombres, mezcla, bins=60):
+    """
+    Crea el histograma de la mezcla continua, apilado por escenario.
+
+    Los conteos se calculan en el servidor con bordes comunes, así que el
+    tamaño del gráfico no depende del número de muestras.
+    """
+    vpns, componentes = mezcla['vpns'], mezcla['componentes']
+    bordes = np.histogram_bin_edges(vpns, bins=bins)
+    # Histograma 2D escenario × bin en una sola pasada
+    conteos, _, _ = np.histogram2d(
+        componentes, vpns, bins=[np.arange(len(nombres) + 1) - 0.5, bordes]
+    )
+    centros = (bordes[:-1] + bordes[1:]) / 2
+
+    fig = go.Figure()
+    for nombre, fila, color in zip(nombres, conteos, _colores_escenarios(len(nombres))):
+        fig.add_trace(go.Bar(
+            x=centros,
+            y=fila / vpns.size * 100,
+            width=np.diff(bordes),
+            name=nombre,
+            marker_color=color
+        ))
+    fig.add_vline(x=0, line_dash="dash", line_color="gray")
+    fig.add_vline(x=mezcla['var'], line_dash="dot", line_color="red",
+                  annotation_text=f"VaR 5%: ${mezcla['var']:,.0f}")
+    fig.update_layout(
+        xaxis_title="VPN ($)",
+        yaxis_title="Probabilidad (%)",
+        barmode='stack',
+        bargap=0,
+        height=400,
+        hovermode='x'
+    )
+    return fig
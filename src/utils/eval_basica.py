@@ -4,39 +4,177 @@ import plotly.graph_objects as go
 
 
 # Funciones de cálculo financiero
+def factores_descuento(tasas, n_periodos):
+    """
+    Calcula los factores de descuento 1/(1+tasa)^t para t = 0..n_periodos-1.
+    
+    Args:
+        tasas: Tasa escalar o array de tasas en formato decimal
+        n_periodos: Número de periodos (incluye el periodo 0)
+    
+    Returns:
+        Array de forma tasas.shape + (n_periodos,)
+    """
+    tasas = np.asarray(tasas, dtype=float)
+    exponentes = np.arange(n_periodos, dtype=float)
+    return np.exp(-np.log1p(tasas)[..., None] * exponentes)
+
+
+def calcular_vpn_lote(flujos, tasas):
+    """
+    Calcula el VPN de muchos conjuntos de flujos y/o tasas en una sola llamada.
+    
+    Los flujos tienen forma (..., T) y las tasas deben ser compatibles
+    (broadcasting) con flujos.shape[:-1]. Ejemplos:
+        - flujos (T,) y tasas (m,): curva VPN vs tasa
+        - flujos (n, T) y tasa escalar: n proyectos con la misma tasa
+        - flujos (n, T) y tasas (n,): cada fila con su propia tasa
+        - flujos (n, 1, T) y tasas (m,): matriz cruzada (n, m)
+    
+    Args:
+        flujos: Array de flujos de caja
+        tasas: Tasa(s) de descuento en formato decimal
+    
+    Returns:
+        Array con los VPN
+    """
+    flujos = np.asarray(flujos, dtype=float)
+    tasas = np.asarray(tasas, dtype=float)
+    factores = factores_descuento(tasas, flujos.shape[-1])
+
+    if tasas.ndim == 0:
+        # Un solo vector de descuento: producto matriz-vector
+        return flujos @ factores
+    return np.sum(flujos * factores, axis=-1)
+
+
 def calcular_vpn(flujos, tasa_descuento):
     """Calcula el Valor Presente Neto"""
-    vpn = sum([flujo / (1 + tasa_descuento)**i for i, flujo in enumerate(flujos)])
-    return vpn
+    return float(calcular_vpn_lote(flujos, tasa_descuento))
+
+
+# Rejilla de tasas para acotar la TIR: uniforme en log(1+r), de -99% a 1000%
+_REJILLA_TIR = np.expm1(np.linspace(np.log1p(-0.99), np.log1p(10.0), 97))
+
+
+def _vpn_y_derivada(flujos, tasas):
+    """Evalúa el VPN y su derivada respecto a la tasa, fila por fila."""
+    factores = factores_descuento(tasas, flujos.shape[-1])
+    exponentes = np.arange(flujos.shape[-1], dtype=float)
+    descontados = flujos * factores
+    vpn = descontados.sum(axis=-1)
+    derivada = -(descontados @ exponentes) / (1 + tasas)
+    return vpn, derivada
+
+
+def calcular_tir_lote(flujos, tol=1e-10, max_iter=100):
+    """
+    Calcula la TIR de una matriz de flujos de caja (una fila por proyecto).
+    
+    Primero acota la raíz de cada fila evaluando el VPN sobre una rejilla de
+    tasas (se elige el cambio de signo más cercano al 10%), y luego aplica
+    pasos de Newton vectorizados protegidos por bisección: si un paso sale
+    del intervalo o la derivada se anula, se bisecta.
+    
+    Args:
+        flujos: Array de forma (..., T)
+        tol: Tolerancia relativa sobre la tasa
+        max_iter: Número máximo de iteraciones
+    
+    Returns:
+        Tupla (tirs, convergido): TIR en porcentaje (NaN si no converge)
+        y máscara booleana de convergencia, ambas de forma flujos.shape[:-1]
+    """
+    flujos = np.asarray(flujos, dtype=float)
+    forma = flujos.shape[:-1]
+    matriz = flujos.reshape(-1, flujos.shape[-1])
+    n = matriz.shape[0]
+
+    tirs = np.full(n, np.nan)
+    convergido = np.zeros(n, dtype=bool)
+
+    # Acotamiento sobre la rejilla
+    valores = matriz @ factores_descuento(_REJILLA_TIR, matriz.shape[-1]).T
+    signos = np.sign(valores)
+    cambio = (signos[:, :-1] * signos[:, 1:] < 0) | ((signos[:, :-1] == 0) ^ (signos[:, 1:] == 0))
+    centros = (_REJILLA_TIR[:-1] + _REJILLA_TIR[1:]) / 2
+    distancia = np.where(cambio, np.abs(centros - 0.1), np.inf)
+    idx = np.argmin(distancia, axis=1)
+    acotadas = np.isfinite(distancia[np.arange(n), idx])
+
+    filas = np.flatnonzero(acotadas)
+    idx = idx[filas]
+    lo, hi = _REJILLA_TIR[idx], _REJILLA_TIR[idx + 1]
+    f_lo = valores[filas, idx]
+    f_hi = valores[filas, idx + 1]
+
+    # Punto inicial por interpolación lineal dentro del intervalo
+    with np.errstate(divide='ignore', invalid='ignore'):
+        tasa = np.where(f_hi != f_lo, lo - f_lo * (hi - lo) / (f_hi - f_lo), (lo + hi) / 2)
+    tasa = np.where(f_lo == 0, lo, np.where(f_hi == 0, hi, tasa))
+    datos = matriz[filas]
+
+    for _ in range(max_iter):
+        if filas.size == 0:
+            break
+
+        vpn, derivada = _vpn_y_derivada(datos, tasa)
+
+        # Actualizar el intervalo conservando el cambio de signo
+        mismo_signo = np.sign(vpn) == np.sign(f_lo)
+        lo = np.where(mismo_signo, tasa, lo)
+        f_lo = np.where(mismo_signo, vpn, f_lo)
+        hi = np.where(mismo_signo, hi, tasa)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            nueva = tasa - vpn / derivada
+        fuera = ~np.isfinite(nueva) | (nueva <= lo) | (nueva >= hi)
+        nueva = np.where(fuera, (lo + hi) / 2, nueva)
+
+        listo = (vpn == 0) | (np.abs(nueva - tasa) <= tol * (1 + np.abs(tasa))) | (hi - lo <= tol)
+        tasa_final = np.where(vpn == 0, tasa, nueva)
+        tirs[filas[listo]] = tasa_final[listo] * 100
+        convergido[filas[listo]] = True
+
+        sigue = ~listo
+        filas, datos = filas[sigue], datos[sigue]
+        tasa, lo, hi, f_lo = nueva[sigue], lo[sigue], hi[sigue], f_lo[sigue]
+
+    return tirs.reshape(forma), convergido.reshape(forma)
 
 
 def calcular_tir(flujos):
     """Calcula la Tasa Interna de Retorno usando método de Newton-Raphson"""
-    try:
-        return np.irr(flujos) * 100
-    except:
-        # Método alternativo si np.irr no está disponible
-        def npv_func(rate):
-            return sum([flujo / (1 + rate)**i for i, flujo in enumerate(flujos)])
-        
-        def npv_derivative(rate):
-            return sum([-i * flujo / (1 + rate)**(i+1) for i, flujo in enumerate(flujos)])
-        
-        rate = 0.1
-        for _ in range(100):
-            npv_val = npv_func(rate)
-            if abs(npv_val) < 1e-6:
-                return rate * 100
-            rate = rate - npv_val / npv_derivative(rate)
-            if rate < -0.99:
-                return None
-        return rate * 100 if rate > -0.99 else None
+    tir, convergido = calcular_tir_lote(flujos)
+    return float(tir) if convergido else None
+
+
+def calcular_bc_lote(flujos, tasas):
+    """
+    Calcula la Relación Beneficio/Costo de muchos conjuntos de flujos y/o tasas.
     
+    Mismas reglas de forma que calcular_vpn_lote. Los beneficios (flujos
+    positivos a partir del periodo 1) se descuentan con los mismos
+    exponentes que usa calcular_bc.
+    """
+    flujos = np.asarray(flujos, dtype=float)
+    tasas = np.asarray(tasas, dtype=float)
+    factores = factores_descuento(tasas, flujos.shape[-1] - 1)
+    beneficios = np.maximum(flujos[..., 1:], 0)
+
+    if tasas.ndim == 0:
+        beneficios_vp = beneficios @ factores
+    else:
+        beneficios_vp = np.sum(beneficios * factores, axis=-1)
+
+    inversion_inicial = np.abs(flujos[..., 0])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(inversion_inicial > 0, beneficios_vp / inversion_inicial, 0.0)
+
+
 def calcular_bc(flujos, tasa_descuento):
     """Calcula la Relación Beneficio/Costo"""
-    inversion_inicial = abs(flujos[0])
-    beneficios_vp = sum([max(flujo, 0) / (1 + tasa_descuento)**i for i, flujo in enumerate(flujos[1:])])
-    return beneficios_vp / inversion_inicial if inversion_inicial > 0 else 0
+    return float(calcular_bc_lote(flujos, tasa_descuento))
 
 
 def calcular_periodo_recuperacion(flujos):
@@ -90,7 +228,7 @@ def crear_grafico_evaluacion_completa(flujos, tasa_descuento):
     fig.add_hline(y=0, line_dash="dash", line_color="red", row=1, col=2)
     
     # Valor presente de flujos
-    vp_flujos = [flujo / (1 + tasa_descuento)**i for i, flujo in enumerate(flujos)]
+    vp_flujos = np.asarray(flujos, dtype=float) * factores_descuento(tasa_descuento, len(flujos))
     fig.add_trace(
         go.Bar(x=periodos, y=vp_flujos, name="Valor Presente",
                marker_color=['red' if f < 0 else 'lightgreen' for f in vp_flujos]),
@@ -99,7 +237,7 @@ def crear_grafico_evaluacion_completa(flujos, tasa_descuento):
     
     # Sensibilidad de tasa
     tasas = np.linspace(0, 30, 50)
-    vpns = [calcular_vpn(flujos, t/100) for t in tasas]
+    vpns = calcular_vpn_lote(flujos, tasas / 100)
     fig.add_trace(
         go.Scatter(x=tasas, y=vpns, mode='lines', name="VPN vs Tasa",
                   line=dict(color='purple', width=3)),
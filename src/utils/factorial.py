@@ -0,0 +1,230 @@
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+from src.utils.variaciones import (
+    transformacion,
+    factores_variacion,
+    evaluar_transformacion,
+    MAX_ELEMENTOS_BLOQUE
+)
+
+
+# ======================================================
+# SENSIBILIDAD FACTORIAL N-DIMENSIONAL
+# ======================================================
+# Generaliza el análisis univariado y bivariado a cualquier número de
+# variables: cada eje es una transformación del motor de variaciones
+# (multiplicadores de flujos por periodo y factor de la tasa), y cada celda
+# del factorial completo las compone por producto. El factorial se recorre
+# por bloques de índices planos para que la memoria de trabajo no dependa
+# del número total de combinaciones.
+
+MAX_CELDAS_FACTORIAL = 20_000_000
+
+INDICADORES_FACTORIAL = ("vpn", "bc", "tir")
+
+
+class ResultadoFactorial:
+    """
+    Resultado etiquetado de un análisis factorial.
+
+    Atributos:
+        variables: Nombres de los ejes, en orden
+        coordenadas: dict {variable: array de variaciones (%)}
+        valores: dict {indicador: array N-D con un eje por variable}
+    """
+
+    def __init__(self, variables, coordenadas, valores):
+        self.variables = list(variables)
+        self.coordenadas = coordenadas
+        self.valores = valores
+
+    @property
+    def forma(self):
+        return tuple(self.coordenadas[v].size for v in self.variables)
+
+    def _eje(self, variable):
+        if variable not in self.variables:
+            raise ValueError(f"Variable no incluida en el factorial: {variable}")
+        return self.variables.index(variable)
+
+    def _otros_ejes(self, variable):
+        eje = self._eje(variable)
+        return tuple(i for i in range(len(self.variables)) if i != eje)
+
+    def maximo_marginal(self, variable, indicador="vpn"):
+        """Máximo del indicador sobre el resto de ejes, para cada valor de la variable."""
+        return np.nanmax(self.valores[indicador], axis=self._otros_ejes(variable))
+
+    def minimo_marginal(self, variable, indicador="vpn"):
+        """Mínimo del indicador sobre el resto de ejes, para cada valor de la variable."""
+        return np.nanmin(self.valores[indicador], axis=self._otros_ejes(variable))
+
+    def media_marginal(self, variable, indicador="vpn"):
+        """Media del indicador sobre el resto de ejes, para cada valor de la variable."""
+        return np.nanmean(self.valores[indicador], axis=self._otros_ejes(variable))
+
+    def proporcion_positiva(self, variable=None):
+        """
+        Porcentaje de combinaciones con VPN > 0, en total o por valor de una variable.
+        """
+        positivos = self.valores["vpn"] > 0
+        if variable is None:
+            return positivos.mean() * 100
+        return positivos.mean(axis=self._otros_ejes(variable)) * 100
+
+    def seleccionar(self, **fijas):
+        """
+        Fija variables en su valor más cercano y devuelve el sub-resultado.
+
+        Ejemplo: resultado.seleccionar(**{"Tasa de Descuento": 10})
+        """
+        indices = [slice(None)] * len(self.variables)
+        for variable, valor in fijas.items():
+            eje = self._eje(variable)
+            indices[eje] = int(np.argmin(np.abs(self.coordenadas[variable] - valor)))
+
+        restantes = [v for v, i in zip(self.variables, indices) if isinstance(i, slice)]
+        return ResultadoFactorial(
+            restantes,
+            {v: self.coordenadas[v] for v in restantes},
+            {k: v[tuple(indices)] for k, v in self.valores.items()}
+        )
+
+    def resumen_marginal(self, indicador="vpn"):
+        """
+        Tabla con el peor y mejor valor del indicador en los extremos de cada variable.
+
+        Returns:
+            DataFrame con una fila por variable
+        """
+        filas = []
+        for variable in self.variables:
+            minimos = self.minimo_marginal(variable, indicador)
+            maximos = self.maximo_marginal(variable, indicador)
+            positivos = self.proporcion_positiva(variable)
+            filas.append({
+                "Variable": variable,
+                "Mínimo": np.nanmin(minimos),
+                "Máximo": np.nanmax(maximos),
+                "% VPN > 0 (extremo inferior)": positivos[0],
+                "% VPN > 0 (extremo superior)": positivos[-1]
+            })
+        return pd.DataFrame(filas)
+
+
+def _normalizar_ejes(ejes):
+    """Acepta tuplas (variable, rango, puntos) o dicts con esas claves."""
+    normalizados = []
+    for eje in ejes:
+        if isinstance(eje, dict):
+            eje = (eje["variable"], eje["rango"], eje.get("puntos", 11))
+        variable, rango, puntos = eje
+        normalizados.append((variable, float(rango), int(puntos)))
+
+    variables = [e[0] for e in normalizados]
+    if len(set(variables)) != len(variables):
+        raise ValueError("Cada variable solo puede aparecer en un eje del factorial")
+    return normalizados
+
+
+def calcular_sensibilidad_factorial(
+    flujos_base,
+    tasa_base,
+    ejes,
+    indicadores=("vpn", "bc"),
+    max_elementos=MAX_ELEMENTOS_BLOQUE
+):
+    """
+    Evalúa el factorial completo de varias variables por bloques.
+
+    Args:
+        flujos_base: Flujos de caja base
+        tasa_base: Tasa de descuento base (%)
+        ejes: Lista de (variable, rango ±%, puntos) o dicts con claves
+            variable, rango y puntos
+        indicadores: Indicadores a calcular entre "vpn", "bc" y "tir"
+            (la TIR es la más costosa: una raíz por combinación)
+        max_elementos: Máximo de combinaciones × periodos por bloque
+
+    Returns:
+        ResultadoFactorial con un array N-D por indicador
+    """
+    flujos = np.asarray(flujos_base, dtype=float)
+    n_periodos = flujos.size
+    ejes = _normalizar_ejes(ejes)
+
+    variables = [variable for variable, _, _ in ejes]
+    coordenadas = {
+        variable: np.linspace(-rango, rango, puntos) for variable, rango, puntos in ejes
+    }
+    transformaciones = [
+        transformacion(variable, flujos, factores_variacion(coordenadas[variable]))
+        for variable in variables
+    ]
+
+    forma = tuple(coordenadas[v].size for v in variables)
+    n_celdas = int(np.prod(forma))
+    if n_celdas > MAX_CELDAS_FACTORIAL:
+        raise ValueError(
+            f"El factorial tiene {n_celdas:,} combinaciones "
+            f"(máximo {MAX_CELDAS_FACTORIAL:,}); reduce los puntos por eje"
+        )
+
+    desconocidos = set(indicadores) - set(INDICADORES_FACTORIAL)
+    if desconocidos:
+        raise ValueError(f"Indicadores desconocidos: {', '.join(sorted(desconocidos))}")
+
+    valores = {indicador: np.empty(n_celdas) for indicador in indicadores}
+    tamano_bloque = max(1, max_elementos // n_periodos)
+
+    for inicio in range(0, n_celdas, tamano_bloque):
+        fin = min(inicio + tamano_bloque, n_celdas)
+        indices = np.unravel_index(np.arange(inicio, fin), forma)
+
+        multiplicadores = np.ones((fin - inicio, n_periodos))
+        factor_tasa = np.ones(fin - inicio)
+        for (mult, fact), idx in zip(transformaciones, indices):
+            multiplicadores *= mult[idx]
+            factor_tasa *= fact[idx]
+
+        bloque = evaluar_transformacion(
+            flujos, tasa_base, (multiplicadores, factor_tasa), indicadores
+        )
+        for indicador, valor in bloque.items():
+            valores[indicador][inicio:fin] = valor
+
+    return ResultadoFactorial(
+        variables,
+        coordenadas,
+        {indicador: valor.reshape(forma) for indicador, valor in valores.items()}
+    )
+
+
+def grafico_factorial_marginal(resultado, indicador="vpn"):
+    """
+    Curvas de mínimo y máximo marginal del indicador para cada variable.
+    """
+    fig = make_subplots(rows=1, cols=len(resultado.variables),
+                        subplot_titles=resultado.variables)
+
+    for col, variable in enumerate(resultado.variables, start=1):
+        x = resultado.coordenadas[variable]
+        fig.add_trace(go.Scatter(
+            x=x, y=resultado.minimo_marginal(variable, indicador),
+            mode="lines", name="Peor caso", line=dict(color="#d62728"),
+            showlegend=col == 1
+        ), row=1, col=col)
+        fig.add_trace(go.Scatter(
+            x=x, y=resultado.maximo_marginal(variable, indicador),
+            mode="lines", name="Mejor caso", line=dict(color="#2ca02c"),
+            fill="tonexty", showlegend=col == 1
+        ), row=1, col=col)
+        fig.update_xaxes(title_text="Variación (%)", row=1, col=col)
+        if indicador == "vpn":
+            fig.add_hline(y=0, line_dash="dash", row=1, col=col)
+
+    fig.update_layout(height=400, template="plotly_white")
+    return fig
@@ -0,0 +1,158 @@
+import numpy as np
+
+from src.utils.eval_basica import factores_descuento, calcular_tir_lote
+from src.utils.drivers import construir_drivers
+
+
+# ======================================================
+# DERIVADAS ANALÍTICAS DEL VPN Y DE LA TIR
+# ======================================================
+# VPN = Σ F_t·v^t con v = 1/(1+r):
+#     ∂VPN/∂F_t = v^t
+#     ∂VPN/∂r   = -Σ t·F_t·v^(t+1)
+# La TIR y cumple VPN(F, y) = 0; por derivación implícita
+#     ∂y/∂F_t = -(1+y)^(-t) / ∂VPN/∂y|_(r=y)
+# Todo se obtiene en O(T) por proyecto y admite lotes (..., T).
+
+
+def _derivada_tasa(flujos, factores):
+    """∂VPN/∂r (r en decimal) a partir de los factores de descuento v^t."""
+    if flujos.shape[-1] < 2:
+        return np.zeros(np.broadcast_shapes(flujos.shape, factores.shape)[:-1])
+    t = np.arange(flujos.shape[-1], dtype=float)
+    # v^(t+1) = v^t · v, con v = factores[..., 1]
+    return -np.sum(t * flujos * factores, axis=-1) * factores[..., 1]
+
+
+def gradiente_vpn(flujos, tasa):
+    """
+    Gradiente exacto del VPN respecto a cada flujo y a la tasa.
+
+    Args:
+        flujos: Flujos de caja (..., T)
+        tasa: Tasa(s) de descuento (%) compatibles con flujos.shape[:-1]
+
+    Returns:
+        dict con vpn, flujos (∂VPN/∂F_t, forma (..., T)) y tasa
+        (∂VPN/∂r por unidad de tasa decimal)
+    """
+    flujos = np.asarray(flujos, dtype=float)
+    factores = factores_descuento(np.asarray(tasa, dtype=float) / 100, flujos.shape[-1])
+    return {
+        "vpn": np.sum(flujos * factores, axis=-1),
+        "flujos": np.broadcast_to(factores, np.broadcast_shapes(factores.shape, flujos.shape)),
+        "tasa": _derivada_tasa(flujos, factores)
+    }
+
+
+def gradiente_tir(flujos):
+    """
+    Gradiente de la TIR respecto a cada flujo por derivación implícita.
+
+    Args:
+        flujos: Flujos de caja (..., T)
+
+    Returns:
+        dict con tir (%), flujos (∂TIR/∂F_t en puntos porcentuales por $)
+        y convergido; NaN donde la TIR no existe
+    """
+    flujos = np.asarray(flujos, dtype=float)
+    tir, convergido = calcular_tir_lote(flujos)
+    factores = factores_descuento(tir / 100, flujos.shape[-1])
+    derivada_y = _derivada_tasa(flujos, factores)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        gradiente = -factores / derivada_y[..., None] * 100
+
+    return {"tir": tir, "flujos": gradiente, "convergido": convergido}
+
+
+def _matriz_drivers(drivers, n_periodos):
+    mascaras = np.array([
+        np.zeros(n_periodos) if d["tasa"] else d["mascara"] for d in drivers
+    ])
+    es_tasa = np.array([d["tasa"] for d in drivers], dtype=bool)
+    return mascaras, es_tasa
+
+
+def derivadas_drivers(flujos, tasa, drivers):
+    """
+    Derivada del VPN y de la TIR respecto al multiplicador λ de cada driver.
+
+    Un driver de flujos escala F_t → λ·F_t en su máscara; uno de tasa,
+    r → λ·r. En λ = 1:
+        ∂VPN/∂λ = Σ_t m_t·F_t·v^t      (flujos)
+        ∂VPN/∂λ = r·∂VPN/∂r            (tasa)
+
+    Args:
+        flujos: Flujos de caja (T,)
+        tasa: Tasa de descuento (%)
+        drivers: Lista de drivers (ver src.utils.drivers)
+
+    Returns:
+        dict con vpn, tir, d_vpn (D,) y d_tir (D,) en puntos porcentuales
+    """
+    flujos = np.asarray(flujos, dtype=float)
+    mascaras, es_tasa = _matriz_drivers(drivers, flujos.size)
+
+    g_vpn = gradiente_vpn(flujos, tasa)
+    d_vpn = np.where(
+        es_tasa,
+        tasa / 100 * g_vpn["tasa"],
+        mascaras @ (flujos * g_vpn["flujos"])
+    )
+
+    g_tir = gradiente_tir(flujos)
+    d_tir = np.where(es_tasa, 0.0, mascaras @ (flujos * g_tir["flujos"]))
+
+    return {
+        "vpn": float(g_vpn["vpn"]),
+        "tir": float(g_tir["tir"]) if g_tir["convergido"] else None,
+        "d_vpn": d_vpn,
+        "d_tir": d_tir if g_tir["convergido"] else np.full(len(drivers), np.nan)
+    }
+
+
+def elasticidades(flujos, tasa, familias=None):
+    """
+    Elasticidades puntuales exactas del VPN y de la TIR para cada driver.
+
+    La elasticidad es el cambio porcentual del indicador por cada 1% de
+    cambio del driver, evaluada en el caso base.
+
+    Args:
+        flujos: Flujos de caja
+        tasa: Tasa de descuento (%)
+        familias: Familias de drivers (default: las tres variables clásicas)
+
+    Returns:
+        dict {driver: {"derivada_vpn", "elasticidad_vpn", "elasticidad_tir"}}
+    """
+    drivers = construir_drivers(flujos, familias)
+    derivadas = derivadas_drivers(flujos, tasa, drivers)
+    vpn, tir = derivadas["vpn"], derivadas["tir"]
+
+    resultado = {}
+    for d, d_vpn, d_tir in zip(drivers, derivadas["d_vpn"], derivadas["d_tir"]):
+        resultado[d["nombre"]] = {
+            "derivada_vpn": float(d_vpn),
+            "elasticidad_vpn": float(d_vpn / vpn) if vpn != 0 else None,
+            "elasticidad_tir": float(d_tir / tir) if tir else None
+        }
+    return resultado
+
+
+def equilibrio_lineal(flujos, tasa, drivers):
+    """
+    Variación (%) de cada driver que anula el VPN según su derivada.
+
+    Es exacta para los drivers de flujos (el VPN es lineal en λ) y una
+    aproximación de Newton de un paso para la tasa.
+
+    Returns:
+        Array (D,) de variaciones (%), NaN si la derivada es nula
+    """
+    derivadas = derivadas_drivers(flujos, tasa, drivers)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        variacion = -derivadas["vpn"] / derivadas["d_vpn"] * 100
+    return np.where(np.isfinite(variacion), variacion, np.nan)
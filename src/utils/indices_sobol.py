@@ -0,0 +1,192 @@
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from src.utils.cache import en_cache
+from src.utils.montecarlo import vpns_desde_normales
+
+
+# ======================================================
+# ÍNDICES DE SOBOL (SENSIBILIDAD GLOBAL BASADA EN VARIANZA)
+# ======================================================
+# Esquema de Saltelli: dos matrices independientes de entradas A y B
+# (N × d) y, por cada variable i, la matriz AB_i = A con las columnas de i
+# tomadas de B. Con N·(k + 2) evaluaciones del modelo se estiman:
+#     S_i  (primer orden) = E[f(B)·(f(AB_i) − f(A))] / V      (Saltelli 2010)
+#     ST_i (efecto total) = E[(f(A) − f(AB_i))²] / (2V)        (Jansen)
+# Las entradas son las normales estándar que usa la simulación Monte Carlo,
+# agrupadas por variable: columna 0 la inversión, 1..T-1 los flujos y T la
+# tasa. Todas las evaluaciones se hacen en una sola llamada al kernel
+# vectorizado vpns_desde_normales. Los índices suponen entradas
+# independientes, por lo que no se aplica la correlación.
+
+VARIABLES_SOBOL = ["Flujos de Caja", "Tasa de Descuento", "Inversión Inicial"]
+
+# Réplicas bootstrap evaluadas a la vez
+BLOQUE_BOOTSTRAP = 16
+
+
+def _columnas_variable(variable, n_periodos):
+    if variable == "Inversión Inicial":
+        return [0]
+    if variable == "Flujos de Caja":
+        return list(range(1, n_periodos))
+    if variable == "Tasa de Descuento":
+        return [n_periodos]
+    raise ValueError(f"Variable sin entradas aleatorias: {variable}")
+
+
+def _estimar_indices(f_a, f_b, f_ab):
+    """
+    Estimadores de primer orden y total.
+
+    Args:
+        f_a, f_b: Arrays (..., N)
+        f_ab: Array (k, ..., N)
+
+    Returns:
+        Tupla (primer_orden (k, ...), total (k, ...))
+    """
+    varianza = np.var(np.concatenate([f_a, f_b], axis=-1), axis=-1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        primer_orden = np.mean(f_b * (f_ab - f_a), axis=-1) / varianza
+        total = 0.5 * np.mean((f_a - f_ab) ** 2, axis=-1) / varianza
+    return primer_orden, total
+
+
+@en_cache(requerir=("semilla",))
+def calcular_indices_sobol(
+    flujos,
+    tasa,
+    n=10000,
+    variables=None,
+    distribuciones=None,
+    n_bootstrap=200,
+    confianza=0.95,
+    semilla=None
+):
+    """
+    Calcula los índices de Sobol de primer orden y totales del VPN.
+
+    Args:
+        flujos: Flujos de caja base
+        tasa: Tasa de descuento base (%)
+        n: Tamaño N de cada matriz base (evaluaciones = N·(k + 2))
+        variables: Variables a analizar (default: las tres)
+        distribuciones: Distribuciones de los multiplicadores por variable
+            (ver src.utils.distribuciones; None = normales por defecto)
+        n_bootstrap: Remuestreos para los intervalos de confianza
+        confianza: Nivel de los intervalos (percentiles del bootstrap)
+        semilla: Semilla del generador aleatorio
+
+    Returns:
+        dict con variables, primer_orden, total, ic_primer_orden e
+        ic_total (k × 2), varianza y n_evaluaciones
+    """
+    flujos = np.asarray(flujos, dtype=float)
+    n_periodos = flujos.size
+    variables = list(variables or VARIABLES_SOBOL)
+    k = len(variables)
+
+    rng = np.random.default_rng(semilla)
+    a = rng.standard_normal((n, n_periodos + 1))
+    b = rng.standard_normal((n, n_periodos + 1))
+
+    # Todas las matrices apiladas: A, B y las k matrices AB_i
+    entradas = np.empty((k + 2, n, n_periodos + 1))
+    entradas[0] = a
+    entradas[1] = b
+    for i, variable in enumerate(variables):
+        columnas = _columnas_variable(variable, n_periodos)
+        entradas[i + 2] = a
+        entradas[i + 2][:, columnas] = b[:, columnas]
+
+    salidas = vpns_desde_normales(
+        flujos, tasa, entradas.reshape(-1, n_periodos + 1), distribuciones=distribuciones
+    ).reshape(k + 2, n)
+    f_a, f_b, f_ab = salidas[0], salidas[1], salidas[2:]
+
+    primer_orden, total = _estimar_indices(f_a, f_b, f_ab)
+
+    # Bootstrap vectorizado por bloques de réplicas: cada bloque remuestrea
+    # (m, N) índices para todas las matrices, y la memoria queda acotada
+    # a k·m·N valores aunque N sea grande
+    primer_boot = np.empty((k, n_bootstrap))
+    total_boot = np.empty((k, n_bootstrap))
+    for inicio in range(0, n_bootstrap, BLOQUE_BOOTSTRAP):
+        fin = min(inicio + BLOQUE_BOOTSTRAP, n_bootstrap)
+        remuestreo = rng.integers(0, n, size=(fin - inicio, n))
+        primer_boot[:, inicio:fin], total_boot[:, inicio:fin] = _estimar_indices(
+            f_a[remuestreo], f_b[remuestreo], f_ab[:, remuestreo]
+        )
+    colas = [(1 - confianza) / 2 * 100, (1 + confianza) / 2 * 100]
+
+    return {
+        "variables": variables,
+        "primer_orden": primer_orden,
+        "total": total,
+        "ic_primer_orden": np.percentile(primer_boot, colas, axis=-1).T,
+        "ic_total": np.percentile(total_boot, colas, axis=-1).T,
+        "varianza": float(np.var(np.concatenate([f_a, f_b]))),
+        "n_evaluaciones": n * (k + 2)
+    }
+
+
+def tabla_sobol(resultado):
+    """
+    Construye la tabla de índices de Sobol ordenada por efecto total.
+    """
+    filas = [
+        {
+            "Variable": variable,
+            "Primer orden": resultado["primer_orden"][i],
+            "IC primer orden": (
+                f"[{resultado['ic_primer_orden'][i, 0]:.3f}, "
+                f"{resultado['ic_primer_orden'][i, 1]:.3f}]"
+            ),
+            "Efecto total": resultado["total"][i],
+            "IC efecto total": (
+                f"[{resultado['ic_total'][i, 0]:.3f}, "
+                f"{resultado['ic_total'][i, 1]:.3f}]"
+            ),
+            "Interacciones": resultado["total"][i] - resultado["primer_orden"][i]
+        }
+        for i, variable in enumerate(resultado["variables"])
+    ]
+    return pd.DataFrame(filas).sort_values("Efecto total", ascending=False)
+
+
+def grafico_sobol(resultado):
+    """
+    Barras de índices de primer orden y totales con sus intervalos de confianza.
+    """
+    variables = resultado["variables"]
+    fig = go.Figure()
+
+    for clave, nombre, color in [
+        ("primer_orden", "Primer orden (Sᵢ)", "#1f77b4"),
+        ("total", "Efecto total (STᵢ)", "#ff7f0e")
+    ]:
+        valores = resultado[clave]
+        ic = resultado[f"ic_{clave}"]
+        fig.add_trace(go.Bar(
+            x=variables,
+            y=valores,
+            name=nombre,
+            marker_color=color,
+            error_y=dict(
+                type="data",
+                symmetric=False,
+                array=ic[:, 1] - valores,
+                arrayminus=valores - ic[:, 0]
+            )
+        ))
+
+    fig.update_layout(
+        title="Índices de Sobol del VPN",
+        yaxis_title="Fracción de la varianza del VPN",
+        barmode="group",
+        template="plotly_white",
+        height=400
+    )
+    return fig
@@ -12,6 +12,8 @@ import base64
 from plotly import graph_objects as go
 import plotly.io as pio
 import numpy as np
+from src.utils.eval_basica import factores_descuento
+from src.utils.variaciones import transformacion, apilar, evaluar_transformacion
 
 def crear_informe_pdf(proyecto_data, fecha_analisis, analista, buffer=None):
     """
@@ -161,6 +163,12 @@ def crear_informe_pdf(proyecto_data, fecha_analisis, analista, buffer=None):
         ['Relación B/C', f"{bc:.2f}", '✓ Rentable (>1)' if bc > 1 else '✗ No Rentable (<1)'],
         ['Tasa de Descuento', f"{proyecto_data['tasa_descuento']}%", 'WACC'],
     ]
+    opcion_real = proyecto_data.get('opcion_real')
+    if opcion_real:
+        indicators_data.append([
+            'VPN con Opciones', f"${opcion_real['vpn_ampliado']:,.2f}",
+            f"Flexibilidad: ${opcion_real['prima']:,.2f}"
+        ])
     
     indicators_table = Table(indicators_data, colWidths=[2*inch, 2*inch, 2*inch])
     indicators_table.setStyle(TableStyle([
@@ -215,10 +223,14 @@ def crear_informe_pdf(proyecto_data, fecha_analisis, analista, buffer=None):
     
     flujos_data = [['Periodo', 'Flujo de Caja', 'Flujo Acum.', 'Valor Presente', 'VP Acumulado']]
     
+    vp_flujos = np.asarray(proyecto_data['flujos'], dtype=float) * factores_descuento(tasa, len(periodos))
+    flujos_acum = np.cumsum(proyecto_data['flujos'])
+    vp_acum_flujos = np.cumsum(vp_flujos)
+    
     for i in periodos:
-        flujo_acum = sum(proyecto_data['flujos'][:i+1])
-        vp = proyecto_data['flujos'][i] / (1 + tasa)**i
-        vp_acum = sum([proyecto_data['flujos'][j] / (1 + tasa)**j for j in range(i+1)])
+        flujo_acum = flujos_acum[i]
+        vp = vp_flujos[i]
+        vp_acum = vp_acum_flujos[i]
         
         flujos_data.append([
             str(i),
@@ -279,11 +291,14 @@ def crear_informe_pdf(proyecto_data, fecha_analisis, analista, buffer=None):
 
     estres_data = [['Escenario', 'Factor', 'VPN', 'TIR', 'Estado']]
 
-    for nombre, factor in escenarios_estres.items():
-        flujos_mod = [proyecto_data['flujos'][0]] + [f * factor for f in proyecto_data['flujos'][1:]]
-        from src.utils.eval_basica import calcular_vpn, calcular_tir
-        vpn_mod = calcular_vpn(flujos_mod, tasa)
-        tir_mod = calcular_tir(flujos_mod)
+    estres = evaluar_transformacion(
+        proyecto_data['flujos'], proyecto_data['tasa_descuento'],
+        transformacion("Flujos de Caja", proyecto_data['flujos'], list(escenarios_estres.values())),
+        indicadores=("vpn", "tir")
+    )
+
+    for (nombre, factor), vpn_mod, tir_mod in zip(escenarios_estres.items(), estres['vpn'], estres['tir']):
+        tir_mod = None if np.isnan(tir_mod) else tir_mod
         estado = '✓' if vpn_mod > 0 else '✗'
 
         estres_data.append([
@@ -327,24 +342,18 @@ def crear_informe_pdf(proyecto_data, fecha_analisis, analista, buffer=None):
     ))
     elements.append(Spacer(1, 0.05*inch))
 
+    # Cambio desfavorable de cada variable: flujos -20%, tasa +20%, inversión +20%
     variables_riesgo = ['Flujos de Caja', 'Tasa de Descuento', 'Inversión Inicial']
-    impactos = []
-
-    for var in variables_riesgo:
-        if var == "Flujos de Caja":
-            flujos_mod = [proyecto_data['flujos'][0]] + [f * 0.8 for f in proyecto_data['flujos'][1:]]
-            from src.utils.eval_basica import calcular_vpn
-            vpn_modificado = calcular_vpn(flujos_mod, tasa)
-        elif var == "Tasa de Descuento":
-            from src.utils.eval_basica import calcular_vpn
-            vpn_modificado = calcular_vpn(proyecto_data['flujos'], (proyecto_data['tasa_descuento'] * 1.2) / 100)
-        else:
-            flujos_mod = [proyecto_data['flujos'][0] * 1.2] + proyecto_data['flujos'][1:]
-            from src.utils.eval_basica import calcular_vpn
-            vpn_modificado = calcular_vpn(flujos_mod, tasa)
-
-        impacto = abs(vpn_modificado - vpn)
-        impactos.append(impacto)
+    factores_riesgo = [0.8, 1.2, 1.2]
+    vpns_modificados = evaluar_transformacion(
+        proyecto_data['flujos'], proyecto_data['tasa_descuento'],
+        apilar(*[
+            transformacion(var, proyecto_data['flujos'], factor)
+            for var, factor in zip(variables_riesgo, factores_riesgo)
+        ]),
+        indicadores=("vpn",)
+    )['vpn']
+    impactos = np.abs(vpns_modificados - vpn).tolist()
 
     riesgo_data = [['Variable', 'Impacto en VPN', 'Nivel de Riesgo']]
     for var, imp in zip(variables_riesgo, impactos):
@@ -491,7 +500,7 @@ def _crear_grafica_flujos(proyecto_data):
     """Crea una gráfica de flujos de caja."""
     periodos = list(range(len(proyecto_data['flujos'])))
     tasa = proyecto_data['tasa_descuento'] / 100
-    vp_flujos = [proyecto_data['flujos'][i] / (1 + tasa)**i for i in periodos]
+    vp_flujos = np.asarray(proyecto_data['flujos'], dtype=float) * factores_descuento(tasa, len(periodos))
     
     fig = go.Figure()
     
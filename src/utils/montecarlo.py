@@ -0,0 +1,602 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy.special import ndtri
+from scipy.stats import qmc
+from src.utils.eval_basica import factores_descuento
+from src.utils.distribuciones import muestrear_desde_normales, media_distribucion
+from src.utils.cache import en_cache
+
+
+# ======================================================
+# MOTOR VECTORIZADO DE SIMULACIÓN MONTE CARLO
+# ======================================================
+
+DESV_FLUJOS = 0.1
+DESV_TASA = 0.05
+MAX_MUESTRAS_EN_MEMORIA = 1_000_000
+
+# Distribución de los multiplicadores de cada variable (ver DISTRIBUCIONES)
+DISTRIBUCIONES_BASE = {
+    "Flujos de Caja": {"tipo": "Normal", "media": 1.0, "desv": DESV_FLUJOS},
+    "Tasa de Descuento": {"tipo": "Normal", "media": 1.0, "desv": DESV_TASA},
+    "Inversión Inicial": {"tipo": "Normal", "media": 1.0, "desv": DESV_FLUJOS}
+}
+
+
+def _especificaciones(distribuciones):
+    """Completa las distribuciones indicadas con las de DISTRIBUCIONES_BASE."""
+    return {**DISTRIBUCIONES_BASE, **(distribuciones or {})}
+
+
+def _multiplicadores(normales, n_periodos, distribuciones):
+    """Choques multiplicativos (n, T) de los flujos y (n,) de la tasa."""
+    especificaciones = _especificaciones(distribuciones)
+    choques = np.empty((normales.shape[0], n_periodos))
+    choques[:, 0] = muestrear_desde_normales(especificaciones["Inversión Inicial"], normales[:, 0])
+    choques[:, 1:] = muestrear_desde_normales(
+        especificaciones["Flujos de Caja"], normales[:, 1:n_periodos]
+    )
+    tasas = muestrear_desde_normales(especificaciones["Tasa de Descuento"], normales[:, n_periodos])
+    return choques, tasas
+
+
+def matriz_correlacion(n_periodos, rho_periodos=0.0, rho_tasa=0.0):
+    """
+    Construye la matriz de correlación (T+1)×(T+1) de los choques.
+
+    Los choques de los flujos siguen una estructura AR(1), con correlación
+    rho_periodos^|i-j| entre los periodos i y j, y todos tienen correlación
+    rho_tasa con el choque de la tasa (última fila/columna).
+
+    Args:
+        n_periodos: Número de flujos T (incluye el periodo 0)
+        rho_periodos: Correlación entre periodos consecutivos
+        rho_tasa: Correlación de cada flujo con la tasa de descuento
+
+    Returns:
+        Array (T+1, T+1)
+    """
+    indices = np.arange(n_periodos)
+    correlacion = np.eye(n_periodos + 1)
+    correlacion[:n_periodos, :n_periodos] = rho_periodos ** np.abs(indices[:, None] - indices)
+    correlacion[:n_periodos, n_periodos] = rho_tasa
+    correlacion[n_periodos, :n_periodos] = rho_tasa
+    return correlacion
+
+
+def factor_cholesky(correlacion):
+    """
+    Factoriza una matriz de correlación una sola vez por corrida.
+
+    Returns:
+        Matriz triangular inferior L tal que L @ L.T = correlacion
+
+    Raises:
+        ValueError: si la matriz no es simétrica, no tiene diagonal unitaria
+            o no es definida positiva
+    """
+    correlacion = np.asarray(correlacion, dtype=float)
+    if not np.allclose(correlacion, correlacion.T) or not np.allclose(np.diag(correlacion), 1):
+        raise ValueError("La matriz de correlación debe ser simétrica con diagonal 1")
+    try:
+        return np.linalg.cholesky(correlacion)
+    except np.linalg.LinAlgError:
+        raise ValueError("La matriz de correlación no es definida positiva")
+
+
+def vpns_desde_normales(flujos, tasa, normales, cholesky=None, distribuciones=None):
+    """
+    Convierte una matriz de normales estándar (n, T+1) en VPN simulados.
+
+    La primera columna es el choque de la inversión, las siguientes T-1 los
+    de los flujos y la última el de la tasa. Cada columna se transforma por
+    CDF inversa en el multiplicador de su variable: por defecto N(1, 0.1)
+    para flujos e inversión y N(1, 0.05) para la tasa. Si se pasa el factor
+    de Cholesky de la matriz de correlación, las normales se correlacionan
+    antes con un único producto matricial.
+
+    Args:
+        flujos: Array de flujos de caja (T,)
+        tasa: Tasa de descuento en porcentaje (ej: 12 para 12%)
+        normales: Array (n, T+1) de normales estándar independientes
+        cholesky: Factor de Cholesky (T+1, T+1) o None (choques independientes)
+        distribuciones: dict {variable: especificación} que reemplaza las de
+            DISTRIBUCIONES_BASE ("Flujos de Caja", "Tasa de Descuento",
+            "Inversión Inicial")
+
+    Returns:
+        Array (n,) con los VPN simulados
+    """
+    flujos = np.asarray(flujos, dtype=float)
+    n_periodos = flujos.shape[-1]
+    if cholesky is not None:
+        normales = normales @ cholesky.T
+
+    choques, multiplicador_tasa = _multiplicadores(normales, n_periodos, distribuciones)
+    tasas = tasa * multiplicador_tasa / 100
+
+    # Flujos simulados descontados in-place para no duplicar la matriz n×T
+    choques *= flujos
+    choques *= factores_descuento(tasas, n_periodos)
+    return choques.sum(axis=1)
+
+
+def generar_bloque_vpn(flujos, tasa, n, rng, cholesky=None, distribuciones=None):
+    """
+    Simula n escenarios del VPN en una sola operación matricial.
+
+    Cada flujo se multiplica por un choque por periodo y la tasa por otro
+    (por defecto N(1, 0.1) y N(1, 0.05)), independientes salvo que se
+    indique el factor de Cholesky de su matriz de correlación.
+
+    Args:
+        flujos: Array de flujos de caja (T,)
+        tasa: Tasa de descuento en porcentaje (ej: 12 para 12%)
+        n: Número de escenarios
+        rng: numpy.random.Generator
+        cholesky: Factor de Cholesky de la correlación (ver factor_cholesky)
+        distribuciones: Distribuciones de los multiplicadores por variable
+
+    Returns:
+        Array (n,) con los VPN simulados
+    """
+    n_periodos = np.shape(flujos)[-1]
+    return vpns_desde_normales(
+        flujos, tasa, rng.standard_normal((n, n_periodos + 1)), cholesky, distribuciones
+    )
+
+
+# ======================================================
+# REDUCCIÓN DE VARIANZA Y PARADA POR PRECISIÓN
+# ======================================================
+
+METODOS_REDUCCION = {
+    "estandar": "Estándar",
+    "antiteticas": "Variables antitéticas",
+    "variable_control": "Variable de control (VPN base)",
+    "sobol": "Cuasi Monte Carlo (Sobol)"
+}
+
+REPLICAS_SOBOL = 8
+
+
+def _lote_reducido(flujos, tasa, metodo, n, rng, motores_sobol, cholesky, distribuciones):
+    """
+    Genera un lote de VPN con el método indicado.
+
+    Returns:
+        Tupla (vpns, grupos, control): grupos es una matriz cuyas filas son
+        observaciones independientes para estimar el error estándar (pares
+        antitéticos o réplicas Sobol) y control el VPN de los flujos
+        simulados a la tasa base (solo para variable de control).
+    """
+    n_periodos = flujos.shape[-1]
+    dimension = n_periodos + 1
+
+    if metodo == "antiteticas":
+        mitad = rng.standard_normal(((n + 1) // 2, dimension))
+        vpns_pos = vpns_desde_normales(flujos, tasa, mitad, cholesky, distribuciones)
+        vpns_neg = vpns_desde_normales(flujos, tasa, -mitad, cholesky, distribuciones)
+        # Con n impar sobra el último reflejo: se descarta para devolver n
+        vpns = np.concatenate([vpns_pos, vpns_neg])[:n]
+        return vpns, (vpns_pos + vpns_neg)[:, None] / 2, None
+
+    if metodo == "sobol":
+        # Cada réplica avanza su propia secuencia en potencias de dos, con la
+        # mayor potencia que no supera n en total
+        m = int(np.log2(n // len(motores_sobol)))
+        replicas = [
+            vpns_desde_normales(flujos, tasa, ndtri(motor.random_base2(m) if motor.num_generated == 0
+                                                   else motor.random(2 ** m)),
+                                cholesky, distribuciones)
+            for motor in motores_sobol
+        ]
+        return np.concatenate(replicas), np.column_stack(replicas).T, None
+
+    normales = rng.standard_normal((n, dimension))
+    if cholesky is not None:
+        normales = normales @ cholesky.T
+    vpns = vpns_desde_normales(flujos, tasa, normales, distribuciones=distribuciones)
+    control = None
+    if metodo == "variable_control":
+        # Mismos choques de flujo con la tasa fija en el caso base; su media
+        # exacta es el VPN base con los multiplicadores en su valor esperado
+        choques, _ = _multiplicadores(normales, n_periodos, distribuciones)
+        control = (choques * flujos) @ factores_descuento(tasa / 100, n_periodos)
+    return vpns, vpns[:, None], control
+
+
+def _estimar(vpns, grupos, control, vpn_base, metodo):
+    """Estima VPN esperado, su error estándar y P(VPN<0) según el método."""
+    negativos = (vpns < 0).astype(float)
+
+    if metodo == "variable_control":
+        centrado = control - control.mean()
+        varianza_control = np.dot(centrado, centrado)
+        if varianza_control > 0:
+            beta = np.dot(vpns - vpns.mean(), centrado) / varianza_control
+            beta_neg = np.dot(negativos - negativos.mean(), centrado) / varianza_control
+        else:
+            beta = beta_neg = 0.0
+        sesgo_control = control.mean() - vpn_base
+        ajustados = vpns - beta * centrado
+        return (
+            vpns.mean() - beta * sesgo_control,
+            ajustados.std(ddof=1) / np.sqrt(vpns.size),
+            (negativos.mean() - beta_neg * sesgo_control) * 100
+        )
+
+    if metodo == "sobol":
+        # grupos: (réplicas, puntos) -> error entre medias de réplicas
+        medias = grupos.mean(axis=1)
+        return vpns.mean(), medias.std(ddof=1) / np.sqrt(medias.size), negativos.mean() * 100
+
+    observaciones = grupos[:, 0]
+    return (
+        vpns.mean(),
+        observaciones.std(ddof=1) / np.sqrt(observaciones.size),
+        negativos.mean() * 100
+    )
+
+
+@en_cache(requerir=("semilla",))
+def simulacion_montecarlo_reducida(flujos, tasa, metodo="estandar", n=10000, semilla=None,
+                                   error_objetivo=None, n_max=MAX_MUESTRAS_EN_MEMORIA,
+                                   correlacion=None, distribuciones=None):
+    """
+    Simulación Monte Carlo con técnicas de reducción de varianza.
+
+    Métodos (ver METODOS_REDUCCION):
+        - estandar: muestreo pseudoaleatorio simple
+        - antiteticas: pares de choques z y -z
+        - variable_control: usa el VPN de los flujos simulados a la tasa base,
+          cuya media exacta es conocida (el VPN determinístico con los
+          multiplicadores en su media), para corregir el VPN
+          esperado y la probabilidad de pérdida
+        - sobol: secuencias de Sobol aleatorizadas (varias réplicas
+          independientes para estimar el error)
+
+    Si se indica error_objetivo, la simulación duplica el número de escenarios
+    hasta que el error estándar del VPN esperado quede por debajo del
+    objetivo o se alcance n_max.
+
+    Args:
+        flujos: Array de flujos de caja
+        tasa: Tasa de descuento en porcentaje
+        metodo: Clave de METODOS_REDUCCION
+        n: Número de escenarios (inicial si hay error_objetivo); con Sobol se
+            redondea a la potencia de dos por réplica inmediatamente inferior
+        semilla: Semilla del generador aleatorio
+        error_objetivo: Error estándar deseado del VPN esperado ($)
+        n_max: Máximo de escenarios al usar error_objetivo
+        correlacion: Matriz de correlación (T+1)×(T+1) de los choques (ver
+            matriz_correlacion) o None para choques independientes
+        distribuciones: Distribuciones de los multiplicadores por variable
+
+    Returns:
+        dict con vpns, vpn_esperado, error_estandar, prob_negativa, n y metodo
+    """
+    if metodo not in METODOS_REDUCCION:
+        raise ValueError(f"Método de reducción desconocido: {metodo}")
+    if n < 1:
+        raise ValueError("El número de escenarios debe ser al menos 1")
+
+    flujos = np.asarray(flujos, dtype=float)
+    cholesky = factor_cholesky(correlacion) if correlacion is not None else None
+    rng = np.random.default_rng(semilla)
+    especificaciones = _especificaciones(distribuciones)
+    medias = np.full(flujos.shape[-1], media_distribucion(especificaciones["Flujos de Caja"]))
+    medias[0] = media_distribucion(especificaciones["Inversión Inicial"])
+    vpn_base = float((flujos * medias) @ factores_descuento(tasa / 100, flujos.shape[-1]))
+    motores_sobol = [
+        qmc.Sobol(d=flujos.shape[-1] + 1, scramble=True, seed=semilla_replica)
+        for semilla_replica in rng.spawn(REPLICAS_SOBOL)
+    ] if metodo == "sobol" else None
+
+    if metodo == "sobol" and n < REPLICAS_SOBOL:
+        raise ValueError(f"Sobol requiere al menos {REPLICAS_SOBOL} escenarios")
+
+    lotes_vpn, lotes_grupos, lotes_control = [], [], []
+    lote = n if error_objetivo is None else min(n, n_max)
+    while True:
+        vpns, grupos, control = _lote_reducido(
+            flujos, tasa, metodo, lote, rng, motores_sobol, cholesky, distribuciones
+        )
+        lotes_vpn.append(vpns)
+        lotes_grupos.append(grupos)
+        if control is not None:
+            lotes_control.append(control)
+
+        todos = np.concatenate(lotes_vpn)
+        # Las réplicas Sobol se apilan por columnas; el resto por filas
+        grupos_todos = np.hstack(lotes_grupos) if metodo == "sobol" else np.vstack(lotes_grupos)
+        control_todos = np.concatenate(lotes_control) if lotes_control else None
+        esperado, error, prob_neg = _estimar(todos, grupos_todos, control_todos, vpn_base, metodo)
+
+        if error_objetivo is None or error <= error_objetivo or todos.size >= n_max:
+            break
+        # Duplicar el total acumulado sin pasar de n_max
+        lote = min(todos.size, n_max - todos.size)
+        if metodo == "sobol" and lote < todos.size:
+            # Un lote parcial rompería el balance de las potencias de dos
+            break
+
+    return {
+        "vpns": todos,
+        "vpn_esperado": esperado,
+        "error_estandar": error,
+        "prob_negativa": prob_neg,
+        "n": todos.size,
+        "metodo": metodo
+    }
+
+
+# ======================================================
+# MODO STREAMING: MÉTRICAS EN LÍNEA CON MEMORIA CONSTANTE
+# ======================================================
+
+TAMANO_BLOQUE = 250_000
+BINS_CUANTILES = 8192
+
+
+class AcumuladorVPN:
+    """
+    Acumula estadísticas del VPN bloque a bloque sin guardar las muestras.
+
+    Mantiene media y varianza en línea (Welford, combinando bloques con la
+    fórmula de Chan), el conteo de VPN negativos, mínimo y máximo, y un
+    histograma fino de bordes fijos que hace de sketch de cuantiles: cada
+    bin guarda su conteo y la suma de sus valores, con dos bins extra para
+    los valores por debajo/encima del rango. Dos acumuladores con los mismos
+    bordes se pueden combinar, por lo que sirve para VaR/CVaR y para el
+    histograma del gráfico con memoria fija.
+    """
+
+    def __init__(self, limite_inf, limite_sup, n_bins=BINS_CUANTILES):
+        self.bordes = np.linspace(limite_inf, limite_sup, n_bins + 1)
+        self.conteos = np.zeros(n_bins + 2, dtype=np.int64)
+        self.sumas = np.zeros(n_bins + 2)
+        self.n = 0
+        self.media = 0.0
+        self.m2 = 0.0
+        self.negativos = 0
+        self.minimo = np.inf
+        self.maximo = -np.inf
+
+    @classmethod
+    def desde_muestra(cls, vpns, n_bins=BINS_CUANTILES):
+        """Crea un acumulador cuyo rango cubre holgadamente una muestra piloto."""
+        minimo, maximo = float(np.min(vpns)), float(np.max(vpns))
+        margen = max(maximo - minimo, abs(maximo), 1.0) * 0.5
+        return cls(minimo - margen, maximo + margen, n_bins)
+
+    def __len__(self):
+        return self.n
+
+    def agregar(self, vpns):
+        """Incorpora un bloque de VPN simulados."""
+        vpns = np.asarray(vpns, dtype=float).ravel()
+        n_bloque = vpns.size
+        if n_bloque == 0:
+            return self
+
+        media_bloque = vpns.mean()
+        m2_bloque = np.sum((vpns - media_bloque) ** 2)
+        self._combinar_momentos(n_bloque, media_bloque, m2_bloque)
+
+        self.negativos += int(np.count_nonzero(vpns < 0))
+        self.minimo = min(self.minimo, float(vpns.min()))
+        self.maximo = max(self.maximo, float(vpns.max()))
+
+        # Bin 0: debajo del rango; bin n_bins+1: encima del rango
+        n_bins = self.bordes.size - 1
+        ancho = (self.bordes[-1] - self.bordes[0]) / n_bins
+        idx = np.floor((vpns - self.bordes[0]) / ancho) + 1
+        idx = np.clip(idx, 0, n_bins + 1).astype(np.intp)
+        self.conteos += np.bincount(idx, minlength=self.conteos.size)
+        self.sumas += np.bincount(idx, weights=vpns, minlength=self.sumas.size)
+        return self
+
+    def combinar(self, otro):
+        """Combina otro acumulador con los mismos bordes (resultado parcial)."""
+        if not np.array_equal(self.bordes, otro.bordes):
+            raise ValueError("Los acumuladores deben compartir los bordes del histograma")
+        if otro.n == 0:
+            return self
+
+        self._combinar_momentos(otro.n, otro.media, otro.m2)
+        self.negativos += otro.negativos
+        self.minimo = min(self.minimo, otro.minimo)
+        self.maximo = max(self.maximo, otro.maximo)
+        self.conteos += otro.conteos
+        self.sumas += otro.sumas
+        return self
+
+    def _combinar_momentos(self, n_otro, media_otro, m2_otro):
+        if self.n == 0:
+            self.n, self.media, self.m2 = n_otro, float(media_otro), float(m2_otro)
+            return
+        n_total = self.n + n_otro
+        delta = media_otro - self.media
+        self.media += delta * n_otro / n_total
+        self.m2 += m2_otro + delta ** 2 * self.n * n_otro / n_total
+        self.n = n_total
+
+    def _bordes_extendidos(self):
+        """Bordes de todos los bins, incluyendo los de desborde (min/max reales)."""
+        inf = min(self.minimo, self.bordes[0])
+        sup = max(self.maximo, self.bordes[-1])
+        return np.concatenate([[inf], self.bordes, [sup]])
+
+    def cuantil(self, q):
+        """Cuantil q (0-1) interpolando linealmente dentro del bin."""
+        objetivo = q * self.n
+        acumulado = np.cumsum(self.conteos)
+        i = min(int(np.searchsorted(acumulado, objetivo, side='left')), self.conteos.size - 1)
+        previo = acumulado[i - 1] if i > 0 else 0
+        bordes = self._bordes_extendidos()
+        fraccion = (objetivo - previo) / self.conteos[i] if self.conteos[i] else 0.0
+        return bordes[i] + fraccion * (bordes[i + 1] - bordes[i])
+
+    def cola_inferior(self, q):
+        """Media de la fracción q más baja de los VPN (CVaR)."""
+        objetivo = q * self.n
+        if objetivo <= 0:
+            return self.minimo
+        acumulado = np.cumsum(self.conteos)
+        i = min(int(np.searchsorted(acumulado, objetivo, side='left')), self.conteos.size - 1)
+        previo = acumulado[i - 1] if i > 0 else 0
+        suma = self.sumas[:i].sum()
+        if self.conteos[i]:
+            suma += self.sumas[i] * (objetivo - previo) / self.conteos[i]
+        return suma / objetivo
+
+    def histograma(self, n_bins=50):
+        """
+        Reagrupa el histograma fino en n_bins barras para el gráfico.
+        Los valores fuera de rango se suman a las barras extremas.
+
+        Returns:
+            Tupla (conteos, bordes)
+        """
+        internos = self.conteos[1:-1]
+        cortes = np.linspace(0, internos.size, n_bins + 1).astype(int)
+        conteos = np.add.reduceat(internos, cortes[:-1])
+        conteos[0] += self.conteos[0]
+        conteos[-1] += self.conteos[-1]
+        return conteos, self.bordes[cortes]
+
+    def metricas(self):
+        """Mismas métricas que metricas_riesgo, calculadas en línea."""
+        return {
+            "VPN Esperado": self.media,
+            "Desviación": np.sqrt(self.m2 / self.n) if self.n else 0.0,
+            "Prob VPN < 0": self.negativos / self.n * 100 if self.n else 0.0,
+            "VaR 5%": self.cuantil(0.05),
+            "CVaR 5%": self.cola_inferior(0.05)
+        }
+
+
+def _acumular_bloque(tarea):
+    """Simula un bloque y devuelve solo su resultado parcial (AcumuladorVPN)."""
+    flujos, tasa, tamano, semilla_bloque, limites, n_bins, cholesky, distribuciones = tarea
+    vpns = generar_bloque_vpn(
+        flujos, tasa, tamano, np.random.default_rng(semilla_bloque), cholesky, distribuciones
+    )
+    return AcumuladorVPN(*limites, n_bins).agregar(vpns)
+
+
+def simulacion_montecarlo_streaming(flujos, tasa, n, semilla=None, bloque=TAMANO_BLOQUE,
+                                    procesos=1, correlacion=None, distribuciones=None):
+    """
+    Simula n escenarios del VPN en bloques de tamaño fijo.
+
+    Cada bloque usa su propio flujo aleatorio derivado con SeedSequence.spawn,
+    y el primero sirve de piloto para fijar el rango del histograma. La
+    memoria usada depende solo del tamaño del bloque.
+
+    Con procesos > 1 los bloques se reparten en un ProcessPoolExecutor y cada
+    trabajador devuelve acumuladores parciales, no muestras. Como los flujos
+    aleatorios pertenecen a los bloques (no a los trabajadores) y los
+    parciales se combinan siempre en orden de bloque, la misma semilla da
+    resultados idénticos bit a bit con cualquier número de procesos.
+
+    Args:
+        flujos: Array de flujos de caja
+        tasa: Tasa de descuento en porcentaje
+        n: Número total de escenarios
+        semilla: Semilla del generador aleatorio
+        bloque: Escenarios por bloque
+        procesos: Número de procesos (None = todos los núcleos)
+        correlacion: Matriz de correlación de los choques o None
+        distribuciones: Distribuciones de los multiplicadores por variable
+
+    Returns:
+        AcumuladorVPN con las estadísticas de la simulación
+    """
+    if n < 1 or bloque < 1:
+        raise ValueError("El número de escenarios y el tamaño de bloque deben ser al menos 1")
+
+    flujos = np.asarray(flujos, dtype=float)
+    cholesky = factor_cholesky(correlacion) if correlacion is not None else None
+    tamanos = [bloque] * (n // bloque)
+    if n % bloque:
+        tamanos.append(n % bloque)
+    semillas = np.random.SeedSequence(semilla).spawn(len(tamanos))
+
+    piloto = generar_bloque_vpn(
+        flujos, tasa, tamanos[0], np.random.default_rng(semillas[0]), cholesky, distribuciones
+    )
+    acumulador = AcumuladorVPN.desde_muestra(piloto)
+    limites = (acumulador.bordes[0], acumulador.bordes[-1])
+    n_bins = acumulador.bordes.size - 1
+    acumulador.agregar(piloto)
+
+    tareas = [
+        (flujos, tasa, tamano, semilla_bloque, limites, n_bins, cholesky, distribuciones)
+        for tamano, semilla_bloque in zip(tamanos[1:], semillas[1:])
+    ]
+    procesos = min(procesos or os.cpu_count() or 1, max(len(tareas), 1))
+
+    if procesos > 1:
+        with ProcessPoolExecutor(max_workers=procesos) as executor:
+            parciales = executor.map(_acumular_bloque, tareas)
+            for parcial in parciales:
+                acumulador.combinar(parcial)
+    else:
+        for tarea in tareas:
+            acumulador.combinar(_acumular_bloque(tarea))
+    return acumulador
+
+
+def benchmark_escalamiento(flujos, tasa, n=20_000_000, procesos=None, semilla=0):
+    """
+    Mide el tiempo de la simulación por bloques con distinto número de procesos.
+
+    Args:
+        flujos: Array de flujos de caja
+        tasa: Tasa de descuento en porcentaje
+        n: Número de escenarios por corrida
+        procesos: Lista de números de procesos a probar (default: 1, 2, 4, ... núcleos)
+        semilla: Semilla común a todas las corridas
+
+    Returns:
+        Lista de dicts con procesos, segundos, aceleración, eficiencia y si el
+        resultado es idéntico al de un solo proceso
+    """
+    if procesos is None:
+        nucleos = os.cpu_count() or 1
+        procesos = sorted({1, nucleos} | {2 ** k for k in range(1, nucleos.bit_length()) if 2 ** k <= nucleos})
+
+    filas = []
+    referencia = None
+    for p in procesos:
+        inicio = time.perf_counter()
+        resultado = simulacion_montecarlo_streaming(flujos, tasa, n, semilla, procesos=p)
+        segundos = time.perf_counter() - inicio
+
+        metricas = resultado.metricas()
+        if referencia is None:
+            referencia = (segundos, metricas, resultado.conteos)
+
+        aceleracion = referencia[0] / segundos
+        filas.append({
+            "procesos": p,
+            "segundos": segundos,
+            "aceleracion": aceleracion,
+            "eficiencia": aceleracion / p,
+            "identico": metricas == referencia[1] and np.array_equal(resultado.conteos, referencia[2])
+        })
+    return filas
+
+
+if __name__ == "__main__":
+    for fila in benchmark_escalamiento([-100000] + [30000] * 10, 10):
+        print(
+            f"{fila['procesos']:>3} procesos  {fila['segundos']:7.2f} s  "
+            f"aceleración {fila['aceleracion']:5.2f}x  eficiencia {fila['eficiencia']:6.1%}  "
+            f"idéntico={fila['identico']}"
+        )
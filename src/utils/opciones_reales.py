@@ -0,0 +1,193 @@
+import numpy as np
+
+from src.utils.cache import en_cache
+from src.utils.eval_basica import calcular_vpn_lote
+
+
+# ======================================================
+# OPCIONES REALES CON RETÍCULAS BINOMIALES Y TRINOMIALES
+# ======================================================
+# El subyacente es el valor presente de los flujos operativos del proyecto
+# (VPN + inversión), que evoluciona como un proceso lognormal con la
+# volatilidad indicada. La flexibilidad se valora como una opción sobre él:
+#     diferir    → call americana con precio de ejercicio = inversión
+#     expandir   → call sobre x·V con precio = costo de la expansión
+#     abandonar  → put americana con precio = valor de rescate
+# La inducción hacia atrás recorre los pasos con operaciones vectorizadas
+# sobre todos los nodos del paso (O(N²) en total, sin bucles anidados), por
+# lo que una retícula de miles de pasos se valora en milisegundos.
+
+TIPOS_OPCION = {
+    "diferir": "Opción de diferir",
+    "expandir": "Opción de expandir",
+    "abandonar": "Opción de abandonar"
+}
+
+MODELOS_RETICULA = {
+    "binomial": "Binomial (Cox-Ross-Rubinstein)",
+    "trinomial": "Trinomial (Boyle)"
+}
+
+
+def parametros_reticula(volatilidad, tasa_libre, plazo, pasos, modelo="binomial", rendimiento=0.0):
+    """
+    Parámetros de movimiento y probabilidades neutrales al riesgo.
+
+    Args:
+        volatilidad: Volatilidad anual del valor del proyecto (%)
+        tasa_libre: Tasa libre de riesgo anual (%)
+        plazo: Vida de la opción (años)
+        pasos: Número de pasos de la retícula
+        modelo: "binomial" o "trinomial"
+        rendimiento: Flujos que el proyecto reparte por año mientras no se
+            ejerce (%, análogo al dividendo)
+
+    Returns:
+        dict con dt, log_u (logaritmo del movimiento), probabilidades (de
+        subida a bajada) y descuento por paso
+    """
+    sigma = volatilidad / 100
+    r = tasa_libre / 100
+    q = rendimiento / 100
+    dt = plazo / pasos
+
+    if modelo == "binomial":
+        log_u = sigma * np.sqrt(dt)
+        u, d = np.exp(log_u), np.exp(-log_u)
+        p = (np.exp((r - q) * dt) - d) / (u - d)
+        probabilidades = (p, 1 - p)
+    elif modelo == "trinomial":
+        log_u = sigma * np.sqrt(2 * dt)
+        a = np.exp((r - q) * dt / 2)
+        b, c = np.exp(sigma * np.sqrt(dt / 2)), np.exp(-sigma * np.sqrt(dt / 2))
+        p_sube = ((a - c) / (b - c)) ** 2
+        p_baja = ((b - a) / (b - c)) ** 2
+        probabilidades = (p_sube, 1 - p_sube - p_baja, p_baja)
+    else:
+        raise ValueError(f"Modelo de retícula desconocido: {modelo}")
+
+    if min(probabilidades) < 0:
+        raise ValueError("Probabilidades negativas: aumenta los pasos o revisa la volatilidad")
+
+    return {
+        "dt": dt,
+        "log_u": log_u,
+        "probabilidades": probabilidades,
+        "descuento": np.exp(-r * dt)
+    }
+
+
+def valorar_reticula(subyacente, pago, plazo, volatilidad, tasa_libre, pasos=1000,
+                     modelo="binomial", americana=True, rendimiento=0.0):
+    """
+    Valora un derecho sobre el subyacente por inducción hacia atrás.
+
+    Args:
+        subyacente: Valor actual del subyacente
+        pago: Función array de valores del subyacente → pago por ejercer
+        plazo: Vida de la opción (años)
+        volatilidad: Volatilidad anual (%)
+        tasa_libre: Tasa libre de riesgo anual (%)
+        pasos: Número de pasos
+        modelo: "binomial" o "trinomial"
+        americana: Si es True se permite el ejercicio anticipado
+        rendimiento: Rendimiento anual del subyacente (%)
+
+    Returns:
+        Valor del derecho hoy
+    """
+    parametros = parametros_reticula(volatilidad, tasa_libre, plazo, pasos, modelo, rendimiento)
+    log_u = parametros["log_u"]
+    probabilidades = parametros["probabilidades"]
+    descuento = parametros["descuento"]
+    # Nodos del paso i ordenados de menor a mayor valor: exponentes de u de
+    # -i a i, de dos en dos en la binomial y de uno en uno en la trinomial
+    salto = 2 if modelo == "binomial" else 1
+
+    def valores_subyacente(i):
+        return subyacente * np.exp(np.arange(-i, i + 1, salto) * log_u)
+
+    valores = pago(valores_subyacente(pasos))
+    for i in range(pasos - 1, -1, -1):
+        # Continuación: los hijos de cada nodo son ventanas desplazadas del
+        # array del paso siguiente (subida, [media,] bajada)
+        ramas = len(probabilidades)
+        m = valores.size - ramas + 1
+        continuacion = sum(
+            p * valores[ramas - 1 - k:ramas - 1 - k + m]
+            for k, p in enumerate(probabilidades)
+        ) * descuento
+        valores = np.maximum(continuacion, pago(valores_subyacente(i))) if americana else continuacion
+    return float(valores[0])
+
+
+@en_cache()
+def valorar_opcion_real(
+    flujos,
+    tasa,
+    tipo="diferir",
+    volatilidad=30.0,
+    tasa_libre=5.0,
+    plazo=1.0,
+    pasos=1000,
+    modelo="binomial",
+    expansion_pct=30.0,
+    costo_expansion=0.0,
+    rescate=0.0,
+    rendimiento=0.0
+):
+    """
+    VPN ampliado del proyecto con una opción real.
+
+    Args:
+        flujos: Flujos de caja (el periodo 0 es la inversión)
+        tasa: Tasa de descuento del proyecto (%)
+        tipo: "diferir", "expandir" o "abandonar" (ver TIPOS_OPCION)
+        volatilidad: Volatilidad anual del valor del proyecto (%)
+        tasa_libre: Tasa libre de riesgo anual (%)
+        plazo: Años durante los que se puede ejercer la opción
+        pasos: Pasos de la retícula
+        modelo: "binomial" o "trinomial"
+        expansion_pct: Aumento (%) del valor del proyecto al expandir
+        costo_expansion: Inversión adicional necesaria para expandir
+        rescate: Monto recuperado al abandonar
+        rendimiento: Flujos anuales que se pierden mientras se difiere (% del valor)
+
+    Returns:
+        dict con subyacente, inversion, vpn_estatico, valor_opcion,
+        vpn_ampliado y prima (VPN ampliado − VPN estático)
+    """
+    flujos = np.asarray(flujos, dtype=float)
+    vpn_estatico = float(calcular_vpn_lote(flujos, tasa / 100))
+    inversion = float(-flujos[0])
+    subyacente = vpn_estatico + inversion
+    if subyacente <= 0:
+        raise ValueError("El valor presente de los flujos operativos debe ser positivo")
+
+    if tipo == "diferir":
+        pago = lambda v: np.maximum(v - inversion, 0.0)
+    elif tipo == "expandir":
+        pago = lambda v: np.maximum(v * expansion_pct / 100 - costo_expansion, 0.0)
+    elif tipo == "abandonar":
+        pago = lambda v: np.maximum(rescate - v, 0.0)
+    else:
+        raise ValueError(f"Tipo de opción desconocido: {tipo}")
+
+    valor_opcion = valorar_reticula(
+        subyacente, pago, plazo, volatilidad, tasa_libre, pasos, modelo,
+        americana=True, rendimiento=rendimiento
+    )
+    # Diferir sustituye a invertir hoy; expandir y abandonar se suman al proyecto
+    vpn_ampliado = valor_opcion if tipo == "diferir" else vpn_estatico + valor_opcion
+
+    return {
+        "tipo": tipo,
+        "modelo": modelo,
+        "pasos": pasos,
+        "subyacente": subyacente,
+        "inversion": inversion,
+        "vpn_estatico": vpn_estatico,
+        "valor_opcion": valor_opcion,
+        "vpn_ampliado": vpn_ampliado,
+        "prima": vpn_ampliado - vpn_estatico
+    }
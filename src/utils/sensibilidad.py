@@ -2,9 +2,42 @@ import streamlit as st
 from src.utils.ai import consultar_groq
 from plotly.subplots import make_subplots
 import plotly.graph_objects as go
-import plotly.express as px
 import numpy as np
-from src.utils.eval_basica import calcular_vpn, calcular_tir, calcular_bc
+from src.utils.eval_basica import (
+    calcular_vpn,
+    calcular_tir,
+    calcular_bc,
+    calcular_vpn_lote,
+    calcular_tir_lote,
+    calcular_bc_lote
+)
+from src.utils.montecarlo import (
+    generar_bloque_vpn,
+    AcumuladorVPN,
+    simulacion_montecarlo_streaming,
+    simulacion_montecarlo_reducida,
+    matriz_correlacion,
+    factor_cholesky,
+    METODOS_REDUCCION,
+    MAX_MUESTRAS_EN_MEMORIA,
+    DISTRIBUCIONES_BASE
+)
+from src.utils.distribuciones import DISTRIBUCIONES, validar_distribucion
+from src.utils.cache import en_cache
+from src.utils.equilibrio import punto_equilibrio_lote
+from src.utils.drivers import FAMILIAS_DRIVERS, construir_drivers
+from src.utils.variaciones import (
+    transformacion,
+    transformacion_drivers,
+    factores_variacion,
+    componer,
+    aplicar_transformacion,
+    evaluar_transformacion,
+    aplicar_variacion,
+    aplicar_variacion_lote,
+    MAX_ELEMENTOS_BLOQUE
+)
+from src.utils.gradientes import derivadas_drivers, elasticidades
 import pandas as pd
 
 
@@ -21,12 +54,22 @@ def calcular_elasticidad(vpns, variaciones):
 
 
 def margen_seguridad(punto_eq):
-    """Calcula el margen de seguridad basado en el punto de equilibrio."""
-    return abs(punto_eq) if punto_eq is not None else None
+    """
+    Calcula el margen de seguridad basado en el punto de equilibrio.
+    Acepta un valor o un array de puntos (p. ej. de punto_equilibrio_lote).
+    """
+    if punto_eq is None:
+        return None
+    if np.ndim(punto_eq):
+        return np.abs(punto_eq)
+    return None if np.isnan(punto_eq) else abs(punto_eq)
 
 
 def clasificar_riesgo(rango, max_rango):
     """Clasifica el nivel de riesgo en función del rango de impacto."""
+    if max_rango <= 0:
+        # Ningún driver mueve el VPN: no hay riesgo relativo que clasificar
+        return "🟢 Bajo"
     ratio = rango / max_rango
     if ratio > 0.66:
         return "🔴 Alto"
@@ -35,7 +78,9 @@ def clasificar_riesgo(rango, max_rango):
     return "🟢 Bajo"
 
 
-def simulacion_montecarlo(flujos, tasa, n=10000):
+@en_cache(ignorar=("procesos",), requerir=("semilla",))
+def simulacion_montecarlo(flujos, tasa, n=10000, semilla=None, procesos=1, correlacion=None,
+                          distribuciones=None):
     """
     Ejecuta simulación Monte Carlo para el VPN.
     
@@ -43,17 +88,29 @@ def simulacion_montecarlo(flujos, tasa, n=10000):
         flujos: Array de flujos de caja
         tasa: Tasa de descuento
         n: Número de simulaciones (default: 10000)
+        semilla: Semilla del generador aleatorio (None = no reproducible)
+        procesos: Procesos para la simulación por bloques (None = todos los núcleos)
+        correlacion: Matriz de correlación (T+1)×(T+1) entre los choques de
+            cada periodo y de la tasa (None = independientes)
+        distribuciones: dict {variable: especificación} con la distribución
+            del multiplicador de flujos, tasa e inversión (None = normales)
     
     Returns:
-        Array con los VPN simulados
+        Array con los VPN simulados, o un AcumuladorVPN con las métricas
+        en línea cuando n supera MAX_MUESTRAS_EN_MEMORIA. Con semilla fija
+        el resultado se guarda en caché y el array es de solo lectura.
     """
-    vpns = []
-    flujos_array = np.array(flujos)
-    for _ in range(n):
-        flujos_sim = flujos_array * np.random.normal(1, 0.1, len(flujos_array))
-        tasa_sim = tasa * np.random.normal(1, 0.05)
-        vpns.append(calcular_vpn(flujos_sim, tasa_sim / 100))
-    return np.array(vpns)
+    if n < 1:
+        raise ValueError("El número de escenarios debe ser al menos 1")
+    if n > MAX_MUESTRAS_EN_MEMORIA:
+        return simulacion_montecarlo_streaming(
+            flujos, tasa, n, semilla, procesos=procesos,
+            correlacion=correlacion, distribuciones=distribuciones
+        )
+
+    rng = np.random.default_rng(semilla)
+    cholesky = factor_cholesky(correlacion) if correlacion is not None else None
+    return generar_bloque_vpn(flujos, tasa, n, rng, cholesky, distribuciones)
 
 
 def escenarios_criticos(vpns):
@@ -82,7 +139,13 @@ def pendiente_vpn(vpns, variaciones):
 
 
 def metricas_riesgo(vpns):
-    """Calcula métricas de riesgo basadas en simulación."""
+    """
+    Calcula métricas de riesgo basadas en simulación.
+    Acepta el array de VPN o un AcumuladorVPN de la simulación por bloques.
+    """
+    if isinstance(vpns, AcumuladorVPN):
+        return vpns.metricas()
+
     return {
         "VPN Esperado": np.mean(vpns),
         "Desviación": np.std(vpns),
@@ -92,9 +155,147 @@ def metricas_riesgo(vpns):
     }
 
 
-def grafico_distribucion_vpn(vpns):
-    """Crea histograma de distribución del VPN."""
-    fig = px.histogram(vpns, nbins=50, title="Distribución del VPN")
+def metricas_riesgo_reducida(resultado):
+    """
+    Métricas de riesgo de una simulación con reducción de varianza.
+    VaR y CVaR salen de las muestras; el VPN esperado y la probabilidad de
+    pérdida usan los estimadores del método, junto con su error estándar.
+    """
+    metricas = metricas_riesgo(resultado["vpns"])
+    metricas["VPN Esperado"] = resultado["vpn_esperado"]
+    metricas["Prob VPN < 0"] = resultado["prob_negativa"]
+    metricas["Error Estándar"] = resultado["error_estandar"]
+    return metricas
+
+
+MAX_BINS_HISTOGRAMA = 200
+
+
+def _rango_intercuartil(vpns):
+    if isinstance(vpns, AcumuladorVPN):
+        return vpns.cuantil(0.75) - vpns.cuantil(0.25)
+    q1, q3 = np.percentile(vpns, [25, 75])
+    return q3 - q1
+
+
+def _numero_bins(vpns, bins):
+    """Bins fijos (int) o regla de Freedman–Diaconis ("fd")."""
+    if bins != "fd":
+        return int(bins)
+    n = len(vpns)
+    if isinstance(vpns, AcumuladorVPN):
+        _, bordes = vpns.histograma(1)
+        amplitud = bordes[-1] - bordes[0]
+    else:
+        amplitud = np.ptp(vpns)
+    ancho = 2 * _rango_intercuartil(vpns) * n ** (-1 / 3)
+    if ancho <= 0 or amplitud <= 0:
+        return 1
+    return int(np.clip(np.ceil(amplitud / ancho), 10, MAX_BINS_HISTOGRAMA))
+
+
+def histograma_vpn(vpns, bins="fd"):
+    """
+    Agrupa los VPN simulados en barras en el servidor.
+
+    Args:
+        vpns: Array de VPN o AcumuladorVPN de la simulación por bloques
+        bins: Número fijo de barras o "fd" (Freedman–Diaconis)
+
+    Returns:
+        Tupla (conteos, bordes)
+    """
+    n_bins = _numero_bins(vpns, bins)
+    if isinstance(vpns, AcumuladorVPN):
+        return vpns.histograma(n_bins)
+    return np.histogram(vpns, bins=n_bins)
+
+
+def kde_vpn(vpns, puntos=512, ancho_banda=None):
+    """
+    Estimación de densidad por núcleo gaussiano calculada con FFT.
+
+    Las muestras se agrupan en una rejilla regular de `puntos` celdas y la
+    rejilla se convoluciona con el núcleo, así que el coste no depende del
+    número de simulaciones más allá del agrupamiento inicial.
+
+    Args:
+        vpns: Array de VPN o AcumuladorVPN
+        puntos: Celdas de la rejilla de evaluación
+        ancho_banda: Desviación del núcleo (None = regla de Silverman)
+
+    Returns:
+        Tupla (x, densidad)
+    """
+    n = len(vpns)
+    if isinstance(vpns, AcumuladorVPN):
+        desviacion = vpns.metricas()["Desviación"]
+        conteos, bordes = vpns.histograma(puntos)
+    else:
+        desviacion = np.std(vpns)
+        conteos, bordes = np.histogram(vpns, bins=puntos)
+
+    if ancho_banda is None:
+        escala = min(desviacion, _rango_intercuartil(vpns) / 1.34) or desviacion
+        ancho_banda = 0.9 * escala * n ** (-1 / 5)
+
+    paso = bordes[1] - bordes[0]
+    x = (bordes[:-1] + bordes[1:]) / 2
+    if ancho_banda <= 0 or paso <= 0:
+        return x, conteos / max(n, 1)
+
+    # Núcleo muestreado en la rejilla y convolución lineal (con relleno de ceros)
+    radio = min(int(np.ceil(4 * ancho_banda / paso)), puntos)
+    desplazamientos = np.arange(-radio, radio + 1) * paso
+    nucleo = np.exp(-0.5 * (desplazamientos / ancho_banda) ** 2)
+    nucleo /= nucleo.sum() * paso
+
+    largo = puntos + nucleo.size - 1
+    convolucion = np.fft.irfft(
+        np.fft.rfft(conteos, largo) * np.fft.rfft(nucleo, largo), largo
+    )
+    densidad = np.maximum(convolucion[radio:radio + puntos], 0) / n
+    return x, densidad
+
+
+def grafico_distribucion_vpn(vpns, bins="fd", kde=False):
+    """
+    Crea histograma de distribución del VPN.
+
+    El agrupamiento se hace en el servidor y al navegador solo se envían
+    conteos y bordes, así que el tamaño del gráfico no depende del número
+    de simulaciones.
+
+    Args:
+        vpns: Array de VPN o AcumuladorVPN
+        bins: Número fijo de barras o "fd" (Freedman–Diaconis)
+        kde: Si es True, superpone la densidad estimada (KDE por FFT)
+    """
+    conteos, bordes = histograma_vpn(vpns, bins)
+    fig = go.Figure(go.Bar(
+        x=(bordes[:-1] + bordes[1:]) / 2,
+        y=conteos,
+        width=np.diff(bordes),
+        name="VPN"
+    ))
+
+    if kde:
+        x, densidad = kde_vpn(vpns)
+        # Escalada a frecuencias para compartir eje con las barras
+        fig.add_trace(go.Scatter(
+            x=x,
+            y=densidad * len(vpns) * np.mean(np.diff(bordes)),
+            mode="lines",
+            name="Densidad (KDE)",
+            line=dict(color="#1f4e79", width=2)
+        ))
+
+    fig.update_layout(
+        title="Distribución del VPN",
+        xaxis_title="VPN ($)",
+        yaxis_title="Frecuencia",
+        bargap=0
+    )
     fig.add_vline(x=0, line_dash="dash", line_color="red")
     return fig
 
@@ -198,6 +399,9 @@ def grafico_sensibilidad_univariada(
     variable,
     tmar
 ):
+    # Con barridos densos los marcadores solo tapan la curva
+    modo = "lines+markers" if len(variaciones) <= 50 else "lines"
+
     fig = make_subplots(
         rows=1,
         cols=3,
@@ -213,7 +417,7 @@ def grafico_sensibilidad_univariada(
         go.Scatter(
             x=variaciones,
             y=vpns,
-            mode="lines+markers",
+            mode=modo,
             line=dict(width=3),
             name="VPN"
         ),
@@ -226,7 +430,7 @@ def grafico_sensibilidad_univariada(
         go.Scatter(
             x=variaciones,
             y=tirs,
-            mode="lines+markers",
+            mode=modo,
             line=dict(width=3),
             name="TIR"
         ),
@@ -239,7 +443,7 @@ def grafico_sensibilidad_univariada(
         go.Scatter(
             x=variaciones,
             y=bcs,
-            mode="lines+markers",
+            mode=modo,
             line=dict(width=3),
             name="B/C"
         ),
@@ -265,60 +469,43 @@ def grafico_sensibilidad_univariada(
 
     return fig
 
-def aplicar_variacion(
-    variable,
-    flujos_base,
-    tasa_base,
-    variacion_pct
-):
-    flujos = flujos_base.copy()
-    tasa = tasa_base
-
-    if variable == "Flujos de Caja":
-        factor = 1 + variacion_pct / 100
-        flujos = [flujos[0]] + [f * factor for f in flujos[1:]]
-
-    elif variable == "Tasa de Descuento":
-        tasa = tasa_base * (1 + variacion_pct / 100)
-
-    elif variable == "Inversión Inicial":
-        factor = 1 + variacion_pct / 100
-        flujos[0] = flujos[0] * factor
-
-    return flujos, tasa
-
-
 def calcular_sensibilidad_univariada(
     variable,
     flujos_base,
     tasa_base,
     rango_pct,
-    puntos=20
+    puntos=1001
 ):
-    variaciones = np.linspace(-rango_pct, rango_pct, puntos)
-
-    vpns = []
-    tirs = []
-    bcs = []
+    """
+    Barrido de sensibilidad de una variable en una sola pasada vectorizada.
 
-    for v in variaciones:
-        flujos_mod, tasa_mod = aplicar_variacion(
-            variable,
-            flujos_base,
-            tasa_base,
-            v
-        )
+    La variable se expresa como una transformación del motor de
+    variaciones y VPN, TIR y B/C de todos los puntos se evalúan en lote.
 
-        vpns.append(calcular_vpn(flujos_mod, tasa_mod / 100))
-        tirs.append(calcular_tir(flujos_mod) or 0)
-        bcs.append(calcular_bc(flujos_mod, tasa_mod / 100))
+    Args:
+        variable: Variable a variar
+        flujos_base: Flujos de caja base
+        tasa_base: Tasa de descuento base (%)
+        rango_pct: Variación máxima (±%)
+        puntos: Número de puntos del barrido (impar para incluir el 0%)
 
-    # Punto de equilibrio
-    vpn_positivos = [i for i, v in enumerate(vpns) if v > 0]
-    punto_equilibrio = (
-        variaciones[min(vpn_positivos, key=lambda i: abs(vpns[i]))]
-        if vpn_positivos else None
+    Returns:
+        dict con variaciones, vpns, tirs, bcs (arrays) y punto_equilibrio
+        (variación exacta con VPN = 0, ver src.utils.equilibrio)
+    """
+    variaciones = np.linspace(-rango_pct, rango_pct, puntos)
+    indicadores = evaluar_transformacion(
+        flujos_base, tasa_base,
+        transformacion(variable, flujos_base, factores_variacion(variaciones))
     )
+    vpns = indicadores["vpn"]
+    bcs = indicadores["bc"]
+    tirs = np.nan_to_num(indicadores["tir"], nan=0.0)
+
+    # Punto de equilibrio exacto (puede quedar fuera del rango analizado)
+    punto_equilibrio = punto_equilibrio_lote(variable, flujos_base, tasa_base)
+    if np.isnan(punto_equilibrio):
+        punto_equilibrio = None
 
     return {
         "variaciones": variaciones,
@@ -413,28 +600,8 @@ def interpretar_sensibilidad_bivariada_ia(
     return consultar_groq(prompt)
 
 
-def aplicar_variacion(
-    variable,
-    flujos_base,
-    tasa_base,
-    variacion_pct
-):
-    flujos = flujos_base.copy()
-    tasa = tasa_base
-
-    if variable == "Flujos de Caja":
-        flujos = [flujos[0]] + [f * (1 + variacion_pct / 100) for f in flujos[1:]]
-
-    elif variable == "Tasa de Descuento":
-        tasa = tasa_base * (1 + variacion_pct / 100)
-
-    elif variable == "Inversión Inicial":
-        flujos[0] = flujos[0] * (1 + variacion_pct / 100)
-
-    return flujos, tasa
-
-
 
+@en_cache()
 def calcular_sensibilidad_bivariada(
     var1,
     var2,
@@ -442,26 +609,75 @@ def calcular_sensibilidad_bivariada(
     tasa_base,
     rango1,
     rango2,
-    puntos=15
+    puntos=101,
+    puntos2=None
 ):
-    vars1 = np.linspace(-rango1, rango1, puntos)
-    vars2 = np.linspace(-rango2, rango2, puntos)
+    """
+    Rejilla de sensibilidad de dos variables calculada por broadcasting.
 
-    vpn_matrix = np.zeros((len(vars1), len(vars2)))
+    Cada eje es una transformación del motor de variaciones
+    (multiplicadores de flujos por periodo y factores de la tasa); la
+    celda (i, j) compone ambas. Las filas se procesan en bloques de como máximo
+    MAX_ELEMENTOS_BLOQUE valores para acotar la memoria, y la TIR se
+    resuelve solo sobre los flujos distintos (si uno de los ejes es la
+    tasa, los flujos dependen solo del otro eje).
 
-    for i, v1 in enumerate(vars1):
-        for j, v2 in enumerate(vars2):
-            # Aplicar variación 1
-            flujos_1, tasa_1 = aplicar_variacion(
-                var1, flujos_base, tasa_base, v1
-            )
+    Args:
+        var1, var2: Variables de cada eje
+        flujos_base: Flujos de caja base
+        tasa_base: Tasa de descuento base (%)
+        rango1, rango2: Variación máxima de cada eje (±%)
+        puntos: Puntos del eje 1 (y del eje 2 si puntos2 es None)
+        puntos2: Puntos del eje 2
 
-            # Aplicar variación 2 sobre el resultado
-            flujos_2, tasa_2 = aplicar_variacion(
-                var2, flujos_1, tasa_1, v2
-            )
+    Returns:
+        dict con vars1, vars2, vpn_matrix, tir_matrix, bc_matrix
+        (n1 × n2), vpn_min, vpn_max y pct_positivo
+    """
+    flujos = np.asarray(flujos_base, dtype=float)
+    n_periodos = flujos.size
+    vars1 = np.linspace(-rango1, rango1, puntos)
+    vars2 = np.linspace(-rango2, rango2, puntos2 or puntos)
+
+    mult1, tasa1 = transformacion(var1, flujos, factores_variacion(vars1))
+    mult2, tasa2 = transformacion(var2, flujos, factores_variacion(vars2))
+    flujos2 = flujos * mult2
+
+    forma = (vars1.size, vars2.size)
+    vpn_matrix = np.empty(forma)
+    bc_matrix = np.empty(forma)
+    tir_matrix = np.empty(forma)
+
+    # La TIR solo depende de los flujos: si un eje no los modifica (la
+    # tasa) basta con resolverla a lo largo del otro eje
+    fijos1 = np.all(mult1 == 1.0)
+    fijos2 = np.all(mult2 == 1.0)
+    tir_por_celda = False
+    if fijos1 and fijos2:
+        tirs, convergido = calcular_tir_lote(flujos)
+        tir_matrix[:] = tirs if convergido else np.nan
+    elif fijos2:
+        tirs, convergido = calcular_tir_lote(flujos * mult1)
+        tir_matrix[:] = np.where(convergido, tirs, np.nan)[:, None]
+    elif fijos1:
+        tirs, convergido = calcular_tir_lote(flujos2)
+        tir_matrix[:] = np.where(convergido, tirs, np.nan)[None, :]
+    else:
+        tir_por_celda = True
+
+    filas_bloque = max(1, MAX_ELEMENTOS_BLOQUE // (vars2.size * n_periodos))
+    for inicio in range(0, vars1.size, filas_bloque):
+        fin = min(inicio + filas_bloque, vars1.size)
+        flujos_bloque, tasas_bloque = aplicar_transformacion(flujos, tasa_base, componer(
+            (mult1[inicio:fin, None, :], tasa1[inicio:fin, None]),
+            (mult2[None, :, :], tasa2[None, :])
+        ))
 
-            vpn_matrix[i, j] = calcular_vpn(flujos_2, tasa_2 / 100)
+        vpn_matrix[inicio:fin] = calcular_vpn_lote(flujos_bloque, tasas_bloque / 100)
+        bc_matrix[inicio:fin] = calcular_bc_lote(flujos_bloque, tasas_bloque / 100)
+        if tir_por_celda:
+            tirs, convergido = calcular_tir_lote(flujos_bloque)
+            tir_matrix[inicio:fin] = np.where(convergido, tirs, np.nan)
 
     # Métricas clave
     vpn_min = vpn_matrix.min()
@@ -472,24 +688,343 @@ def calcular_sensibilidad_bivariada(
         "vars1": vars1,
         "vars2": vars2,
         "vpn_matrix": vpn_matrix,
+        "tir_matrix": tir_matrix,
+        "bc_matrix": bc_matrix,
         "vpn_min": vpn_min,
         "vpn_max": vpn_max,
         "pct_positivo": pct_positivo
     }
 
 
-def grafico_sensibilidad_bivariada(
-    vpn_matrix,
-    vars1,
-    vars2,
+def _vpn_en_puntos(var1, var2, flujos, tasa_base, v1, v2):
+    """VPN en pares arbitrarios de variaciones (v1[k], v2[k])."""
+    return evaluar_transformacion(flujos, tasa_base, componer(
+        transformacion(var1, flujos, factores_variacion(v1)),
+        transformacion(var2, flujos, factores_variacion(v2))
+    ), indicadores=("vpn",))["vpn"]
+
+
+def _segmentos_celda(esquinas, valores, centro):
+    """
+    Marching squares en una celda: segmentos de la curva VPN = 0.
+
+    Args:
+        esquinas: Lista de 4 puntos (i, j) en orden (0,0), (0,1), (1,1), (1,0)
+        valores: VPN en esas esquinas
+        centro: VPN en el centro (desempata las celdas en silla de montar)
+
+    Returns:
+        Lista de pares ((arista_a, t_a), (arista_b, t_b)), donde cada arista es
+        el par ordenado de esquinas que corta y t la fracción del corte
+    """
+    cortes = []
+    for k in range(4):
+        a, b = k, (k + 1) % 4
+        va, vb = valores[a], valores[b]
+        if (va > 0) != (vb > 0):
+            arista = tuple(sorted((esquinas[a], esquinas[b])))
+            # Fracción desde el primer extremo de la arista ordenada
+            t = va / (va - vb)
+            if arista[0] != esquinas[a]:
+                t = 1 - t
+            cortes.append((arista, t))
+
+    if len(cortes) == 2:
+        return [(cortes[0], cortes[1])]
+    if len(cortes) == 4:
+        # Silla: se une cada corte con el vecino que rodea la esquina de
+        # signo opuesto al centro
+        if (valores[0] > 0) == (centro > 0):
+            return [(cortes[0], cortes[1]), (cortes[2], cortes[3])]
+        return [(cortes[3], cortes[0]), (cortes[1], cortes[2])]
+    return []
+
+
+def _encadenar_segmentos(segmentos):
+    """Une los segmentos que comparten arista en polilíneas ordenadas."""
+    por_arista = {}
+    for n, (a, b) in enumerate(segmentos):
+        por_arista.setdefault(a[0], []).append(n)
+        por_arista.setdefault(b[0], []).append(n)
+
+    usados = set()
+    polilineas = []
+
+    def siguiente(arista, actual):
+        for n in por_arista.get(arista, []):
+            if n != actual and n not in usados:
+                return n
+        return None
+
+    # Se empieza por los extremos abiertos (aristas con un solo segmento)
+    inicios = [n for n, (a, b) in enumerate(segmentos)
+               if len(por_arista[a[0]]) == 1 or len(por_arista[b[0]]) == 1]
+    for inicio in inicios + list(range(len(segmentos))):
+        if inicio in usados:
+            continue
+        a, b = segmentos[inicio]
+        if len(por_arista[a[0]]) != 1 and len(por_arista[b[0]]) == 1:
+            a, b = b, a
+        cadena = [a, b]
+        usados.add(inicio)
+        actual = inicio
+        while True:
+            n = siguiente(cadena[-1][0], actual)
+            if n is None:
+                break
+            usados.add(n)
+            c, d = segmentos[n]
+            cadena.append(d if c[0] == cadena[-1][0] else c)
+            actual = n
+        polilineas.append(cadena)
+    return polilineas
+
+
+# Por encima de esta resolución la rejilla base ya traza la frontera con
+# precisión y subdividir no compensa
+MAX_PUNTOS_ADAPTATIVO = 101
+
+
+def _celdas_con_cambio(positivo):
+    """Índices (i, j) de las celdas cuyas cuatro esquinas no tienen el mismo signo."""
+    esquinas_pos = (
+        positivo[:-1, :-1].astype(int) + positivo[:-1, 1:] + positivo[1:, 1:] + positivo[1:, :-1]
+    )
+    return np.argwhere((esquinas_pos > 0) & (esquinas_pos < 4))
+
+
+@en_cache()
+def calcular_frontera_adaptativa(
     var1,
-    var2
+    var2,
+    flujos_base,
+    tasa_base,
+    rango1,
+    rango2,
+    puntos=15,
+    niveles=6
 ):
     """
-    Genera el mapa de contorno para el análisis de sensibilidad bivariada.
-    Incluye la línea VPN = 0.
+    Localiza la frontera VPN = 0 refinando solo las celdas que la contienen.
+
+    Parte de la rejilla gruesa de calcular_sensibilidad_bivariada y, en cada
+    nivel, divide en cuatro (quadtree) únicamente las celdas cuyas esquinas
+    cambian de signo, evaluando el VPN solo en los puntos nuevos. En el
+    último nivel se trazan los cortes con marching squares y se unen en
+    polilíneas.
+
+    Con más de MAX_PUNTOS_ADAPTATIVO puntos por eje la rejilla de partida ya
+    es fina y no se subdivide (niveles = 0): solo se trazan sus cortes.
+
+    Args:
+        var1, var2: Variables de cada eje
+        flujos_base: Flujos de caja base
+        tasa_base: Tasa de descuento base (%)
+        rango1, rango2: Variación máxima de cada eje (±%)
+        puntos: Puntos por eje de la rejilla gruesa
+        niveles: Número de subdivisiones (resolución final ×2^niveles)
+
+    Returns:
+        dict de calcular_sensibilidad_bivariada (mapa grueso) más frontera
+        (lista de arrays (k, 2) con las variaciones de var1 y var2),
+        evaluaciones (rejilla gruesa + refinamiento), evaluaciones_refinamiento
+        (solo las nuevas) y evaluaciones_uniforme (las de una rejilla fina
+        equivalente)
+    """
+    resultado = dict(calcular_sensibilidad_bivariada(
+        var1, var2, flujos_base, tasa_base, rango1, rango2, puntos=puntos
+    ))
+    if puntos > MAX_PUNTOS_ADAPTATIVO:
+        niveles = 0
+    flujos = np.asarray(flujos_base, dtype=float)
+    escala = 2 ** niveles
+    n_fino = (puntos - 1) * escala + 1
+    paso1 = 2 * rango1 / (n_fino - 1)
+    paso2 = 2 * rango2 / (n_fino - 1)
+
+    # VPN por punto de la rejilla fina (i, j). De la gruesa solo se guardan
+    # las esquinas de las celdas con cambio de signo, localizadas en bloque
+    vpn_matrix = resultado["vpn_matrix"]
+    celdas_gruesas = _celdas_con_cambio(vpn_matrix > 0)
+    esquinas = np.unique(
+        (celdas_gruesas[:, None, :] + np.array([[0, 0], [0, 1], [1, 0], [1, 1]])).reshape(-1, 2),
+        axis=0
+    )
+    valores = dict(zip(
+        map(tuple, (esquinas * escala).tolist()),
+        vpn_matrix[esquinas[:, 0], esquinas[:, 1]].tolist()
+    ))
+    n_conocidos = len(valores)
+
+    def evaluar(nuevos):
+        nuevos = [p for p in dict.fromkeys(nuevos) if p not in valores]
+        if nuevos:
+            indices = np.array(nuevos, dtype=float)
+            vpns = _vpn_en_puntos(
+                var1, var2, flujos, tasa_base,
+                -rango1 + indices[:, 0] * paso1, -rango2 + indices[:, 1] * paso2
+            )
+            valores.update(zip(nuevos, vpns))
+
+    def cambia_signo(i, j, lado):
+        signos = {valores[p] > 0 for p in
+                  ((i, j), (i, j + lado), (i + lado, j + lado), (i + lado, j))}
+        return len(signos) == 2
+
+    celdas = [tuple(celda) for celda in (celdas_gruesas * escala).tolist()]
+    lado = escala
+
+    while lado > 1:
+        mitad = lado // 2
+        evaluar([
+            (i + di, j + dj)
+            for i, j in celdas
+            for di in (0, mitad, lado) for dj in (0, mitad, lado)
+        ])
+        celdas = [
+            (i + di, j + dj)
+            for i, j in celdas
+            for di in (0, mitad) for dj in (0, mitad)
+            if cambia_signo(i + di, j + dj, mitad)
+        ]
+        lado = mitad
+
+    # Centros de las celdas finales para desempatar sillas
+    centros = {}
+    if celdas:
+        indices = np.array(celdas, dtype=float) + 0.5
+        vpns = _vpn_en_puntos(
+            var1, var2, flujos, tasa_base,
+            -rango1 + indices[:, 0] * paso1, -rango2 + indices[:, 1] * paso2
+        )
+        centros = dict(zip(celdas, vpns))
+
+    segmentos = []
+    for i, j in celdas:
+        esquinas = [(i, j), (i, j + 1), (i + 1, j + 1), (i + 1, j)]
+        segmentos.extend(_segmentos_celda(
+            esquinas, [valores[p] for p in esquinas], centros[(i, j)]
+        ))
+
+    frontera = []
+    for cadena in _encadenar_segmentos(segmentos):
+        puntos_cadena = np.array([
+            np.array(arista[0]) + t * (np.array(arista[1]) - np.array(arista[0]))
+            for arista, t in cadena
+        ])
+        frontera.append(np.column_stack([
+            -rango1 + puntos_cadena[:, 0] * paso1,
+            -rango2 + puntos_cadena[:, 1] * paso2
+        ]))
+
+    refinamiento = len(valores) - n_conocidos + len(centros)
+    resultado.update({
+        "frontera": frontera,
+        "evaluaciones": puntos ** 2 + refinamiento,
+        "evaluaciones_refinamiento": refinamiento,
+        "evaluaciones_uniforme": n_fino ** 2
+    })
+    return resultado
+
+
+# ======================================================
+# RENDERIZADO DE REJILLAS DENSAS
+# ======================================================
+# Un go.Contour con etiquetas sobre una rejilla de 1000 × 1000 genera
+# figuras de decenas de MB. En modo "raster" se envía al navegador solo
+# una submuestra de la matriz como heatmap (sin suavizado) y la frontera
+# VPN = 0 ya calculada en el servidor como polilínea WebGL; los valores
+# exactos de cualquier punto se consultan sobre la matriz completa con
+# consultar_rejilla.
+
+MAX_PUNTOS_MAPA = 201
+MAX_CELDAS_CONTORNO = 101 * 101
+
+
+def reducir_rejilla(matriz, vars1, vars2, max_puntos=MAX_PUNTOS_MAPA):
+    """
+    Submuestrea una rejilla a como máximo max_puntos por eje.
+
+    Se toman filas y columnas equiespaciadas (incluidos los extremos), de
+    modo que cada valor mostrado es un valor exacto de la rejilla original.
+
+    Returns:
+        Tupla (matriz reducida, vars1 reducidas, vars2 reducidas)
+    """
+    matriz = np.asarray(matriz)
+    filas, columnas = (
+        np.unique(np.linspace(0, n - 1, min(max_puntos, n)).round().astype(int))
+        for n in matriz.shape
+    )
+    return matriz[np.ix_(filas, columnas)], np.asarray(vars1)[filas], np.asarray(vars2)[columnas]
+
+
+def frontera_rejilla(vpn_matrix, vars1, vars2):
+    """
+    Traza la curva VPN = 0 sobre una rejilla ya calculada.
+
+    Solo se recorren las celdas con cambio de signo (localizadas de forma
+    vectorizada) y se aplica el mismo marching squares de la frontera
+    adaptativa, usando la media de las esquinas como valor central.
+
+    Returns:
+        Lista de arrays (k, 2) con las variaciones de var1 y var2
+    """
+    vpn_matrix = np.asarray(vpn_matrix, dtype=float)
+    vars1 = np.asarray(vars1, dtype=float)
+    vars2 = np.asarray(vars2, dtype=float)
+    celdas = _celdas_con_cambio(vpn_matrix > 0)
+
+    segmentos = []
+    for i, j in celdas:
+        esquinas = [(i, j), (i, j + 1), (i + 1, j + 1), (i + 1, j)]
+        valores = [vpn_matrix[p] for p in esquinas]
+        segmentos.extend(_segmentos_celda(esquinas, valores, np.mean(valores)))
+
+    frontera = []
+    for cadena in _encadenar_segmentos(segmentos):
+        puntos_cadena = np.array([
+            np.array(arista[0]) + t * (np.array(arista[1]) - np.array(arista[0]))
+            for arista, t in cadena
+        ])
+        frontera.append(np.column_stack([
+            np.interp(puntos_cadena[:, 0], np.arange(vars1.size), vars1),
+            np.interp(puntos_cadena[:, 1], np.arange(vars2.size), vars2)
+        ]))
+    return frontera
+
+
+def consultar_rejilla(resultado, variacion1, variacion2):
+    """
+    Valores exactos de la rejilla completa en un punto (interpolación bilineal).
+
+    Args:
+        resultado: dict de calcular_sensibilidad_bivariada
+        variacion1: Variación de la variable 1 (%)
+        variacion2: Variación de la variable 2 (%)
+
+    Returns:
+        dict {"vpn", "tir", "bc"} (None si el indicador no existe en el punto)
     """
+    vars1, vars2 = resultado["vars1"], resultado["vars2"]
+    x1 = np.interp(variacion1, vars1, np.arange(vars1.size))
+    x2 = np.interp(variacion2, vars2, np.arange(vars2.size))
+    i, j = min(int(x1), vars1.size - 2), min(int(x2), vars2.size - 2)
+    t, u = x1 - i, x2 - j
+
+    valores = {}
+    for clave in ("vpn", "tir", "bc"):
+        m = resultado[f"{clave}_matrix"]
+        valor = (
+            (1 - t) * (1 - u) * m[i, j] + (1 - t) * u * m[i, j + 1]
+            + t * u * m[i + 1, j + 1] + t * (1 - u) * m[i + 1, j]
+        )
+        valores[clave] = None if np.isnan(valor) else float(valor)
+    return valores
+
 
+def _contorno_bivariado(vpn_matrix, vars1, vars2, frontera):
+    """Mapa de contorno etiquetado con la línea VPN = 0 (rejillas pequeñas)."""
     fig = go.Figure(
         data=go.Contour(
             z=vpn_matrix,
@@ -507,19 +1042,87 @@ def grafico_sensibilidad_bivariada(
     )
 
     # Línea crítica VPN = 0
-    fig.add_contour(
-        z=vpn_matrix,
-        x=vars2,
-        y=vars1,
-        showscale=False,
-        contours=dict(
-            start=0,
-            end=0,
-            size=1,
-            coloring="lines"
-        ),
-        line=dict(color="red", width=3)
-    )
+    if frontera is not None:
+        for k, linea in enumerate(frontera):
+            fig.add_trace(go.Scatter(
+                x=linea[:, 1],
+                y=linea[:, 0],
+                mode="lines",
+                line=dict(color="red", width=3),
+                name="VPN = 0",
+                showlegend=k == 0
+            ))
+    else:
+        fig.add_contour(
+            z=vpn_matrix,
+            x=vars2,
+            y=vars1,
+            showscale=False,
+            contours=dict(
+                start=0,
+                end=0,
+                size=1,
+                coloring="lines"
+            ),
+            line=dict(color="red", width=3)
+        )
+
+    return fig
+
+
+def grafico_sensibilidad_bivariada(
+    vpn_matrix,
+    vars1,
+    vars2,
+    var1,
+    var2,
+    frontera=None,
+    modo="auto"
+):
+    """
+    Genera el mapa de contorno para el análisis de sensibilidad bivariada.
+    Incluye la línea VPN = 0: la interpolada sobre la propia rejilla o, si
+    se pasa, la frontera precisa de calcular_frontera_adaptativa.
+
+    Con modo "raster" (o "auto" en rejillas de más de MAX_CELDAS_CONTORNO
+    celdas) se dibuja un heatmap submuestreado y la frontera como Scattergl,
+    de modo que el tamaño de la figura no depende de la resolución.
+    """
+    if modo == "auto":
+        modo = "contorno" if np.size(vpn_matrix) <= MAX_CELDAS_CONTORNO else "raster"
+
+    if modo == "raster":
+        z, y, x = reducir_rejilla(vpn_matrix, vars1, vars2)
+        fig = go.Figure(
+            data=go.Heatmap(
+                z=z,
+                x=x,
+                y=y,
+                zmin=vpn_matrix.min(),
+                zmax=vpn_matrix.max(),
+                zsmooth=False,
+                colorscale="RdYlGn",
+                colorbar=dict(title="VPN ($)"),
+                hovertemplate=(
+                    f"{var2}: %{{x:.2f}}%<br>{var1}: %{{y:.2f}}%"
+                    "<br>VPN: $%{z:,.2f}<extra></extra>"
+                )
+            )
+        )
+        if frontera is None:
+            frontera = frontera_rejilla(vpn_matrix, vars1, vars2)
+        for k, linea in enumerate(frontera):
+            fig.add_trace(go.Scattergl(
+                x=linea[:, 1],
+                y=linea[:, 0],
+                mode="lines",
+                line=dict(color="red", width=3),
+                name="VPN = 0",
+                hoverinfo="skip",
+                showlegend=k == 0
+            ))
+    else:
+        fig = _contorno_bivariado(vpn_matrix, vars1, vars2, frontera)
 
     fig.update_layout(
         title="Mapa de Sensibilidad (Línea roja: VPN = 0)",
@@ -612,33 +1215,33 @@ def interpretar_tornado_completo_ia(vars_ordenadas, rango):
 def grafico_tornado(vars_ordenadas, vpn_base, rango_tornado):
     """
     Genera el diagrama tornado del VPN.
+    Dos trazas en total (mínimos y máximos), con una barra por driver.
     """
+    nombres = [var_name for var_name, _ in vars_ordenadas]
+    minimos = np.array([datos["min"] for _, datos in vars_ordenadas])
+    maximos = np.array([datos["max"] for _, datos in vars_ordenadas])
 
     fig = go.Figure()
 
-    for i, (var_name, datos) in enumerate(vars_ordenadas):
-
-        fig.add_trace(go.Bar(
-            y=[var_name],
-            x=[datos["min"] - vpn_base],
-            orientation="h",
-            name=f"-{rango_tornado}%",
-            marker_color="#ff6b6b",
-            showlegend=(i == 0),
-            text=f"${datos['min']:,.0f}",
-            textposition="inside"
-        ))
-
-        fig.add_trace(go.Bar(
-            y=[var_name],
-            x=[datos["max"] - vpn_base],
-            orientation="h",
-            name=f"+{rango_tornado}%",
-            marker_color="#6bcf7f",
-            showlegend=(i == 0),
-            text=f"${datos['max']:,.0f}",
-            textposition="inside"
-        ))
+    fig.add_trace(go.Bar(
+        y=nombres,
+        x=minimos - vpn_base,
+        orientation="h",
+        name="VPN mínimo",
+        marker_color="#ff6b6b",
+        text=[f"${v:,.0f}" for v in minimos],
+        textposition="inside"
+    ))
+
+    fig.add_trace(go.Bar(
+        y=nombres,
+        x=maximos - vpn_base,
+        orientation="h",
+        name="VPN máximo",
+        marker_color="#6bcf7f",
+        text=[f"${v:,.0f}" for v in maximos],
+        textposition="inside"
+    ))
 
     fig.add_vline(x=0, line_dash="dash", line_color="black", line_width=2)
 
@@ -646,59 +1249,72 @@ def grafico_tornado(vars_ordenadas, vpn_base, rango_tornado):
         title=f"Diagrama Tornado – Variación del VPN (±{rango_tornado}%)",
         xaxis_title="Variación del VPN respecto al caso base ($)",
         yaxis_title="Variables",
+        yaxis=dict(autorange="reversed"),
         barmode="overlay",
-        height=400,
+        height=max(400, 22 * len(nombres)),
         showlegend=True
     )
 
     return fig
 
 
+@en_cache()
 def calcular_tornado(
     flujos_base,
     tasa_base,
     vpn_base,
     rango_tornado,
-    calcular_vpn
+    familias=None,
+    metodo="exacto"
 ):
     """
-    Calcula el impacto de cada variable sobre el VPN.
-    Retorna lista ordenada por impacto.
-    """
-
-    variables = {}
-
-    for var_name in ["Flujos de Caja", "Tasa de Descuento", "Inversión Inicial"]:
-
-        if var_name == "Flujos de Caja":
-            flujos_min = [flujos_base[0]] + [f * (1 - rango_tornado/100) for f in flujos_base[1:]]
-            flujos_max = [flujos_base[0]] + [f * (1 + rango_tornado/100) for f in flujos_base[1:]]
-
-            vpn_min = calcular_vpn(flujos_min, tasa_base/100)
-            vpn_max = calcular_vpn(flujos_max, tasa_base/100)
-
-        elif var_name == "Tasa de Descuento":
-            tasa_min = tasa_base * (1 - rango_tornado/100)
-            tasa_max = tasa_base * (1 + rango_tornado/100)
+    Calcula el impacto de cada driver sobre el VPN.
 
-            vpn_min = calcular_vpn(flujos_base, tasa_max/100)
-            vpn_max = calcular_vpn(flujos_base, tasa_min/100)
+    Los drivers salen del registro de src.utils.drivers (por defecto las
+    tres variables clásicas). Con metodo="exacto" las 2·D perturbaciones
+    (−rango y +rango de cada driver) se evalúan en una sola pasada
+    vectorizada; con metodo="gradiente" se extrapolan linealmente desde las
+    derivadas analíticas (exacto para flujos, primer orden para la tasa).
 
-        else:  # Inversión Inicial
-            flujos_min = [flujos_base[0] * (1 + rango_tornado/100)] + flujos_base[1:]
-            flujos_max = [flujos_base[0] * (1 - rango_tornado/100)] + flujos_base[1:]
-
-            vpn_min = calcular_vpn(flujos_min, tasa_base/100)
-            vpn_max = calcular_vpn(flujos_max, tasa_base/100)
+    Args:
+        flujos_base: Flujos de caja base
+        tasa_base: Tasa de descuento base (%)
+        vpn_base: VPN del caso base
+        rango_tornado: Variación de cada driver (±%)
+        familias: Familias de drivers a incluir (ver FAMILIAS_DRIVERS)
+        metodo: "exacto" o "gradiente"
 
-        variables[var_name] = {
-            "min": vpn_min,
-            "max": vpn_max,
-            "rango": abs(vpn_max - vpn_min)
-        }
+    Returns:
+        Lista de (driver, {"min", "max", "rango"}) ordenada por impacto
+    """
+    flujos = np.asarray(flujos_base, dtype=float)
+    drivers = construir_drivers(flujos, familias)
+    delta = np.array([-rango_tornado / 100, rango_tornado / 100])
+
+    if metodo == "gradiente":
+        derivadas = derivadas_drivers(flujos, tasa_base, drivers)
+        vpns = derivadas["vpn"] + derivadas["d_vpn"][:, None] * delta
+    else:
+        vpns = evaluar_transformacion(
+            flujos, tasa_base,
+            transformacion_drivers(drivers, flujos.size, 1 + delta),
+            indicadores=("vpn",)
+        )["vpn"]
+
+    vpn_min = vpns.min(axis=1)
+    vpn_max = vpns.max(axis=1)
+    rangos = np.abs(vpn_max - vpn_min)
 
     # Ordenar por impacto
-    return sorted(variables.items(), key=lambda x: x[1]["rango"], reverse=True)
+    orden = np.argsort(-rangos, kind="stable")
+    return [
+        (drivers[i]["nombre"], {
+            "min": float(vpn_min[i]),
+            "max": float(vpn_max[i]),
+            "rango": float(rangos[i])
+        })
+        for i in orden
+    ]
 
 
 
@@ -715,7 +1331,7 @@ def tabla_tornado(vars_ordenadas):
             "VPN Mínimo": f"${datos['min']:,.2f}",
             "VPN Máximo": f"${datos['max']:,.2f}",
             "Rango": f"${datos['rango']:,.2f}",
-            "Sensibilidad": "🔴" * int((datos["rango"] / max_rango) * 5)
+            "Sensibilidad": "🔴" * int((datos["rango"] / max_rango) * 5) if max_rango > 0 else ""
         }
         for var, datos in vars_ordenadas
     ])
@@ -0,0 +1,188 @@
+import numpy as np
+
+from src.utils.eval_basica import calcular_vpn_lote, calcular_tir_lote, calcular_bc_lote
+from src.utils.drivers import FAMILIAS_DRIVERS
+
+
+# ======================================================
+# MOTOR DE VARIACIONES
+# ======================================================
+# Toda variación del proyecto (sensibilidad univariada, bivariada,
+# factorial, tornado, escenarios e informe) se expresa como una
+# transformación multiplicativa:
+#     (multiplicadores (..., T) de los flujos, factores (...) de la tasa)
+# Las transformaciones se componen por producto (con broadcasting entre
+# ejes) o se apilan en un mismo eje, y se evalúan en lote con los kernels
+# vectorizados de eval_basica.
+
+# Límite de elementos (celdas × periodos) por bloque en las evaluaciones por
+# bloques (rejilla bivariada, factorial)
+MAX_ELEMENTOS_BLOQUE = 4_000_000
+
+
+def _buscar_driver(variable, flujos):
+    """Driver del registro con ese nombre (familia de un solo driver o driver concreto)."""
+    if variable in FAMILIAS_DRIVERS:
+        drivers = FAMILIAS_DRIVERS[variable](flujos)
+        if len(drivers) == 1:
+            return drivers[0]
+    for familia in FAMILIAS_DRIVERS:
+        for candidato in FAMILIAS_DRIVERS[familia](flujos):
+            if candidato["nombre"] == variable:
+                return candidato
+    raise ValueError(f"Variable desconocida: {variable}")
+
+
+def transformacion_drivers(drivers, n_periodos, factores):
+    """
+    Transformación de varios drivers para un vector de factores.
+
+    Args:
+        drivers: Lista de D drivers (ver src.utils.drivers)
+        n_periodos: Número de flujos
+        factores: Array (m,) de factores multiplicativos (1 = sin cambio)
+
+    Returns:
+        Tupla (multiplicadores (D, m, T), factores_tasa (D, m))
+    """
+    factores = np.asarray(factores, dtype=float)
+    mascaras = np.array([
+        np.zeros(n_periodos) if d["tasa"] else d["mascara"] for d in drivers
+    ]).reshape(len(drivers), 1, n_periodos)
+    es_tasa = np.array([d["tasa"] for d in drivers], dtype=bool)[:, None]
+
+    multiplicadores = 1 + mascaras * (factores[None, :, None] - 1)
+    factores_tasa = np.where(es_tasa, factores[None, :], 1.0)
+    return multiplicadores, factores_tasa
+
+
+def transformacion(variable, flujos, factores):
+    """
+    Transformación que escala una variable por cada factor.
+
+    Args:
+        variable: Nombre de un driver del registro ("Flujos de Caja",
+            "Tasa de Descuento", "Inversión Inicial", "Valor de Rescate",
+            "Flujo Año k", ...)
+        flujos: Flujos de caja base (T,)
+        factores: Array (m,) de factores multiplicativos
+
+    Returns:
+        Tupla (multiplicadores (m, T), factores_tasa (m,))
+    """
+    flujos = np.asarray(flujos, dtype=float)
+    multiplicadores, factores_tasa = transformacion_drivers(
+        [_buscar_driver(variable, flujos)], flujos.size, np.atleast_1d(factores)
+    )
+    return multiplicadores[0], factores_tasa[0]
+
+
+def factores_variacion(variaciones_pct):
+    """Convierte variaciones porcentuales en factores multiplicativos."""
+    return 1 + np.asarray(variaciones_pct, dtype=float) / 100
+
+
+def componer(*transformaciones):
+    """
+    Compone transformaciones por producto.
+
+    Las formas se combinan por broadcasting: para una rejilla se colocan en
+    ejes distintos, p. ej. (m1[:, None], f1[:, None]) y (m2[None], f2[None]).
+    """
+    multiplicadores, factores_tasa = transformaciones[0]
+    for mult, fact in transformaciones[1:]:
+        multiplicadores = multiplicadores * mult
+        factores_tasa = factores_tasa * fact
+    return multiplicadores, factores_tasa
+
+
+def apilar(*transformaciones):
+    """Une varias transformaciones (m_i, T) en una sola (Σ m_i, T)."""
+    return (
+        np.concatenate([np.atleast_2d(m) for m, _ in transformaciones]),
+        np.concatenate([np.atleast_1d(f) for _, f in transformaciones])
+    )
+
+
+def aplicar_transformacion(flujos, tasa, transformacion_):
+    """
+    Aplica una transformación a los flujos y a la tasa base.
+
+    Returns:
+        Tupla (flujos (..., T), tasas (...) en %)
+    """
+    multiplicadores, factores_tasa = transformacion_
+    return np.asarray(flujos, dtype=float) * multiplicadores, tasa * factores_tasa
+
+
+def evaluar_transformacion(flujos, tasa, transformacion_, indicadores=("vpn", "tir", "bc")):
+    """
+    Evalúa los indicadores del proyecto transformado en una sola pasada.
+
+    Args:
+        flujos: Flujos de caja base (T,)
+        tasa: Tasa de descuento base (%)
+        transformacion_: Tupla (multiplicadores, factores_tasa)
+        indicadores: Subconjunto de ("vpn", "tir", "bc")
+
+    Returns:
+        dict {indicador: array}; la TIR es NaN donde no converge
+    """
+    flujos_mod, tasas = aplicar_transformacion(flujos, tasa, transformacion_)
+    forma = np.broadcast_shapes(flujos_mod.shape[:-1], np.shape(tasas))
+
+    resultado = {}
+    if "vpn" in indicadores:
+        resultado["vpn"] = calcular_vpn_lote(flujos_mod, tasas / 100)
+    if "bc" in indicadores:
+        resultado["bc"] = calcular_bc_lote(flujos_mod, tasas / 100)
+    if "tir" in indicadores:
+        tirs, convergido = calcular_tir_lote(flujos_mod)
+        resultado["tir"] = np.broadcast_to(np.where(convergido, tirs, np.nan), forma)
+    return resultado
+
+
+def aplicar_variacion(
+    variable,
+    flujos_base,
+    tasa_base,
+    variacion_pct
+):
+    """
+    Aplica una variación porcentual a una variable del proyecto.
+
+    Una variable desconocida deja el proyecto sin cambios.
+
+    Returns:
+        Tupla (flujos modificados como lista, tasa modificada en %)
+    """
+    try:
+        transformacion_ = transformacion(variable, flujos_base, factores_variacion([variacion_pct]))
+    except ValueError:
+        return list(flujos_base), tasa_base
+    flujos, tasas = aplicar_transformacion(flujos_base, tasa_base, transformacion_)
+    return flujos[0].tolist(), float(tasas[0])
+
+
+def aplicar_variacion_lote(
+    variable,
+    flujos_base,
+    tasa_base,
+    variaciones_pct
+):
+    """
+    Versión vectorizada de aplicar_variacion para un vector de variaciones.
+
+    Args:
+        variable: Variable a variar
+        flujos_base: Flujos de caja base (T,)
+        tasa_base: Tasa de descuento base (%)
+        variaciones_pct: Array (m,) de variaciones porcentuales
+
+    Returns:
+        Tupla (flujos (m, T), tasas (m,) en %)
+    """
+    return aplicar_transformacion(
+        flujos_base, tasa_base,
+        transformacion(variable, flujos_base, factores_variacion(variaciones_pct))
+    )
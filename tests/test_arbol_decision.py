@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+
+from src.utils.arbol_decision import (
+    rama, nodo_azar, nodo_decision, nodo_terminal, evaluar_arbol, arbol_abandono
+)
+from src.utils.eval_basica import calcular_vpn
+
+TASA = 10.0
+
+
+def valor_referencia(nodo, tasa):
+    """Retroceso recursivo directo sobre el árbol sin compilar."""
+    if nodo["tipo"] == "terminal":
+        return 0.0
+    valores = [
+        calcular_vpn(r["flujos"], tasa / 100) + valor_referencia(r["hijo"], tasa)
+        for r in nodo["ramas"]
+    ]
+    if nodo["tipo"] == "decision":
+        return max(valores)
+    return sum(r["probabilidad"] / 100 * v for r, v in zip(nodo["ramas"], valores))
+
+
+def arbol_aleatorio(rng, profundidad):
+    if profundidad == 0:
+        return nodo_terminal()
+    n_ramas = int(rng.integers(2, 4))
+    flujos = [np.zeros(int(rng.integers(1, 6))) for _ in range(n_ramas)]
+    for f in flujos:
+        f[-1] = rng.normal(0, 10000)
+    hijos = [arbol_aleatorio(rng, profundidad - 1) for _ in range(n_ramas)]
+    if rng.random() < 0.5:
+        return nodo_decision(f"D{profundidad}", [
+            rama(f"a{k}", hijo, f) for k, (hijo, f) in enumerate(zip(hijos, flujos))
+        ])
+    probabilidades = rng.dirichlet(np.ones(n_ramas)) * 100
+    probabilidades[-1] = 100 - probabilidades[:-1].sum()
+    return nodo_azar(f"A{profundidad}", [
+        rama(f"r{k}", hijo, f, p) for k, (hijo, f, p) in enumerate(zip(hijos, flujos, probabilidades))
+    ])
+
+
+@pytest.mark.parametrize("semilla", range(5))
+def test_retroceso_por_niveles_igual_a_recursion(semilla):
+    arbol = arbol_aleatorio(np.random.default_rng(semilla), 4)
+    assert evaluar_arbol(arbol, TASA)["valor"] == pytest.approx(valor_referencia(arbol, TASA))
+
+
+def test_decision_elige_la_mejor_alternativa():
+    fin = nodo_terminal()
+    arbol = nodo_decision("Invertir", [
+        rama("No", fin),
+        rama("Sí", fin, [-100, 60, 60]),
+        rama("Grande", fin, [-300, 150, 150])
+    ])
+    resultado = evaluar_arbol(arbol, TASA)
+    assert resultado["decision"] == "Sí"
+    assert resultado["valor"] == pytest.approx(calcular_vpn([-100, 60, 60], TASA / 100))
+
+
+def test_subarboles_identicos_se_evaluan_una_vez():
+    def mercado():
+        # Objetos distintos con el mismo contenido: se deduplican por hash
+        return nodo_azar("Mercado", [
+            rama("Alto", nodo_terminal(), [0, 100], 50),
+            rama("Bajo", nodo_terminal(), [0, -50], 50)
+        ])
+
+    arbol = nodo_decision("Raíz", [rama(f"opción {k}", mercado(), [-k]) for k in range(100)])
+    resultado = evaluar_arbol(arbol, TASA)
+    assert resultado["nodos_visitados"] == 1 + 100 * 3
+    assert resultado["nodos_unicos"] == 3
+    assert resultado["valor"] == pytest.approx(valor_referencia(arbol, TASA))
+
+
+def test_abandono_sin_rescate_no_supera_al_optimo():
+    flujos = [-100000, 30000, 35000, 40000, 25000, 30000]
+    con_opcion = evaluar_arbol(arbol_abandono(flujos, 60, 1.3, 0.6, rescate_pct=50), TASA)["valor"]
+    sin_rescate = evaluar_arbol(arbol_abandono(flujos, 60, 1.3, 0.6, rescate_pct=0), TASA)["valor"]
+    assert con_opcion >= sin_rescate
+
+
+def test_probabilidades_invalidas():
+    with pytest.raises(ValueError):
+        nodo_azar("X", [rama("a", nodo_terminal(), probabilidad=60),
+                        rama("b", nodo_terminal(), probabilidad=30)])
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from src.utils.cache import CacheResultados, clave_cache, en_cache
+from src.utils.montecarlo import AcumuladorVPN
+
+
+def test_clave_depende_del_contenido_y_del_tipo():
+    assert clave_cache([1, 2]) == clave_cache(np.array([1.0, 2.0]))
+    assert clave_cache({"a": 1, "b": 2}) == clave_cache({"b": 2, "a": 1})
+    assert clave_cache([None]) != clave_cache([np.nan])
+    assert clave_cache(["1.5"]) != clave_cache([1.5])
+    with pytest.raises(TypeError):
+        clave_cache(lambda x: x)
+
+
+def test_resultados_en_cache_no_se_comparten():
+    cache = CacheResultados()
+    llamadas = []
+
+    @en_cache(cache=cache)
+    def simular(x):
+        llamadas.append(x)
+        return {"vpns": np.arange(3.0), "acumulador": AcumuladorVPN(-1, 1, 8).agregar([x])}
+
+    primero = simular(0.5)
+    primero["acumulador"].agregar([0.1, 0.2])
+    primero["extra"] = True
+    segundo = simular(0.5)
+
+    assert llamadas == [0.5]
+    assert segundo["acumulador"].n == 1
+    assert "extra" not in segundo
+    with pytest.raises(ValueError):
+        segundo["vpns"][0] = 1.0
+
+
+def test_limite_de_memoria_descarta_los_menos_usados():
+    cache = CacheResultados(memoria_maxima=3 * 800)
+    for k in range(5):
+        cache.guardar(k, np.zeros(90))
+    assert 0 not in cache and 4 in cache
@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+from src.utils.eval_basica import calcular_vpn
+from src.utils.equilibrio import punto_equilibrio_lote, puntos_equilibrio, puntos_equilibrio_drivers
+from src.utils.variaciones import aplicar_variacion
+
+FLUJOS = [-100000, 30000, 35000, 40000, 25000, 30000]
+TASA = 10.0
+
+
+@pytest.mark.parametrize("variable", ["Flujos de Caja", "Tasa de Descuento", "Inversión Inicial"])
+def test_equilibrio_anula_el_vpn(variable):
+    equilibrio = punto_equilibrio_lote(variable, FLUJOS, TASA)
+    flujos, tasa = aplicar_variacion(variable, FLUJOS, TASA, equilibrio)
+    assert calcular_vpn(flujos, tasa / 100) == pytest.approx(0.0, abs=1e-6)
+
+
+def test_equilibrio_lote_igual_a_proyecto_a_proyecto():
+    rng = np.random.default_rng(4)
+    flujos = rng.uniform(10000, 50000, size=(25, 6))
+    flujos[:, 0] = -rng.uniform(60000, 150000, size=25)
+    tasas = rng.uniform(5, 20, size=25)
+    for variable in ("Flujos de Caja", "Tasa de Descuento", "Inversión Inicial"):
+        lote = punto_equilibrio_lote(variable, flujos, tasas)
+        for k in range(25):
+            assert lote[k] == pytest.approx(punto_equilibrio_lote(variable, flujos[k], tasas[k]))
+
+
+def test_sin_equilibrio_devuelve_none():
+    resultado = puntos_equilibrio([0.0, 30000, 30000], TASA)
+    assert resultado["Inversión Inicial"] is None
+
+
+def test_drivers_coinciden_con_forma_cerrada():
+    cerrada = puntos_equilibrio(FLUJOS, TASA)
+    drivers = puntos_equilibrio_drivers(FLUJOS, TASA)
+    for variable, valor in cerrada.items():
+        assert drivers[variable] == pytest.approx(valor)
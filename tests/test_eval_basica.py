@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+from scipy.optimize import brentq
+
+from src.utils.eval_basica import (
+    calcular_vpn, calcular_tir, calcular_bc,
+    calcular_vpn_lote, calcular_tir_lote, calcular_bc_lote
+)
+
+
+def vpn_referencia(flujos, tasa):
+    return sum(f / (1 + tasa) ** t for t, f in enumerate(flujos))
+
+
+def bc_referencia(flujos, tasa):
+    # Mismos exponentes que calcular_bc: el beneficio de t se descuenta t-1 periodos
+    beneficios = sum(max(f, 0) / (1 + tasa) ** (t - 1) for t, f in enumerate(flujos) if t > 0)
+    return beneficios / abs(flujos[0]) if flujos[0] else 0.0
+
+
+@pytest.fixture
+def proyectos():
+    rng = np.random.default_rng(0)
+    flujos = rng.uniform(5000, 50000, size=(40, 8))
+    flujos[:, 0] = -rng.uniform(50000, 250000, size=40)
+    return flujos
+
+
+def test_vpn_escalar_coincide_con_referencia():
+    flujos = [-100000, 30000, 35000, 40000, 25000]
+    assert calcular_vpn(flujos, 0.1) == pytest.approx(vpn_referencia(flujos, 0.1))
+
+
+@pytest.mark.parametrize("forma_tasas", ["escalar", "por_fila", "cruzada"])
+def test_vpn_lote_coincide_con_escalar(proyectos, forma_tasas):
+    tasas = np.linspace(0.0, 0.4, 7)
+    if forma_tasas == "escalar":
+        vpns = calcular_vpn_lote(proyectos, 0.12)
+        esperado = [vpn_referencia(f, 0.12) for f in proyectos]
+    elif forma_tasas == "por_fila":
+        tasas_fila = np.resize(tasas, len(proyectos))
+        vpns = calcular_vpn_lote(proyectos, tasas_fila)
+        esperado = [vpn_referencia(f, r) for f, r in zip(proyectos, tasas_fila)]
+    else:
+        vpns = calcular_vpn_lote(proyectos[:, None, :], tasas)
+        esperado = [[vpn_referencia(f, r) for r in tasas] for f in proyectos]
+    np.testing.assert_allclose(vpns, esperado, rtol=1e-12, atol=1e-6)
+
+
+def test_tir_lote_coincide_con_raiz_de_referencia(proyectos):
+    tirs, convergido = calcular_tir_lote(proyectos)
+    for flujos, tir, ok in zip(proyectos, tirs, convergido):
+        esperado = brentq(lambda r: vpn_referencia(flujos, r), -0.99, 10.0)
+        assert ok
+        assert tir == pytest.approx(esperado * 100, rel=1e-8, abs=1e-8)
+        assert vpn_referencia(flujos, tir / 100) == pytest.approx(0.0, abs=1e-4)
+
+
+def test_tir_sin_raiz_no_converge():
+    tirs, convergido = calcular_tir_lote(np.array([[100.0, 50.0, 50.0], [-100.0, 60.0, 60.0]]))
+    assert not convergido[0] and np.isnan(tirs[0])
+    assert convergido[1]
+    assert calcular_tir([100.0, 50.0, 50.0]) is None
+
+
+def test_bc_lote_coincide_con_escalar(proyectos):
+    tasas = np.resize(np.linspace(0.05, 0.3, 5), len(proyectos))
+    np.testing.assert_allclose(
+        calcular_bc_lote(proyectos, tasas),
+        [bc_referencia(f, r) for f, r in zip(proyectos, tasas)],
+        rtol=1e-12
+    )
+    assert calcular_bc(proyectos[0], 0.1) == pytest.approx(bc_referencia(proyectos[0], 0.1))
+
+
+def test_bc_sin_inversion_es_cero():
+    assert calcular_bc([0.0, 50.0, 50.0], 0.1) == 0.0
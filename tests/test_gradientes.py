@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from src.utils.drivers import construir_drivers, FAMILIAS_DRIVERS
+from src.utils.eval_basica import calcular_vpn, calcular_tir
+from src.utils.gradientes import gradiente_vpn, gradiente_tir, derivadas_drivers
+from src.utils.variaciones import transformacion, evaluar_transformacion
+
+FLUJOS = np.array([-100000, 30000, 35000, -5000, 40000, 30000], dtype=float)
+TASA = 10.0
+H = 1e-6
+
+
+def test_gradiente_vpn_igual_a_diferencias_finitas():
+    gradiente = gradiente_vpn(FLUJOS, TASA)
+    for t in range(FLUJOS.size):
+        paso = np.zeros(FLUJOS.size)
+        paso[t] = 1.0
+        numerica = calcular_vpn(FLUJOS + paso, TASA / 100) - calcular_vpn(FLUJOS, TASA / 100)
+        assert gradiente["flujos"][t] == pytest.approx(numerica, rel=1e-6)
+
+    r = TASA / 100
+    numerica = (calcular_vpn(FLUJOS, r + H) - calcular_vpn(FLUJOS, r - H)) / (2 * H)
+    assert gradiente["tasa"] == pytest.approx(numerica, rel=1e-5)
+
+
+def test_gradiente_tir_igual_a_diferencias_finitas():
+    gradiente = gradiente_tir(FLUJOS)
+    for t in range(FLUJOS.size):
+        paso = np.zeros(FLUJOS.size)
+        paso[t] = 1.0
+        numerica = (calcular_tir(FLUJOS + paso) - calcular_tir(FLUJOS - paso)) / 2
+        assert gradiente["flujos"][t] == pytest.approx(numerica, rel=1e-4)
+
+
+def test_derivadas_drivers_igual_a_diferencias_finitas():
+    drivers = construir_drivers(FLUJOS, list(FAMILIAS_DRIVERS))
+    derivadas = derivadas_drivers(FLUJOS, TASA, drivers)
+    for d, d_vpn in zip(drivers, derivadas["d_vpn"]):
+        evaluado = evaluar_transformacion(
+            FLUJOS, TASA, transformacion(d["nombre"], FLUJOS, [1 - H, 1 + H]), ("vpn",)
+        )["vpn"]
+        assert d_vpn == pytest.approx((evaluado[1] - evaluado[0]) / (2 * H), rel=1e-5, abs=1e-3)
@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+from src.utils.indices_sobol import calcular_indices_sobol
+
+FLUJOS = [-100000, 30000, 35000, 40000, 25000, 30000]
+# Multiplicador degenerado (desviación casi nula) para fijar una variable
+FIJA = {"tipo": "Normal", "media": 1.0, "desv": 1e-12}
+
+
+def test_una_sola_variable_aleatoria_explica_toda_la_varianza():
+    resultado = calcular_indices_sobol.__wrapped__(
+        FLUJOS, 10, n=20_000, semilla=0,
+        distribuciones={"Flujos de Caja": FIJA, "Tasa de Descuento": FIJA}
+    )
+    indices = dict(zip(resultado["variables"], zip(resultado["primer_orden"], resultado["total"])))
+    primer, total = indices["Inversión Inicial"]
+    assert primer == pytest.approx(1.0, abs=0.02)
+    assert total == pytest.approx(1.0, abs=0.02)
+    for variable in ("Flujos de Caja", "Tasa de Descuento"):
+        assert abs(indices[variable][0]) < 0.02
+        assert indices[variable][1] == pytest.approx(0.0, abs=1e-6)
+
+
+def test_indices_coherentes_con_intervalos():
+    resultado = calcular_indices_sobol.__wrapped__(FLUJOS, 10, n=20_000, semilla=1, n_bootstrap=50)
+    # Modelo casi aditivo: primer orden y total casi iguales y suman cerca de 1
+    assert resultado["primer_orden"].sum() == pytest.approx(1.0, abs=0.05)
+    np.testing.assert_allclose(resultado["total"], resultado["primer_orden"], atol=0.05)
+    assert resultado["ic_total"].shape == (3, 2)
+    assert np.all(resultado["ic_total"][:, 0] <= resultado["total"])
+    assert np.all(resultado["total"] <= resultado["ic_total"][:, 1])
+    assert resultado["n_evaluaciones"] == 20_000 * 5
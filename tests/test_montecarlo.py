@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+
+from src.utils.montecarlo import (
+    AcumuladorVPN,
+    simulacion_montecarlo_streaming,
+    simulacion_montecarlo_reducida,
+    REPLICAS_SOBOL
+)
+
+FLUJOS = [-100000, 30000, 35000, 40000, 25000, 30000]
+
+
+@pytest.fixture
+def muestra():
+    return np.random.default_rng(1).normal(5000, 20000, 100_003)
+
+
+def test_acumulador_por_bloques_igual_a_muestra_completa(muestra):
+    acumulador = AcumuladorVPN(-1e5, 1e5)
+    for bloque in np.array_split(muestra, 7):
+        acumulador.agregar(bloque)
+
+    assert acumulador.n == muestra.size
+    assert acumulador.media == pytest.approx(np.mean(muestra), rel=1e-12)
+    assert acumulador.m2 / acumulador.n == pytest.approx(np.var(muestra), rel=1e-10)
+    assert acumulador.negativos == np.count_nonzero(muestra < 0)
+    assert acumulador.minimo == muestra.min()
+    assert acumulador.maximo == muestra.max()
+
+
+def test_combinar_parciales_igual_a_un_solo_acumulador(muestra):
+    completo = AcumuladorVPN(-1e5, 1e5).agregar(muestra)
+    partes = [AcumuladorVPN(-1e5, 1e5).agregar(b) for b in np.array_split(muestra, 5)]
+    combinado = partes[0]
+    for parte in partes[1:]:
+        combinado.combinar(parte)
+
+    assert combinado.n == completo.n
+    assert combinado.media == pytest.approx(completo.media, rel=1e-12)
+    assert combinado.m2 == pytest.approx(completo.m2, rel=1e-10)
+    np.testing.assert_array_equal(combinado.conteos, completo.conteos)
+    np.testing.assert_allclose(combinado.sumas, completo.sumas)
+
+
+def test_cuantiles_dentro_de_un_bin(muestra):
+    acumulador = AcumuladorVPN.desde_muestra(muestra[:1000]).agregar(muestra)
+    ancho = acumulador.bordes[1] - acumulador.bordes[0]
+    for q in (0.01, 0.05, 0.5, 0.95):
+        assert acumulador.cuantil(q) == pytest.approx(np.quantile(muestra, q), abs=ancho)
+    cola = np.sort(muestra)[:int(0.05 * muestra.size)].mean()
+    assert acumulador.cola_inferior(0.05) == pytest.approx(cola, abs=ancho)
+
+
+def test_combinar_exige_mismos_bordes():
+    with pytest.raises(ValueError):
+        AcumuladorVPN(0, 1).combinar(AcumuladorVPN(0, 2).agregar([0.5]))
+
+
+def test_streaming_reproducible_con_cualquier_numero_de_procesos():
+    uno = simulacion_montecarlo_streaming(FLUJOS, 10, 20_000, semilla=3, bloque=4_000, procesos=1)
+    dos = simulacion_montecarlo_streaming(FLUJOS, 10, 20_000, semilla=3, bloque=4_000, procesos=2)
+    assert uno.n == dos.n == 20_000
+    assert uno.media == dos.media
+    np.testing.assert_array_equal(uno.conteos, dos.conteos)
+
+
+def test_streaming_rechaza_n_vacio():
+    with pytest.raises(ValueError):
+        simulacion_montecarlo_streaming(FLUJOS, 10, 0)
+
+
+@pytest.mark.parametrize("metodo", ["estandar", "antiteticas", "variable_control", "sobol"])
+def test_reducida_respeta_n_y_n_max(metodo):
+    simular = simulacion_montecarlo_reducida.__wrapped__
+    n = simular(FLUJOS, 10, metodo, n=10_001, semilla=1)["n"]
+    assert n <= 10_001
+    if metodo != "sobol":
+        assert n == 10_001
+    else:
+        assert n // REPLICAS_SOBOL & (n // REPLICAS_SOBOL - 1) == 0
+
+    adaptativo = simular(FLUJOS, 10, metodo, n=1_000, semilla=1, error_objetivo=1e-9, n_max=5_000)
+    assert adaptativo["n"] <= 5_000
+
+
+def test_reducida_estima_el_mismo_vpn_esperado():
+    simular = simulacion_montecarlo_reducida.__wrapped__
+    estandar = simular(FLUJOS, 10, "estandar", n=200_000, semilla=2)
+    for metodo in ("antiteticas", "variable_control", "sobol"):
+        resultado = simular(FLUJOS, 10, metodo, n=50_000, semilla=2)
+        tolerancia = 4 * (estandar["error_estandar"] + resultado["error_estandar"])
+        assert resultado["vpn_esperado"] == pytest.approx(estandar["vpn_esperado"], abs=tolerancia)
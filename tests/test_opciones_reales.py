@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+from scipy.stats import norm
+
+from src.utils.opciones_reales import (
+    MODELOS_RETICULA, parametros_reticula, valorar_reticula, valorar_opcion_real
+)
+
+
+def black_scholes(s, k, plazo, volatilidad, tasa_libre, call=True):
+    sigma, r = volatilidad / 100, tasa_libre / 100
+    d1 = (np.log(s / k) + (r + sigma ** 2 / 2) * plazo) / (sigma * np.sqrt(plazo))
+    d2 = d1 - sigma * np.sqrt(plazo)
+    if call:
+        return s * norm.cdf(d1) - k * np.exp(-r * plazo) * norm.cdf(d2)
+    return k * np.exp(-r * plazo) * norm.cdf(-d2) - s * norm.cdf(-d1)
+
+
+@pytest.mark.parametrize("modelo", list(MODELOS_RETICULA))
+@pytest.mark.parametrize("call", [True, False])
+def test_europea_converge_a_black_scholes(modelo, call):
+    pago = (lambda v: np.maximum(v - 100, 0.0)) if call else (lambda v: np.maximum(100 - v, 0.0))
+    valor = valorar_reticula(100, pago, 1.0, 20, 5, pasos=2000, modelo=modelo, americana=False)
+    assert valor == pytest.approx(black_scholes(100, 100, 1.0, 20, 5, call), abs=5e-3)
+
+
+@pytest.mark.parametrize("modelo", list(MODELOS_RETICULA))
+def test_americana(modelo):
+    put = lambda v: np.maximum(100 - v, 0.0)
+    call = lambda v: np.maximum(v - 100, 0.0)
+    put_americana = valorar_reticula(100, put, 1.0, 20, 5, pasos=1000, modelo=modelo)
+    # El ejercicio anticipado vale algo en la put y nada en la call sin rendimiento
+    assert put_americana > black_scholes(100, 100, 1.0, 20, 5, call=False) + 0.1
+    assert valorar_reticula(100, call, 1.0, 20, 5, pasos=1000, modelo=modelo) == pytest.approx(
+        valorar_reticula(100, call, 1.0, 20, 5, pasos=1000, modelo=modelo, americana=False)
+    )
+
+
+def test_modelos_coinciden_entre_si():
+    put = lambda v: np.maximum(100 - v, 0.0)
+    binomial = valorar_reticula(100, put, 2.0, 30, 4, pasos=2000, modelo="binomial")
+    trinomial = valorar_reticula(100, put, 2.0, 30, 4, pasos=2000, modelo="trinomial")
+    assert binomial == pytest.approx(trinomial, abs=5e-3)
+
+
+@pytest.mark.parametrize("modelo", list(MODELOS_RETICULA))
+def test_probabilidades_neutrales_al_riesgo(modelo):
+    parametros = parametros_reticula(25, 5, 1.0, 500, modelo)
+    probabilidades = np.array(parametros["probabilidades"])
+    assert probabilidades.sum() == pytest.approx(1.0)
+    # El subyacente descontado es martingala en un paso
+    salto = parametros["log_u"]
+    movimientos = np.exp(np.linspace(salto, -salto, probabilidades.size))
+    assert probabilidades @ movimientos * parametros["descuento"] == pytest.approx(1.0, abs=1e-12)
+
+
+def test_opcion_real_sobre_el_proyecto():
+    flujos = [-100000, 30000, 30000, 30000, 30000, 30000]
+    diferir = valorar_opcion_real.__wrapped__(flujos, 10, "diferir", plazo=2, pasos=500)
+    assert diferir["subyacente"] == pytest.approx(diferir["vpn_estatico"] + 100000)
+    # Diferir nunca vale menos que invertir hoy
+    assert diferir["vpn_ampliado"] >= diferir["vpn_estatico"]
+
+    abandonar = valorar_opcion_real.__wrapped__(flujos, 10, "abandonar", rescate=0, pasos=500)
+    assert abandonar["valor_opcion"] == 0.0
+    with pytest.raises(ValueError):
+        valorar_opcion_real.__wrapped__(flujos, 10, "otra")
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from src.utils.eval_basica import calcular_vpn, calcular_tir, calcular_bc
+from src.utils.variaciones import (
+    transformacion,
+    factores_variacion,
+    componer,
+    apilar,
+    aplicar_variacion,
+    evaluar_transformacion
+)
+
+FLUJOS = np.array([-100000, 30000, 35000, 40000, 25000, 30000], dtype=float)
+TASA = 10.0
+VARIABLES = ["Flujos de Caja", "Tasa de Descuento", "Inversión Inicial", "Valor de Rescate", "Flujo Año 2"]
+
+
+@pytest.mark.parametrize("variable", VARIABLES)
+def test_transformacion_igual_a_variacion_escalar(variable):
+    variaciones = np.linspace(-30, 30, 7)
+    resultado = evaluar_transformacion(
+        FLUJOS, TASA, transformacion(variable, FLUJOS, factores_variacion(variaciones))
+    )
+    for k, variacion in enumerate(variaciones):
+        flujos, tasa = aplicar_variacion(variable, FLUJOS.tolist(), TASA, variacion)
+        assert resultado["vpn"][k] == pytest.approx(calcular_vpn(flujos, tasa / 100))
+        assert resultado["bc"][k] == pytest.approx(calcular_bc(flujos, tasa / 100))
+        assert resultado["tir"][k] == pytest.approx(calcular_tir(flujos))
+
+
+def test_rejilla_compuesta_igual_a_bucle():
+    v1, v2 = np.linspace(-20, 20, 5), np.linspace(-50, 50, 4)
+    m1, f1 = transformacion("Flujos de Caja", FLUJOS, factores_variacion(v1))
+    m2, f2 = transformacion("Tasa de Descuento", FLUJOS, factores_variacion(v2))
+    rejilla = evaluar_transformacion(
+        FLUJOS, TASA, componer((m1[:, None], f1[:, None]), (m2[None], f2[None])), ("vpn",)
+    )["vpn"]
+
+    assert rejilla.shape == (5, 4)
+    for i, a in enumerate(v1):
+        for j, b in enumerate(v2):
+            flujos, _ = aplicar_variacion("Flujos de Caja", FLUJOS.tolist(), TASA, a)
+            _, tasa = aplicar_variacion("Tasa de Descuento", FLUJOS.tolist(), TASA, b)
+            assert rejilla[i, j] == pytest.approx(calcular_vpn(flujos, tasa / 100))
+
+
+def test_apilar_concatena_transformaciones():
+    t1 = transformacion("Flujos de Caja", FLUJOS, factores_variacion([-10, 10]))
+    t2 = transformacion("Tasa de Descuento", FLUJOS, factores_variacion([5]))
+    multiplicadores, factores_tasa = apilar(t1, t2)
+    assert multiplicadores.shape == (3, FLUJOS.size)
+    np.testing.assert_allclose(factores_tasa, [1.0, 1.0, 1.05])
+
+
+def test_variable_desconocida_deja_el_proyecto_igual():
+    assert aplicar_variacion("Otra", FLUJOS.tolist(), TASA, 20) == (FLUJOS.tolist(), TASA)
+    with pytest.raises(ValueError):
+        transformacion("Otra", FLUJOS, [1.0])